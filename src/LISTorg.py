@@ -1,69 +1,58 @@
 from modules.job import Job
+from modules.jobstrategy import JobStrategy
 from modules.globalscheduler import GlobalScheduler
 from modules.machine import Machine
-import random
+from modules.taskqueue import FifoTaskQueue
+from modules.machineprogression import advance_machines, skip_machines
+from modules.schedulerconfig import SchedulerConfig, DEFAULT_CONFIG
 import math
 
-# Define the rate of errors in the scheduler
-MEW = 3
-LAMBDA = 1 / MEW
+# These are the constants of the algorithm when the scheduler is
+# not given a config. The callbacks read the constants from the
+# config of the scheduler they run in
+MEW = DEFAULT_CONFIG.mew
+LAMBDA = DEFAULT_CONFIG.get_failure_rate()
+CHECKPOINTING_OVERHEAD = DEFAULT_CONFIG.checkpointing_overhead
+MIGRATION_OVERHEAD = DEFAULT_CONFIG.migration_overhead
+RECOVERY_OVERHEAD = DEFAULT_CONFIG.recovery_overhead
+PERIOD = DEFAULT_CONFIG.get_period()
 
-# Define the checkpointing overhead
-CHECKPOINTING_OVERHEAD = 0.1
-
-# Define the migration overhead for when jobs are
-# migrated to a different processor
-MIGRATION_OVERHEAD = 0.3
-
-# Define the error recovery overhead
-RECOVERY_OVERHEAD = 0.3
-
-# Define the checkpointing period for when a machine
-# should trigger a checkpoint
-PERIOD = ( 2 * MEW * CHECKPOINTING_OVERHEAD ) ** (0.5)
-
-# This function defines the liklehood of an error
-# within the context of the job and the current
-# timestamp
-def job_error_func( job : Job, current_timestamp ):
-    # Define our threshold for error to be uniformly
-    # distributed between 0 and 1
-    ret = random.uniform( 0, 1 )
-
-    # The probality of an error on this job can be represented
-    # by this CDF
-    p = 1 - ( math.e ) ** ( -LAMBDA * ( current_timestamp - job.get_last_checkpoint_time() ) )
-
-    # Determine whether the probablity of error exceeds the
-    # threshold of errors 
-    return p > ret
-    
 def job_comparison_func( job1 : Job, job2 : Job ):
     #This function compares the jobs to sort them within the global scheduler.
     #LIST sorts by longest processing time first, has no priority system.
-    if job1._runtime == job2._runtime: #first check if they have the same runtime.
+    if job1.get_runtime() == job2.get_runtime(): #first check if they have the same runtime.
         #if they have the same runtime, then just sort by release time to get the earlier job higher priority.
-        if job1._release_time == job2._release_time:
+        if job1.get_release_time() == job2.get_release_time():
             return 0 #same release time then just return 0, doesn't matter which way is sorted.
         
-        elif job1._release_time > job2._release_time:
+        elif job1.get_release_time() > job2.get_release_time():
             return -1 #job1 release time is greater, therefore it is a newer job so it is behind job2.
         
         else:
             return 1
     
-    elif job1._runtime > job2._runtime:
+    elif job1.get_runtime() > job2.get_runtime():
         return 1 #job1 has a longer runtime, so it stays in front.
     
     else:
         return -1 #job2 has a longer runtime, so swap it to front.
-    
+
+# This function creates the strategy shared by every job of this
+# algorithm. Jobs fail at the failure rate of the config per unit of
+# running time
+def job_strategy( config : SchedulerConfig ):
+    return JobStrategy( job_comparison_func, failure_rate = config.get_failure_rate() )
+
+# This is the strategy of the jobs when the scheduler is not given
+# a config
+JOB_STRATEGY = job_strategy( DEFAULT_CONFIG )
+
 # This function determines the behavior of a machine
 # that is progressing in the current machine
 def machine_progression_func( machine : Machine, current_timestamp, progression_amount ):
     # Remove any floating point errors in the lock time
-    if machine._lock_time < 0.000001:
-        machine._lock_time = 0
+    if machine.get_lock_time() < 0.000001:
+        machine.set_lock_time( 0 )
 
     # Check to see if the machine is free
     if machine.is_machine_free():
@@ -76,32 +65,30 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
         # job on the machine
         curr_job = machine.get_curr_job()
 
-        # While the current timestamp is later than the next expected time
-        # the machine is supposed to checkpoint, do the following
-        while( current_timestamp >= machine.get_checkpoint_time() ):
-            # Set the current job's checkpoint time to the current
-            # check point for the machine 
-            curr_job.set_last_checkpoint_time( machine.get_checkpoint_time() )
+        # Move the machine's checkpointing time past the current timestamp,
+        # counting every checkpoint boundary that the machine has passed
+        num_checkpoints, last_checkpoint_time = machine.catch_up_checkpoint_time( current_timestamp )
 
-            # Increment the machine's checkpointing time to the next
-            # time to checkpoint
-            machine.progress_checkpoint_time()
+        if num_checkpoints > 0:
+            # Set the current job's checkpoint time to the last
+            # check point for the machine 
+            curr_job.set_last_checkpoint_time( last_checkpoint_time )
 
         # Check to see if we can potentially remove the lock
         # on the machine and progress the job as well
-        if( progression_amount > machine._lock_time ):
+        if( progression_amount > machine.get_lock_time() ):
             # Locally store the original lock time
-            orig_lock_time = machine._lock_time
+            orig_lock_time = machine.get_lock_time()
 
             # Indicate that the current job was waiting for at
             # least lock time units of time
-            curr_job.add_waiting_time( machine._lock_time )
+            curr_job.add_waiting_time( machine.get_lock_time() )
 
             # Attempt to progress on the remaining units of progression
-            ret = curr_job.progress( current_timestamp, progression_amount - machine._lock_time )
+            ret = curr_job.progress( current_timestamp, progression_amount - machine.get_lock_time(), machine.get_stream() )
 
             # Indicate that the machine is no longer locked
-            machine._lock_time = 0
+            machine.set_lock_time( 0 )
 
             # Indicate that this progreession was active progression
             # for the lock time + any prgression made on the job
@@ -111,12 +98,12 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
             # In the case that this machine has locked for more than the progression
             # that we have available, just reduce the lock time. We have this check
             # to account for floating point errors
-            if math.isclose( machine._lock_time, progression_amount , rel_tol=1e-9 ):
-                progression_amount = machine._lock_time
-                machine._lock_time = 0
+            if math.isclose( machine.get_lock_time(), progression_amount , rel_tol=1e-9 ):
+                progression_amount = machine.get_lock_time()
+                machine.set_lock_time( 0 )
 
             else:
-                machine._lock_time -= progression_amount
+                machine.set_lock_time( machine.get_lock_time() - progression_amount )
 
             # Indicate that the job was waiting for the progression
             # amount
@@ -132,10 +119,16 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
 def machine_checkpointing_func( machine : Machine ):
     pass
 
+# This function creates the queue that the scheduler keeps
+# waiting jobs in
+def task_queue_func():
+    # Jobs are handed out in the order they arrive
+    return FifoTaskQueue()
+
 # This function adds new jobs to the scheduler
 def new_job_func( scheduler : GlobalScheduler, job : Job ):
     # Just add the job to the end of the queue
-    scheduler.task_queue.append( job )
+    scheduler.task_queue.push( job )
 
 # This function defines the rescheduling behavior for
 # this algorithm
@@ -145,63 +138,41 @@ def reschedule_func( scheduler : GlobalScheduler ):
     if len( scheduler.task_queue ) == 0:
         return
 
-    # For every machine that is in the scheduler, do the following
-    for machine in scheduler.machines:
-        # If the machine is free and is not locked, schedule the new job
-        if machine.is_machine_free() and machine.get_lock_time() < 0.000001 and len( scheduler.task_queue ) > 0:
-            machine._lock_time = 0
-            new_job = scheduler.task_queue.pop( 0 )
-            new_job.set_first_schedule_time( scheduler._current_timestamp )
-            machine.set_curr_job( new_job )
+    # While there is a free machine that is not locked and a job
+    # to schedule, place the next job on the free machine with the
+    # lowest id
+    while scheduler.has_free_machine() and len( scheduler.task_queue ) > 0:
+        machine = scheduler.get_free_machine()
+        machine.set_lock_time( 0 )
+        new_job = scheduler.task_queue.pop()
+        new_job.set_first_schedule_time( scheduler._current_timestamp )
+        machine.set_curr_job( new_job )
+
+        if scheduler.events is not None:
+            scheduler.events.record( 'schedule', machine.get_id(), new_job.get_id() )
+
+# This function determines how a machine recovers a job that
+# ran into an error after progression_time units of progress
+def job_recovery_func( scheduler : GlobalScheduler, machine : Machine, job : Job, progression_time ):
+    # Count the error in the metrics of the run
+    scheduler.metrics.count( 'errors' )
+
+    # Add lock for recovery and restart the job. The error event
+    # already records the lock
+    machine.add_lock_time( scheduler.config.recovery_overhead, record_event=False )
+    job.restart_job()
+
+    # Indicate when the job was last checkpointed
+    job.set_last_checkpoint_time( scheduler._current_timestamp + progression_time )
 
 # This function determines the behavior of the scheduler during the current timestamp
 def curr_timestamp_func( scheduler : GlobalScheduler ):
-    # First initalize the progress map to indicate that every machine
-    # can make 1 unit of progress
-    total_progress_map = [ [ machine.get_id(), 1 ] for machine in scheduler.machines ]
-
-    # The following code will be executed while there is atleast 1 machine
-    # who can make some progress
-    while any( [ progress[ 1 ] != 0 for progress in total_progress_map ] ):
-        # Get every progress from our progress map
-        for progress in total_progress_map:
-            # Get the associated machine for this computation
-            curr_machine = scheduler.machines[ progress[ 0 ] ]
-            
-            # If the machine can't make progress or if the machine has
-            # no job, indicate that the machine is waiting
-            if progress[ 1 ] == 0 or curr_machine.get_curr_job() is None:
-                curr_machine.add_waiting_time( progress[ 1 ] )
-                progress[ 1 ] = 0
-                continue
-            
-            # Progress the machine for progression time units
-            ret = curr_machine.progress( scheduler._current_timestamp, progress[ 1 ] )
-
-            # Get the current job on the machine
-            curr_job = curr_machine.get_curr_job()
-            
-
-            if curr_job.is_job_complete():
-                # If the job is complete, compute all the relevant statistics and send
-                # the job to the finished jobs queue
-                curr_job.set_completion_time( scheduler._current_timestamp + ret + curr_job.get_waiting_time() )
-                curr_job.add_waiting_time( scheduler._current_timestamp + ret - curr_job.get_release_time() - curr_job.get_job_active_running_time())
-                scheduler.finished_tasks.append( curr_job )
-                curr_machine.set_curr_job( None )
-
-            else:
-                if curr_job.is_in_error():
-                    # If this job is in error, add lock for recovery
-                    curr_machine.add_lock_time( RECOVERY_OVERHEAD )
-                    curr_job.restart_job()
-
-                    # Indicate when the job was last checkpointed
-                    curr_job.set_last_checkpoint_time( scheduler._current_timestamp + ret )
-
-            # Edit the overall progression for this machine
-            progress[ 1 ] -= ret
-        
-        # Sort the machines so that we prioritize machines that
-        # still have more progressions to make
-        total_progress_map.sort( key=lambda x : x[ 1 ], reverse=True )
+    # Advance every machine by one unit of progress at once. This
+    # algorithm does not lock or store anything on a checkpoint
+    advance_machines( scheduler, job_recovery_func, failure_rate=scheduler.config.get_failure_rate() )
+
+# This function advances the machines over the timesteps that the
+# scheduler skips in event driven mode, the same way as
+# curr_timestamp_func would on every one of them
+def skip_ticks_func( scheduler : GlobalScheduler, max_ticks ):
+    return skip_machines( scheduler, max_ticks, scheduler.config.get_failure_rate() )
@@ -0,0 +1,245 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+import run_algo
+from modules.globalscheduler import GlobalScheduler
+from modules.jobtable import JobTable
+from modules.profiler import PROFILE_PHASES
+from modules.schedulerconfig import DEFAULT_CONFIG
+from generate_random_jobs import generate_random_jobs, build_jobs
+
+# The algorithms that can be benchmarked
+ALGORITHMS = list(run_algo.ALGORITHM_MODULES)
+
+# The default matrix of cases to run
+JOB_COUNTS = [100, 1000]
+MACHINE_COUNTS = [4, 16]
+FAILURE_RATES = [DEFAULT_CONFIG.get_failure_rate(), 0.05]
+
+# The smaller matrix that is run with --quick
+QUICK_JOB_COUNTS = [100]
+QUICK_MACHINE_COUNTS = [4]
+QUICK_FAILURE_RATES = [DEFAULT_CONFIG.get_failure_rate()]
+
+# The workloads of the benchmark. The runtimes are kept short so that the
+# random algorithm, which errors half of the time, still finishes
+MAX_RUNTIME = 4
+MAX_RELEASE_TIME = 50
+
+# Every case is run at least REPEATS times and for at least MIN_CASE_TIME seconds,
+# and the run with the median wall time is kept. The statistic is saved with the
+# results, so that baselines are only compared against the same statistic
+REPEATS = 5
+MIN_CASE_TIME = 1.0
+STATISTIC = 'median'
+
+# The throughput results that regress when they go down, and the resource
+# results that regress when they go up
+HIGHER_IS_BETTER = ['ticks_per_sec', 'jobs_per_sec']
+LOWER_IS_BETTER = ['peak_rss_mb']
+
+
+# Check whether the jobs of an algorithm fail at a rate. Algorithms whose jobs
+# do not, such as the random algorithm, do not depend on the failure rate
+def has_failure_rate(algorithm):
+    return run_algo.ALGORITHM_MODULES[algorithm].JOB_STRATEGY.failure_rate is not None
+
+
+# Add a hook to a scheduler that adds up the number of busy and locked machines
+# at the end of every timestep. In event driven mode the hook is only called on
+# the processed timesteps, and the timestamp - last_timestamp - 1 timesteps
+# skipped before one start and end no job or lock, so they count the same
+# machines as the timestep before them. Returns the totals, which are filled in
+# as the scheduler runs
+def track_machine_usage(scheduler):
+    usage = { 'timesteps' : 0, 'busy' : 0, 'locked' : 0 }
+    last = { 'timestamp' : -1, 'busy' : 0, 'locked' : 0 }
+
+    def count_machines(scheduler):
+        timestamp = scheduler.get_current_timestamp()
+        num_busy = scheduler.get_num_busy_machines()
+        num_locked = scheduler.get_num_locked_machines()
+        num_skipped = timestamp - last['timestamp'] - 1
+
+        usage['timesteps'] += num_skipped + 1
+        usage['busy'] += last['busy'] * num_skipped + num_busy
+        usage['locked'] += last['locked'] * num_skipped + num_locked
+        last.update(timestamp=timestamp, busy=num_busy, locked=num_locked)
+
+    scheduler.add_post_tick_hook(count_machines)
+    return usage
+
+
+# Run one case of the benchmark and return its results. Every case runs in a fresh
+# process, so the peak resident set size is the peak of that case alone. Only the
+# failure rate of the config changes, so the checkpoint period stays as it is. The
+# case is run at least repeats times and until it has run for min_time seconds, and
+# the results of the run with the median wall time are kept
+def run_case(algorithm, num_jobs, num_machines, failure_rate, repeats, seed, min_time=MIN_CASE_TIME):
+    config = DEFAULT_CONFIG if failure_rate is None else DEFAULT_CONFIG.with_changes(failure_rate=failure_rate)
+    machine_params = run_algo.get_machine_params(algorithm, config)
+    job_params = run_algo.get_job_params(algorithm, config)
+
+    workload = generate_random_jobs(num_jobs, run_algo.HIGHEST_PRIORITY, MAX_RUNTIME, MAX_RELEASE_TIME, np.random.default_rng(seed))
+    runs = []
+    total_time = 0
+
+    while len(runs) < repeats or total_time < min_time:
+        dict_jobs = build_jobs(workload, *job_params, JobTable(num_jobs))
+        scheduler = GlobalScheduler(num_machines, *machine_params, event_driven=True, seed=seed, config=config)
+
+        profiler = scheduler.enable_profiling()
+        usage = track_machine_usage(scheduler)
+
+        start = time.perf_counter()
+        scheduler.run_schedule(dict_jobs)
+        wall_time = time.perf_counter() - start
+        total_time += wall_time
+
+        ticks = profiler.get_calls('current_timestamp')
+        runs.append({ 'wall_time' : wall_time,
+                      'ticks' : ticks,
+                      'simulated_time' : scheduler.get_current_timestamp() + 1,
+                      'ticks_per_sec' : ticks / wall_time,
+                      'jobs_per_sec' : num_jobs / wall_time,
+                      'mean_busy_machines' : usage['busy'] / max(usage['timesteps'], 1),
+                      'mean_locked_machines' : usage['locked'] / max(usage['timesteps'], 1),
+                      'callbacks' : profiler.summary(),
+                      'latency_histograms' : { phase : list(zip(*profiler.get_latency_histogram(phase))) for phase in PROFILE_PHASES } })
+
+    # Keep the run with the median wall time, which a single slow or fast run
+    # does not move
+    runs.sort(key=lambda run: run['wall_time'])
+    median = runs[len(runs) // 2]
+
+    # On Linux the peak resident set size is in kilobytes
+    median['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return { 'algorithm' : algorithm,
+             'num_jobs' : num_jobs,
+             'num_machines' : num_machines,
+             'failure_rate' : failure_rate,
+             'runs' : len(runs),
+             'total_time' : total_time } | median
+
+
+# Get the key that matches a case with the same case of another run
+def case_key(case):
+    return (case['algorithm'], case['num_jobs'], case['num_machines'], case['failure_rate'])
+
+
+# Run every case of the matrix and return the results
+def run_benchmark(algorithm_list, job_counts, machine_counts, failure_rates, repeats=REPEATS, seed=0, suppress_printing=False):
+    cases = []
+    for algorithm in algorithm_list:
+        # Algorithms without a failure rate only need to run once
+        rates = failure_rates if has_failure_rate(algorithm) else [None]
+
+        for num_jobs in job_counts:
+            for num_machines in machine_counts:
+                for failure_rate in rates:
+                    cases.append((algorithm, num_jobs, num_machines, failure_rate, repeats, seed))
+
+    results = []
+
+    # Every case gets its own process so that the peak memory of one case
+    # does not hide the peak memory of the next
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for case in cases:
+            result = pool.apply(run_case, case)
+            results.append(result)
+
+            if not suppress_printing:
+                print(format_result(result))
+
+    return { 'python' : sys.version.split()[0],
+             'numpy' : np.__version__,
+             'platform' : platform.platform(),
+             'statistic' : STATISTIC,
+             'repeats' : repeats,
+             'min_case_time' : MIN_CASE_TIME,
+             'cases' : results }
+
+
+# Format the results of a case as a single line
+def format_result(result):
+    callbacks = ', '.join(f'{name} = {values["time"]:.3f}s' for name, values in result['callbacks'].items())
+    return (f'{result["algorithm"]:>10} jobs = {result["num_jobs"]:<6} machines = {result["num_machines"]:<4} '
+            f'rate = {result["failure_rate"]}: {result["ticks_per_sec"]:.0f} ticks/s, {result["jobs_per_sec"]:.0f} jobs/s, '
+            f'busy = {result["mean_busy_machines"]:.2f}, locked = {result["mean_locked_machines"]:.2f}, '
+            f'peak rss = {result["peak_rss_mb"]:.1f} MB ({callbacks})')
+
+
+# Compare results against a baseline and return a message for every result that
+# is worse than the baseline by more than the tolerance
+def find_regressions(baseline, results, tolerance):
+    baseline_cases = { case_key(case) : case for case in baseline['cases'] }
+    regressions = []
+
+    for case in results['cases']:
+        base = baseline_cases.get(case_key(case))
+        if base is None:
+            continue
+
+        for stat in HIGHER_IS_BETTER:
+            if case[stat] < base[stat] * (1 - tolerance):
+                regressions.append(f'{case_key(case)}: {stat} fell from {base[stat]:.1f} to {case[stat]:.1f}')
+
+        for stat in LOWER_IS_BETTER:
+            if case[stat] > base[stat] * (1 + tolerance):
+                regressions.append(f'{case_key(case)}: {stat} rose from {base[stat]:.1f} to {case[stat]:.1f}')
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the scheduler on a matrix of job counts, machine counts and failure rates.')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--jobs', nargs='+', type=int)
+    parser.add_argument('--machines', nargs='+', type=int)
+    parser.add_argument('--failure-rates', nargs='+', type=float)
+    parser.add_argument('--quick', action='store_true', help='run a small matrix')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help=f'least number of runs of every case, of which the {STATISTIC} is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='fraction a result may be worse than the baseline')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.algorithms,
+                            args.jobs or (QUICK_JOB_COUNTS if args.quick else JOB_COUNTS),
+                            args.machines or (QUICK_MACHINE_COUNTS if args.quick else MACHINE_COUNTS),
+                            args.failure_rates or (QUICK_FAILURE_RATES if args.quick else FAILURE_RATES),
+                            args.repeats,
+                            args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        # Baselines saved before the statistic was recorded kept the fastest run
+        baseline_statistic = baseline.get('statistic', 'min')
+        if baseline_statistic != STATISTIC:
+            print(f'WARNING the baseline kept the {baseline_statistic} of its runs, not the {STATISTIC}')
+
+        regressions = find_regressions(baseline, results, args.tolerance)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        if regressions:
+            sys.exit(1)
+
+        print(f'No regressions beyond a tolerance of {args.tolerance:.0%}')
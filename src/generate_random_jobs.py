@@ -1,67 +1,72 @@
 import random
 
+import numpy as np
+
 import novelalgo
 import LISTorg
 import randomafscheduler
 from modules.job import Job
+from modules.jobtable import JobTable
+
+# This is the layout of a workload array, with one record per job
+JOB_DTYPE = np.dtype([('job_id', np.int64),
+                      ('priority', np.int64),
+                      ('runtime', np.float64),
+                      ('release_time', np.float64)])
+
+# Takes in a workload array and returns a dictionary of release times to jobs
+# that use the given strategy. The whole workload is added to the job table
+# in one step, so every job of the workload is stored together
+def build_jobs(workload, job_strategy, job_table=None):
+    if job_table is None:
+        job_table = JobTable(len(workload))
 
-error_placement_function = lambda x, y, z : z if z < 0.000001 else random.uniform( 0, z )
+    rows = job_table.add_jobs(workload['job_id'], workload['priority'], workload['runtime'], workload['release_time'])
 
-# Takes in job info quad and returns proper lambda closure
-def job_info_to_lambda(quad):
-    return lambda error_func, job_compare_func : Job(*quad, error_func, error_placement_function, job_compare_func)
+    # Split the rows wherever the release time changes, sorting them by release
+    # time first unless they already are
+    release_times = workload['release_time']
+    if np.all(release_times[1:] >= release_times[:-1]):
+        order = np.arange(len(workload))
+    else:
+        order = np.argsort(release_times, kind='stable')
+        release_times = release_times[order]
+    starts = np.flatnonzero(np.diff(release_times, prepend=np.nan) != 0)
+    ends = np.append(starts[1:], len(order))
+
+    return { release_times[start].item() : [Job.from_row(job_strategy, job_table, row) for row in rows[order[start:end]].tolist()]
+             for start, end in zip(starts, ends) }
 
 
 # Define parameters for each algorithm
-LISTLambdaParams = [LISTorg.job_error_func, LISTorg.job_comparison_func]
-NovelLambdaParams = [novelalgo.job_error_func, novelalgo.job_comparison_func]
-RandomAlgoParams = [randomafscheduler.job_error_func, randomafscheduler.job_comparison_func]
+LISTLambdaParams = [LISTorg.JOB_STRATEGY]
+NovelLambdaParams = [novelalgo.JOB_STRATEGY]
+RandomAlgoParams = [randomafscheduler.JOB_STRATEGY]
+
+# Currently I have it setup to randomly generate jobs, half at time 0 and the rest at random times.
+# The workload is a structured array of JOB_DTYPE ordered by release time, and every field is drawn
+# in a single call to the generator. By default the generator is seeded from the random module
+def generate_random_jobs(num_jobs, max_priority, max_runtime, max_release_time, rng=None):
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+
+    # Draw the priority, runtime and release time of every job at once. Scaling
+    # uniform draws is much faster than drawing integers with a bound per field
+    priority, runtime, release_time = np.floor(rng.random((3, num_jobs)) * [[max_priority], [max_runtime], [max_release_time]]) + 1
 
-# Currently I have it setup to randomly generate jobs, half at time 0 and the rest at random times
-def generate_random_jobs(num_jobs, max_priority, max_runtime, max_release_time):
-    random_jobs = {} # dictionary of jobs at each timestamp
-    
-    jobs_at_time_0 = [] # jobs at time 0
-    for i in range(num_jobs // 2): # half of the jobs are released at time 0
-        job_id = i # job id
-        priority = random.randint(1, max_priority) # priority 
-        runtime = random.randint(1, max_runtime) # runtime
-        release_time = 0 # release time
+    # Half of the jobs are released at time 0
+    release_time[:num_jobs // 2] = 0
 
-        '''
-        job = Job(job_id, priority, runtime, release_time, # job object
-                 job_error_func, # error function
-                 lambda x, y, z : z if z < 0.000001 else random.uniform( 0, z ), # error location function
-                 job_comparison_func) # job comparison function
-        '''
-        job = job_id, priority, runtime, release_time
-        jobs_at_time_0.append(job_info_to_lambda(job)) # append job to jobs at time 0
-    
-    jobs_at_random_times = {} # dictionary of jobs at random times
-    for i in range(num_jobs // 2, num_jobs): # remaining jobs
-        job_id = i # job id
-        priority = random.randint(1, max_priority) # priority
-        runtime = random.randint(1, max_runtime) # runtime
-        release_time = random.randint(1, max_release_time) # release time
+    # Order the rest of the jobs by release time, keeping them in id order within
+    # a release. Sorting the release times as the smallest integer type that holds
+    # them lets numpy use a radix sort
+    order = np.arange(num_jobs)
+    order[num_jobs // 2:] = num_jobs // 2 + np.argsort(release_time[num_jobs // 2:].astype(np.min_scalar_type(max_release_time)), kind='stable')
 
-        '''
-        job = Job(job_id, priority, runtime, release_time, # job object
-                 job_error_func, # error function
-                 lambda x, y, z : z if z < 0.000001 else random.uniform( 0, z ), # error location function
-                 job_comparison_func) # job comparison function
-        '''
-        job = job_id, priority, runtime, release_time
-        
-        if release_time not in jobs_at_random_times: 
-            jobs_at_random_times[release_time] = [] # if the release time is not in the dictionary, create a new list
-        jobs_at_random_times[release_time].append(job_info_to_lambda(job)) # append the job to the list
+    workload = np.empty(num_jobs, dtype=JOB_DTYPE)
+    workload['job_id'] = order
+    workload['priority'] = priority[order]
+    workload['runtime'] = runtime[order]
+    workload['release_time'] = release_time[order]
 
-    '''
-    random_jobs[0] = jobs_at_time_0 # add the jobs at time 0 to the dictionary
-    for release_time, jobs in jobs_at_random_times.items():
-        random_jobs[release_time] = jobs # add the jobs at random times to the dictionary
-    '''
-    
-    #return random_jobs
-    
-    return { 0 : jobs_at_time_0 } | jobs_at_random_times
+    return workload
@@ -0,0 +1,153 @@
+import numpy as np
+
+# These are the events that can be recorded. The value of an event is
+#   schedule   : unused
+#   preempt    : the id of the job that took the machine
+#   kill       : the work the job lost by restarting
+#   migrate    : the id of the machine the checkpoint came from
+#   checkpoint : the number of checkpoints that were taken, each of
+#                which locks the machine for the checkpointing overhead
+#   lock       : how long the machine was locked for, other than for
+#                checkpoints and errors
+#   error      : the progression the job made before the error, which
+#                locks the machine for the recovery overhead
+#   complete   : unused
+EVENT_TYPES = ( 'schedule', 'preempt', 'kill', 'migrate', 'checkpoint', 'lock', 'error', 'complete' )
+
+# These are the columns of every event along with their types
+EVENT_COLUMNS = {
+    'time' : np.float64,
+    'event' : np.int8,
+    'machine' : np.int32,
+    'job' : np.int64,
+    'value' : np.float64,
+}
+
+# This is the number of single events that are staged before they are
+# moved into the buffer
+STAGE_SIZE = 4096
+
+class EventRecorder:
+    def __init__( self, capacity : int = 1 << 20 ):
+        ################################################
+        # The following is a ring buffer of scheduler
+        # events with one preallocated array per column.
+        # When the buffer is full the oldest events are
+        # overwritten. Single events are first appended
+        # to a flat staging list of numbers, which is
+        # much cheaper than writing into numpy arrays one
+        # element at a time and creates no objects for
+        # the garbage collector to track, and are moved
+        # into the buffer in blocks
+        ################################################
+        # This is the number of events the buffer holds
+        self.capacity : int = capacity
+
+        # This is the number of events that have been moved into the
+        # buffer, including the ones that were overwritten
+        self._num_flushed : int = 0
+
+        # This is the code of every event type
+        self._event_codes = { name : i for i, name in enumerate( EVENT_TYPES ) }
+
+        # This is the timestamp that events are recorded at when they
+        # are not given a time. The scheduler keeps it up to date
+        self.current_timestamp : float = 0
+
+        # Create one array for every column
+        for column, dtype in EVENT_COLUMNS.items():
+            setattr( self, column, np.zeros( capacity, dtype=dtype ) )
+
+        # These are the single events that have not been moved into
+        # the buffer yet, and the length of the staging list at which
+        # they are
+        self._staged = []
+        self._stage_limit = STAGE_SIZE * len( EVENT_COLUMNS )
+
+    # This function records a single event. Without a time the event
+    # is recorded at the current timestamp
+    def record( self, event : str, machine : int, job : int, value : float = 0, time : float = None ) -> None:
+        staged = self._staged
+        staged.extend( ( self.current_timestamp if time is None else time, self._event_codes[ event ], machine, job, value ) )
+
+        if len( staged ) >= self._stage_limit:
+            self.flush()
+
+    # This function moves the staged events into the buffer
+    def flush( self ) -> None:
+        if len( self._staged ) == 0:
+            return
+
+        # Every row of the staged events is one event. Job ids fit exactly
+        # in a float as long as they are below 2 ** 53
+        records = np.array( self._staged, dtype=np.float64 ).reshape( -1, len( EVENT_COLUMNS ) )
+        self._write( { column : records[ :, i ] for i, column in enumerate( EVENT_COLUMNS ) } )
+        self._staged = []
+
+    # This function writes columns of events into the buffer after the
+    # events that are already in it
+    def _write( self, columns : dict ) -> None:
+        num_of_events = len( columns[ 'time' ] )
+
+        # Only the newest events fit when there are more than the buffer holds
+        skipped = max( num_of_events - self.capacity, 0 )
+        start = ( self._num_flushed + skipped ) % self.capacity
+        self._num_flushed += num_of_events
+
+        # The events fill the end of the buffer and then wrap around to
+        # the start of it
+        first = min( num_of_events - skipped, self.capacity - start )
+        for column, values in columns.items():
+            buffer = getattr( self, column )
+            buffer[ start:start + first ] = values[ skipped:skipped + first ]
+            buffer[ :num_of_events - skipped - first ] = values[ skipped + first: ]
+
+    # This function records one event of the same type for every entry
+    # of the given arrays. The events are staged like single events,
+    # which keeps them in order and is cheap for the few events a
+    # timestep has
+    def record_many( self, event : str, time, machine, job, value = 0 ) -> None:
+        num_of_events = len( machine )
+        if num_of_events == 0:
+            return
+
+        rows = np.empty( ( num_of_events, len( EVENT_COLUMNS ) ), dtype=np.float64 )
+        for i, column in enumerate( ( time, self._event_codes[ event ], machine, job, value ) ):
+            rows[ :, i ] = column
+        self._staged.extend( rows.ravel().tolist() )
+
+        if len( self._staged ) >= self._stage_limit:
+            self.flush()
+
+    # This function gets the number of events that have been recorded,
+    # including the ones that were overwritten
+    def get_num_recorded( self ) -> int:
+        return self._num_flushed + len( self._staged ) // len( EVENT_COLUMNS )
+
+    # This function gets the number of events in the buffer
+    def __len__( self ):
+        return min( self.get_num_recorded(), self.capacity )
+
+    # This function gets the number of events that were overwritten
+    def get_num_dropped( self ) -> int:
+        return self.get_num_recorded() - len( self )
+
+    # This function gets every event in the buffer as a dictionary of
+    # columns, from the oldest event to the newest
+    def get_events( self ) -> dict:
+        self.flush()
+
+        order = ( np.arange( len( self ) ) + self._num_flushed - len( self ) ) % self.capacity
+        return { column : getattr( self, column )[ order ] for column in EVENT_COLUMNS }
+
+    # This function saves every event in the buffer to a .npz file
+    # along with the names of the event types
+    def save( self, path ) -> None:
+        events = self.get_events()
+        np.savez( path, event_types=np.array( EVENT_TYPES ), num_dropped=self.get_num_dropped(), **events )
+
+# This function loads the events saved by EventRecorder.save as a
+# dictionary of columns
+def load_events( path ) -> dict:
+    with np.load( path ) as data:
+        return { name : data[ name ] for name in data.files }
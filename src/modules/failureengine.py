@@ -0,0 +1,74 @@
+import numpy as np
+
+class FailureEngine:
+    def __init__( self, rng : np.random.Generator, batch_size : int = 4096, streams = None ):
+        ################################################
+        # The following hands out failure clocks. A
+        # failure clock is a draw from the exponential
+        # distribution with a rate of 1, which a job uses
+        # up at its failure rate while it is running.
+        # The job fails when its clock runs out
+        ################################################
+        # This is the random number generator the clocks are drawn from
+        self._rng = rng
+
+        # This is how many clocks are drawn from the generator at once
+        self._batch_size = batch_size
+
+        # These are the clocks that have been drawn but not handed out
+        self._clocks = np.empty( 0, dtype=np.float64 )
+
+        # This is the position of the next clock to hand out
+        self._position = 0
+
+        # These are the random streams of the jobs, or None. With streams
+        # every job draws its clocks from its own stream, so a job fails
+        # after the same running times no matter the order jobs are
+        # armed in
+        self._streams = streams
+
+    # This function draws a new batch of clocks. The uniform draws are
+    # turned into exponential draws with the inverse of the CDF
+    def _refill( self, num_of_clocks : int ) -> None:
+        uniforms = self._rng.random( max( num_of_clocks, self._batch_size ) )
+        self._clocks = np.concatenate( ( self._clocks[ self._position: ], -np.log1p( -uniforms ) ) )
+        self._position = 0
+
+    # This function hands out the given number of failure clocks
+    def draw( self, num_of_clocks : int ) -> np.ndarray:
+        if self._position + num_of_clocks > len( self._clocks ):
+            self._refill( num_of_clocks )
+
+        clocks = self._clocks[ self._position:self._position + num_of_clocks ]
+        self._position += num_of_clocks
+        return clocks
+
+    # This function draws the next failure clock of a job from its own
+    # stream
+    def _draw_job_clock( self, job_id : int ) -> float:
+        return -np.log1p( -self._streams.job_stream( job_id ).random() )
+
+    # This function gives a failure clock to every one of the given
+    # rows of the job table that does not have one
+    def arm_jobs( self, job_table, rows ) -> None:
+        clocks = job_table.failure_clock[ rows ]
+        unarmed = np.isnan( clocks )
+
+        if unarmed.any():
+            if self._streams is None:
+                clocks[ unarmed ] = self.draw( int( np.count_nonzero( unarmed ) ) )
+            else:
+                clocks[ unarmed ] = [ self._draw_job_clock( job_id ) for job_id in job_table.job_id[ rows[ unarmed ] ].tolist() ]
+
+            job_table.failure_clock[ rows ] = clocks
+
+    # This function gives a failure clock to a job that does not
+    # have one
+    def arm_job( self, job ) -> None:
+        job_table = job.get_table()
+
+        if np.isnan( job_table.failure_clock[ job.get_row() ] ):
+            if self._streams is None:
+                job_table.failure_clock[ job.get_row() ] = self.draw( 1 )[ 0 ]
+            else:
+                job_table.failure_clock[ job.get_row() ] = self._draw_job_clock( job.get_id() )
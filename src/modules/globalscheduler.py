@@ -1,19 +1,75 @@
 from modules.machine import Machine
+from modules.machinestate import MachineState
+from modules.machineindex import MachineIndex
+from modules.taskqueue import FifoTaskQueue
+from modules.failureengine import FailureEngine
+from modules.randomstreams import RandomStreams
+from modules.metrics import MetricsCollector
+from modules.profiler import SchedulerProfiler, PROFILE_PHASES
+from modules.eventrecorder import EventRecorder
+from modules.schedulerconfig import DEFAULT_CONFIG
+import numpy as np
+import random
+import math
 
 class GlobalScheduler:
-    def __init__( self, num_of_machines, machine_progression_func, machine_checkpointing_func, new_job_func, reschedule_func, curr_timestamp_func, checkpointing_progression = 0):
+    def __init__( self, num_of_machines, machine_progression_func, machine_checkpointing_func, new_job_func, reschedule_func, curr_timestamp_func, checkpointing_progression = 0, task_queue_func = FifoTaskQueue, victim_key_func = None, skip_ticks_func = None, event_driven = False, seed = None, config = None, common_random_numbers = False ):
+        # This is an index of the free, busy and locked machines
+        # that the machines keep up to date on every transition. If
+        # a victim key function is given, the index also orders the
+        # running jobs by that key to find preemption victims
+        self._machine_index = MachineIndex( num_of_machines, victim_key_func )
+
+        # These are the arrays that hold the state of every machine,
+        # so that all the machines can be advanced in one step
+        self.machine_state = MachineState( num_of_machines, checkpointing_progression )
+
         # This is a list of machines that exist within the scheduler
-        self.machines = [ Machine(i, checkpointing_progression, machine_progression_func, machine_checkpointing_func) for i in range( num_of_machines ) ]
+        self.machines = [ Machine(i, checkpointing_progression, machine_progression_func, machine_checkpointing_func, self._machine_index, self.machine_state) for i in range( num_of_machines ) ]
         
+        # This function creates an empty queue for the tasks that
+        # are waiting to be scheduled. It determines the order that
+        # the waiting tasks are handed out in
+        self._task_queue_func = task_queue_func
+
         # These are all the tasks that are waiting to be scheduled
-        self.task_queue = []
+        self.task_queue = self._task_queue_func()
 
         # These are all the tasks that have been completed
         self.finished_tasks = []
 
+        # These are the metrics of the current run. The algorithm
+        # callbacks count their events in it through the scheduler
+        self.metrics = MetricsCollector()
+
+        # This is the config of the constants that the algorithm
+        # callbacks run with. The machines share it through the
+        # machine state
+        self.config = DEFAULT_CONFIG if config is None else config
+        self.machine_state.config = self.config
+
         # This is the current timestep of the scheduler
         self._current_timestamp = 0
 
+        # This is the random number generator that the machines draw
+        # their errors from when they are advanced all at once. Without
+        # a seed it is seeded from the random module, so seeding the
+        # random module still reproduces a run
+        if seed is None:
+            seed = random.getrandbits( 64 )
+        self.rng = np.random.default_rng( seed )
+
+        # These are the random streams of every job and machine when
+        # common random numbers are used, or None. With them every
+        # algorithm that runs the same jobs with the same seed sees the
+        # same failures, so the algorithms can be compared trial by trial
+        self.streams = RandomStreams( seed ) if common_random_numbers else None
+        self.machine_state.streams = self.streams
+
+        # This hands out the failure clocks of jobs that fail at a
+        # given rate instead of drawing an error on every progression
+        self.failure_engine = FailureEngine( self.rng, streams=self.streams )
+
         ################################################
         # The following are functions that tell the
         # scheduler how to operate
@@ -30,24 +86,273 @@ class GlobalScheduler:
         # reschedules jobs on every timestep
         self._reschedule_func = reschedule_func
 
+        # This determines whether the scheduler jumps straight
+        # to the next event instead of stepping through every
+        # timestep one unit at a time
+        self._event_driven = event_driven
+
+        # This function advances the running jobs over up to the given
+        # number of timesteps at once and returns how many it advanced,
+        # or is None. Without it the scheduler only jumps over
+        # timesteps when no job is running
+        self._skip_ticks_func = skip_ticks_func
+
+        # This is the cursor over the incoming batches of jobs along
+        # with the next batch that has yet to be released
+        self._job_batches = iter( () )
+        self._next_batch = None
+
+        # This is the release time of the last batch of jobs
+        self._last_release_timestamp = -1
+
+        ################################################
+        # The following are the ways to look inside the
+        # scheduler while it runs. Both are off unless
+        # they are asked for, and cost nothing then
+        ################################################
+        # This is the profiler that times every phase of a timestep,
+        # or None if profiling is disabled. While it is enabled the
+        # callbacks are wrapped by the profiler
+        self.profiler = None
+        self._unprofiled_funcs = None
+
+        # These are functions that are called with the scheduler
+        # before and after every processed timestep. In event driven
+        # mode the timesteps skipped between events are not processed,
+        # so the hooks do not see them
+        self._pre_tick_hooks = []
+        self._post_tick_hooks = []
+
+        # This is the recorder of the events of every run, or None
+        # if recording is disabled. The machines record through the
+        # machine state, which holds the same recorder
+        self.events = None
+
     # This function gets the current timestep of the
     # scheduler
     def get_current_timestamp(self):
         return self._current_timestamp
 
+    # This function starts timing the phases of every timestep with
+    # the given profiler, or a new one. Returns the profiler
+    def enable_profiling( self, profiler = None ):
+        if self.profiler is not None:
+            self.disable_profiling()
+
+        if profiler is None:
+            profiler = SchedulerProfiler()
+
+        self.profiler = profiler
+        self._unprofiled_funcs = { phase : getattr( self, '_' + phase + '_func' ) for phase in PROFILE_PHASES }
+
+        for phase, func in self._unprofiled_funcs.items():
+            setattr( self, '_' + phase + '_func', profiler.wrap( phase, func ) )
+
+        return profiler
+
+    # This function stops timing the phases of every timestep and
+    # returns the profiler, which keeps its times
+    def disable_profiling( self ):
+        profiler = self.profiler
+
+        if profiler is not None:
+            for phase, func in self._unprofiled_funcs.items():
+                setattr( self, '_' + phase + '_func', func )
+
+            self.profiler = None
+            self._unprofiled_funcs = None
+
+        return profiler
+
+    # This function starts recording the events of every run with the
+    # given recorder, or a new one. Returns the recorder
+    def enable_event_recording( self, recorder = None ):
+        if self.events is not None:
+            self.disable_event_recording()
+
+        if recorder is None:
+            recorder = EventRecorder()
+
+        self.events = recorder
+        self.machine_state.events = recorder
+        self.add_pre_tick_hook( self._update_event_timestamp )
+        return recorder
+
+    # This function stops recording events and returns the recorder,
+    # which keeps its events
+    def disable_event_recording( self ):
+        recorder = self.events
+
+        if recorder is not None:
+            self._pre_tick_hooks.remove( self._update_event_timestamp )
+            self.events = None
+            self.machine_state.events = None
+
+        return recorder
+
+    # This function moves the recorder to the current timestamp, so the
+    # events recorded by the machines get the right time
+    def _update_event_timestamp( self, scheduler ):
+        self.events.current_timestamp = self._current_timestamp
+
+    # This function adds a function that is called with the scheduler
+    # at the start of every processed timestep, before any jobs are
+    # released. In event driven mode a hook is not called on the
+    # skipped timesteps, so a hook that counts timesteps has to add
+    # the timestamp - last_timestamp - 1 timesteps skipped since the
+    # timestamp it last saw. No job is released, completes or fails
+    # in a skipped timestep
+    def add_pre_tick_hook( self, hook ):
+        self._pre_tick_hooks.append( hook )
+
+    # This function adds a function that is called with the scheduler
+    # at the end of every processed timestep, after the machines are
+    # advanced. Like the hooks added by add_pre_tick_hook, it is not
+    # called on the timesteps skipped in event driven mode
+    def add_post_tick_hook( self, hook ):
+        self._post_tick_hooks.append( hook )
+
+    # This function gets the free machine with the lowest id, or
+    # None if every machine is busy or locked
+    def get_free_machine( self ):
+        machine_id = self._machine_index.get_first_free_machine()
+
+        if machine_id is None:
+            return None
+
+        return self.machines[ machine_id ]
+
+    # This function gets the unlocked machine running the job with
+    # the smallest victim key, or None if there is no such machine
+    def get_weakest_machine( self ):
+        machine_id = self._machine_index.get_weakest_machine()
+
+        if machine_id is None:
+            return None
+
+        return self.machines[ machine_id ]
+
+    # This function determines if there is at least one free machine
+    def has_free_machine( self ):
+        return self._machine_index.has_free_machine()
+
+    # This function determines if every machine is free
+    def are_all_machines_free( self ):
+        return self._machine_index.are_all_machines_free()
+
+    # This function determines if any machine is running a job
+    def has_busy_machine( self ):
+        return self._machine_index.has_busy_machine()
+
+    # This function gets the number of machines running a job
+    def get_num_busy_machines( self ):
+        return self._machine_index.get_num_busy_machines()
+
+    # This function gets the number of locked machines
+    def get_num_locked_machines( self ):
+        return self._machine_index.get_num_locked_machines()
+
+    # This function determines the next timestamp at which jobs are
+    # released or the reschedule function can have something to do.
+    # The running jobs can have events before it, which are found by
+    # the skip ticks function. When only the running jobs have events
+    # left, the next event of the scheduler is infinitely far away
+    def get_next_event_timestamp( self ):
+        # A waiting task can be placed on any timestep that a machine is
+        # free, and can preempt a running job on any timestep when the
+        # algorithm preempts
+        if len( self.task_queue ) > 0 and ( self.has_free_machine() or self._machine_index.has_victim_index() ):
+            return self._current_timestamp + 1
+
+        if self._next_batch is None:
+            # If there are no more releases, the running jobs are all
+            # that is left. Otherwise fall back to stepping one unit at
+            # a time
+            return math.inf if self.has_busy_machine() else self._current_timestamp + 1
+
+        # Otherwise jump to the first timestep at the release time of
+        # the next batch
+        return max( math.ceil( self._next_batch[ 0 ] ), self._current_timestamp + 1 )
+
+    # This function moves the scheduler to the next timestamp. In
+    # event driven mode the timesteps before the next event are
+    # skipped. When no job is running they are only accounted for as
+    # waiting time on every machine, which is exactly what the
+    # timestep callbacks do on an idle timestep. Otherwise the skip
+    # ticks function advances the running jobs over as many of them
+    # as it can, stopping before the first timestep in which a job
+    # completes, fails or is locked
+    def _advance_timestamp( self ):
+        if not self._event_driven:
+            self._current_timestamp += 1
+            return
+
+        # These are the timesteps before the next event
+        num_skipped = self.get_next_event_timestamp() - self._current_timestamp - 1
+
+        if num_skipped > 0:
+            if not self.has_busy_machine():
+                # Every skipped timestep would have been spent waiting
+                self.machine_state.waiting_time += num_skipped
+
+            elif self._skip_ticks_func is not None:
+                num_skipped = self._skip_ticks_func( self, num_skipped )
+
+            else:
+                num_skipped = 0
+
+        self._current_timestamp += num_skipped + 1
+
+    # This function adds every batch of jobs that has been released
+    # by the current timestamp to the scheduler. Only one batch is
+    # looked ahead, so the batches can be streamed from a generator
+    def _release_jobs( self ):
+        while self._next_batch is not None and self._next_batch[ 0 ] <= self._current_timestamp:
+            release_time, jobs = self._next_batch
+
+            # Add every job in the batch to the queue
+            for job in jobs:
+                self._new_job_func( self, job )
+
+            # Remember the last release so the scheduler does not stop
+            # on the same timestamp it released jobs
+            self._last_release_timestamp = release_time
+
+            # Look ahead to the next batch
+            self._next_batch = next( self._job_batches, None )
+
+            if self._next_batch is not None and self._next_batch[ 0 ] < release_time:
+                raise ValueError( 'Job batches must be ordered by release time' )
+
+    # This function runs the scheduler until every job is complete.
+    # The jobs can either be given as a dictionary of release times
+    # to lists of jobs, or as a time ordered iterable of
+    # ( release_time, jobs ) batches
     def run_schedule( self, list_of_jobs ):
         # Reset the member variables of the scheduler
-        self.task_queue = []
+        self.task_queue = self._task_queue_func()
         self.finished_tasks = []
+        self.metrics = MetricsCollector()
         self._current_timestamp = 0
+
+        # Set up the arrival cursor with a one batch lookahead
+        if isinstance( list_of_jobs, dict ):
+            self._job_batches = iter( sorted( list_of_jobs.items(), key=lambda batch : batch[ 0 ] ) )
+        else:
+            self._job_batches = iter( list_of_jobs )
+
+        self._next_batch = next( self._job_batches, None )
+        self._last_release_timestamp = -1
         
         # While the scheduler is running, do the following:
         while True:
-            if self._current_timestamp in list_of_jobs.keys():
-                # If the current timestamp has assoicated jobs,
-                # add the job to the queue
-                for job in list_of_jobs[ self._current_timestamp ]:
-                    self._new_job_func( self, job )
+            # Call the hooks that run before every processed timestep
+            for hook in self._pre_tick_hooks:
+                hook( self )
+
+            # If the current timestamp has assoicated jobs,
+            # add the jobs to the queue
+            self._release_jobs()
 
             # Resechedule the jobs after adding all the
             # jobs to the scheduler
@@ -56,12 +361,15 @@ class GlobalScheduler:
             # Execute the current timestamp of this scheduler
             self._current_timestamp_func( self )
 
-            if all( machine.is_machine_free() for machine in self.machines ) and len( self.task_queue ) == 0 and self._current_timestamp > max( list_of_jobs.keys() ):
+            # Call the hooks that run after every processed timestep
+            for hook in self._post_tick_hooks:
+                hook( self )
+
+            if self.are_all_machines_free() and len( self.task_queue ) == 0 and self._next_batch is None and self._current_timestamp > self._last_release_timestamp:
                 # If all the machines are free and there is nothing
                 # left to schedule and there are no more expected jobs
                 # end the loop
                 return
 
             # Increment the timestamp
-            self._current_timestamp += 1
-
+            self._advance_timestamp()
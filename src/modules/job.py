@@ -1,164 +1,204 @@
+from modules.jobtable import JobTable
+from modules.jobstrategy import JobStrategy
 from typing import Callable, Type
+import numpy as np
 
 class Job:
+    __slots__ = ( '_strategy', '_table', '_row' )
+
     def __init__( self, job_id : int, job_priority : int, runtime : float, 
-                    release_time : float, error_func,
-                    error_loc_func, 
-                    comparison_func ):
+                    release_time : float, strategy : JobStrategy,
+                    job_table : JobTable = None ):
         
         ################################################
-        # The following are meta in formation about jobs 
+        # The following defines how jobs operate. The
+        # error, error location and comparison functions
+        # are shared by every job of an algorithm
         ################################################
-        # This the unique identifier for a job
-        self._job_id : int = job_id
-
-        # This is the priority of the job
-        self._job_priority : int = job_priority
-
+        # This is the strategy that holds the functions of the job
+        self._strategy : JobStrategy = strategy
+        
         ################################################
-        # The following are functions that define how 
-        # jobs operate
+        # The following is where the state of the job is
+        # stored. A job is a row in a job table, and a
+        # job on its own gets a table with a single row
         ################################################
-        # This function defines how jobs should be compared
-        # against eachother
-        self._comparison_func = comparison_func
+        if job_table is None:
+            job_table = JobTable( 1 )
 
-        # This function defines how likely an error is to
-        # occur within a job
-        self._error_func = error_func
+        # This is the table that holds the state of the job
+        self._table : JobTable = job_table
 
-        # This function determines where an error is likely
-        # to occur
-        self._error_loc_func = error_loc_func
-        
-        ################################################
-        # The following is general information about the
-        # jobs current state and behavior
-        ################################################
-        # This is the remaining time a job needs to complete
-        self._runtime : float = runtime
+        # This is the row of the job within the table
+        self._row : int = job_table.add_job( job_id, job_priority, runtime, release_time )
 
-        # This is the original runtime of the job
-        self._orig_runtime : float = runtime
+        # The remaining runtime, original runtime, release time,
+        # first schedule time, last checkpoint time, last machine,
+        # error state and the active, completion and waiting time
+        # statistics of the job are all stored in the table
 
-        # This is when the job was released
-        self._release_time : float = release_time
+    # This function makes a job from a row that is already in a job
+    # table, such as one added with JobTable.add_jobs
+    @classmethod
+    def from_row( cls, strategy : JobStrategy, job_table : JobTable, row : int ) -> "Job":
+        job = cls.__new__( cls )
+        job._strategy = strategy
+        job._table = job_table
+        job._row = row
+        return job
 
-        # This is time that it was first scheduled
-        self._first_schedule_time : float = -1
+    # This function gets the table that holds the state of the job
+    def get_table( self ) -> JobTable:
+        return self._table
 
-        # This is the last time a checkpoint was triggered
-        # on this job
-        self._last_checkpoint_time : float = -1
+    # This function gets the strategy of the job
+    def get_strategy( self ) -> JobStrategy:
+        return self._strategy
 
-        # This is the location of the last machine that this
-        # job was running on
-        self._last_run_machine : int = -1
-        
-        # This indicates whether this job is in error or not
-        self._in_error : bool = False
-        
-        ################################################
-        # These are statistics about the job
-        ################################################
-        # This is the time that the job was actively running
-        self._active_running_time : float = 0
+    # This function gets the row of the job within its table
+    def get_row( self ) -> int:
+        return self._row
+
+    # This function moves the state of the job into another table,
+    # either into a new row or into the given row
+    def move_to_table( self, job_table : JobTable, row : int = None ) -> None:
+        if job_table is self._table:
+            return
+
+        self._row = job_table.copy_row( self._table, self._row, row )
+        self._table = job_table
 
-        # This is the job's completion time
-        self._completion_time : float = 0
+    # This function gets the state of the job for pickling. Jobs in
+    # the same table share the table within a pickle
+    def __getstate__( self ):
+        return ( self._strategy, self._table, self._row )
 
-        # This is the time that the job spend waiting
-        self._waiting_time : float = 0
+    # This function restores the state of the job after pickling
+    def __setstate__( self, state ):
+        self._strategy, self._table, self._row = state
 
     # This function returns the first scheduled time 
     def get_first_schedule_time( self : type[ "Job" ] ):
-        return self._first_schedule_time
+        return self._table.first_schedule_time.item( self._row )
     
     # This function returns the priority of the job
     def get_priority(self):
-        return self._job_priority
+        return self._table.priority.item( self._row )
 
     # This function sets the first scheduled time
     def set_first_schedule_time( self : type[ "Job" ], time : float ):
-        self._first_schedule_time = time
-        self._last_checkpoint_time = time
+        self._table.first_schedule_time[ self._row ] = time
+        self._table.last_checkpoint_time[ self._row ] = time
     
     # This function will get the release time
     def get_release_time( self : type[ "Job" ] ):
-        return self._release_time
+        return self._table.release_time.item( self._row )
 
     # This function will get the jobs id
     def get_id( self : type[ "Job" ] ):
-        return self._job_id
+        return self._table.job_id.item( self._row )
     
     # This function will get the jobs current remaining runtime
     def get_runtime( self : type[ "Job" ] ):
-        return self._runtime
+        return self._table.runtime.item( self._row )
     
     # This function will restart the job
     def restart_job( self : type[ "Job" ] ):
-        self._runtime = self._orig_runtime
-        self._in_error = False
+        self._table.runtime[ self._row ] = self._table.orig_runtime[ self._row ]
+        self._table.in_error[ self._row ] = False
 
     # This function will get the job's original runtime
     def get_orig_runtime( self : type[ "Job" ] ):
-        return self._orig_runtime
+        return self._table.orig_runtime.item( self._row )
     
     # This function returns the jobs waiting time
     def get_waiting_time(self):
-        return self._waiting_time
+        return self._table.waiting_time.item( self._row )
     
     # This function sets the jobs completion time
     def set_completion_time( self, completion_time ):
-        self._completion_time = completion_time
+        self._table.completion_time[ self._row ] = completion_time
         
     # This function returns the jobs completion time
     def get_completion_time( self ):
-        return self._completion_time
+        return self._table.completion_time.item( self._row )
 
     # This function will define the progression behavior
-    # of the job
-    def progress( self : type[ "Job" ], current_timestamp : float, inc : float = 1 ) -> float:
+    # of the job. With the random stream of the machine the
+    # job runs on, the error and its location are decided by
+    # two uniform draws from the stream, the same draws that
+    # advance_machines makes for the machine
+    def progress( self : type[ "Job" ], current_timestamp : float, inc : float = 1, stream : np.random.Generator = None ) -> float:
+        # If the job has a failure rate, it fails when its failure
+        # clock runs out instead of drawing an error
+        if self._strategy.failure_rate is not None:
+            return self._progress_failure_clock( inc )
+
+        draws = () if stream is None else stream.random( 2 ).tolist()
+
         # First determine if the job is in error
-        self._in_error = self._error_func( self, current_timestamp )
+        in_error = self._strategy.error_func( self, current_timestamp, *draws[ :1 ] )
+        self._table.in_error[ self._row ] = in_error
         
-        if not self._in_error:
+        if not in_error:
             # If the job is not in error, determine
             # maximum continuous unit of progressions we
             # can take
-            inc = min( self._runtime, inc )
+            inc = min( self._table.runtime.item( self._row ), inc )
 
             # Reduce the runtime of the job
-            self._runtime -= inc
+            self._table.runtime[ self._row ] -= inc
 
             # Increment the active runtime 
-            self._active_running_time += inc
+            self._table.active_running_time[ self._row ] += inc
             return inc
         else:
             # Determine where the location of the error could
             # be if there is an error
-            loc = self._error_loc_func( self, current_timestamp, inc )
+            loc = self._strategy.error_loc_func( self, current_timestamp, inc, *draws[ 1: ] )
             
             # Increment the active runtime but don't increment the
             # job state because it is an invalid progression
-            self._active_running_time += loc
+            self._table.active_running_time[ self._row ] += loc
             return loc
 
+    # This function progresses the job while using up its failure
+    # clock. The clock is given to the job by the scheduler's failure
+    # engine, and a job without a clock does not fail
+    def _progress_failure_clock( self, inc : float ) -> float:
+        # Determine the maximum continuous unit of progressions
+        # we can take
+        inc = min( self._table.runtime.item( self._row ), inc )
+
+        # Determine how long the job can run before it fails
+        time_to_failure = self._table.failure_clock.item( self._row ) / self._strategy.failure_rate
+        in_error = time_to_failure < inc
+        self._table.in_error[ self._row ] = in_error
+
+        if not in_error:
+            # Use up the clock and progress the job
+            self._table.failure_clock[ self._row ] -= self._strategy.failure_rate * inc
+            self._table.runtime[ self._row ] -= inc
+            self._table.active_running_time[ self._row ] += inc
+            return inc
+        else:
+            # The job fails when the clock runs out. The clock is
+            # used up, so the job needs a new one
+            self._table.failure_clock[ self._row ] = np.nan
+            self._table.active_running_time[ self._row ] += time_to_failure
+            return time_to_failure
+
     # This function adds waiting time to the job    
     def add_waiting_time( self, waiting_time ):
-        if waiting_time < 0:
-            x = 1
-        self._waiting_time += waiting_time
-        #print('HERE')
-        #print(waiting_time)
+        self._table.waiting_time[ self._row ] += waiting_time
 
     # This function determines if the job is complete
     def is_job_complete( self ):
-        return self._runtime == 0
+        return self._table.runtime.item( self._row ) == 0
     
     # This function determines a jobs active running time
     def get_job_active_running_time( self ):
-        return self._active_running_time
+        return self._table.active_running_time.item( self._row )
     
     # This function reverts a job to a previous state
     def revert_to_checkpoint( self, restart_point : int ):
@@ -167,41 +207,41 @@ class Job:
             restart_point = 0 
         
         # Reset the runtime
-        self._runtime = restart_point
+        self._table.runtime[ self._row ] = restart_point
 
         # Remove the error regardeless of whether it exists
         # or not
-        self._in_error = False
+        self._table.in_error[ self._row ] = False
 
     # This function determines if a job is in error
     def is_in_error( self ):
-        return self._in_error
+        return self._table.in_error.item( self._row )
 
     # This function updates the last running machine
     def set_last_run_machine( self, machine_id : int ):
-        self._last_run_machine = machine_id
+        self._table.last_run_machine[ self._row ] = machine_id
 
     # This function returns the machine that the job last
     # ran on 
     def get_last_run_machine( self ):
-        return self._last_run_machine
+        return self._table.last_run_machine.item( self._row )
     
     # This function sets the last time this job was
     # checkpointed
     def set_last_checkpoint_time( self, time ):
-        self._last_checkpoint_time = time
+        self._table.last_checkpoint_time[ self._row ] = time
 
     # This function gets the last checkpointing time
     def get_last_checkpoint_time( self ):
-        return self._last_checkpoint_time
+        return self._table.last_checkpoint_time.item( self._row )
     
     # Overload the equality behavior
     def __eq__( self, other ):
-        return self._comparison_func( self, other ) == 0
+        return self._strategy.comparison_func( self, other ) == 0
 
     # Overload the less than behavior
     def __lt__( self, other ):
-        return self._comparison_func( self, other ) < 0
+        return self._strategy.comparison_func( self, other ) < 0
     
     # Overload the greater than behavior
     def __gt__( self, other ):
@@ -0,0 +1,39 @@
+import random
+
+# This function places an error uniformly within the progression
+# of a job. Progressions that are too small to split are treated as
+# erroring at the end. A uniform draw from a random stream places
+# the error instead of the random module
+def uniform_error_location( job, current_timestamp, inc, draw = None ):
+    if inc < 0.000001:
+        return inc
+
+    return random.uniform( 0, inc ) if draw is None else draw * inc
+
+class JobStrategy:
+    __slots__ = ( 'comparison_func', 'error_func', 'error_loc_func', 'failure_rate' )
+
+    def __init__( self, comparison_func, error_func = None, error_loc_func = uniform_error_location, failure_rate = None ):
+        ################################################
+        # The following are functions that define how
+        # jobs operate. One strategy is shared by every
+        # job of an algorithm, so the functions should be
+        # module level functions for the jobs to pickle
+        ################################################
+        # This function defines how likely an error is to
+        # occur within a job on every progression
+        self.error_func = error_func
+
+        # This function determines where an error is likely
+        # to occur
+        self.error_loc_func = error_loc_func
+
+        # This is the rate of errors per unit of running time. When
+        # it is given, errors are not drawn on every progression.
+        # Instead every job fails when its failure clock runs out
+        self.failure_rate = failure_rate
+
+        # This function defines how jobs should be compared
+        # against eachother
+        self.comparison_func = comparison_func
+
@@ -0,0 +1,144 @@
+import numpy as np
+
+# These are the columns of the job table along with their types
+JOB_COLUMNS = {
+    'job_id' : np.int64,
+    'priority' : np.int64,
+    'runtime' : np.float64,
+    'orig_runtime' : np.float64,
+    'release_time' : np.float64,
+    'first_schedule_time' : np.float64,
+    'last_checkpoint_time' : np.float64,
+    'last_run_machine' : np.int64,
+    'in_error' : np.bool_,
+    'failure_clock' : np.float64,
+    'active_running_time' : np.float64,
+    'completion_time' : np.float64,
+    'waiting_time' : np.float64,
+}
+
+class JobTable:
+    def __init__( self, capacity : int = 16 ):
+        ################################################
+        # The following is the state of every job stored
+        # as one array per column. Every job is a row of
+        # the table, and the arrays grow as jobs are added
+        ################################################
+        # This is the number of rows that have been handed out
+        self._num_jobs : int = 0
+
+        # These are the rows that were handed out and freed again,
+        # which are reused before the table grows
+        self._free_rows = []
+
+        # Create one array for every column
+        for column, dtype in JOB_COLUMNS.items():
+            setattr( self, column, np.zeros( max( capacity, 1 ), dtype=dtype ) )
+
+    # This function doubles the size of every column, or grows it to
+    # the given capacity if that is larger
+    def _grow( self, min_capacity : int = 0 ) -> None:
+        for column in JOB_COLUMNS:
+            old = getattr( self, column )
+            new = np.zeros( max( 2 * len( old ), min_capacity ), dtype=old.dtype )
+            new[ :len( old ) ] = old
+            setattr( self, column, new )
+
+    # This function adds a job to the table and returns its row
+    def add_job( self, job_id : int, job_priority : int, runtime : float, release_time : float ) -> int:
+        if self._num_jobs == len( self.job_id ):
+            self._grow()
+
+        row = self._num_jobs
+        self._num_jobs += 1
+
+        self.job_id[ row ] = job_id
+        self.priority[ row ] = job_priority
+        self.runtime[ row ] = runtime
+        self.orig_runtime[ row ] = runtime
+        self.release_time[ row ] = release_time
+        self.first_schedule_time[ row ] = -1
+        self.last_checkpoint_time[ row ] = -1
+        self.last_run_machine[ row ] = -1
+        self.failure_clock[ row ] = np.nan
+
+        return row
+
+    # This function adds many jobs to the table at once. Every
+    # argument is an array with one entry per job. Returns the rows
+    # of the new jobs
+    def add_jobs( self, job_id, job_priority, runtime, release_time ) -> np.ndarray:
+        num_of_jobs = len( job_id )
+        if self._num_jobs + num_of_jobs > len( self.job_id ):
+            self._grow( self._num_jobs + num_of_jobs )
+
+        rows = np.arange( self._num_jobs, self._num_jobs + num_of_jobs )
+        self._num_jobs += num_of_jobs
+
+        self.job_id[ rows ] = job_id
+        self.priority[ rows ] = job_priority
+        self.runtime[ rows ] = runtime
+        self.orig_runtime[ rows ] = runtime
+        self.release_time[ rows ] = release_time
+        self.first_schedule_time[ rows ] = -1
+        self.last_checkpoint_time[ rows ] = -1
+        self.last_run_machine[ rows ] = -1
+        self.failure_clock[ rows ] = np.nan
+
+        return rows
+
+    # This function copies a row of another table into the given row
+    # of this table, or into a new row, and returns the row. A new row
+    # is a freed row if there is one
+    def copy_row( self, other : "JobTable", other_row : int, row : int = None ) -> int:
+        if row is None and self._free_rows:
+            row = self._free_rows.pop()
+
+        elif row is None:
+            if self._num_jobs == len( self.job_id ):
+                self._grow()
+
+            row = self._num_jobs
+            self._num_jobs += 1
+
+        for column in JOB_COLUMNS:
+            getattr( self, column )[ row ] = getattr( other, column )[ other_row ]
+
+        return row
+
+    # This function frees a row that was given by copy_row, so that
+    # it can be given out again
+    def free_row( self, row : int ) -> None:
+        self._free_rows.append( row )
+
+    # This function gets the number of rows the table has room for
+    def get_capacity( self ) -> int:
+        return len( self.job_id )
+
+    # This function gets a table of the given rows, in order
+    def take( self, rows ) -> "JobTable":
+        table = JobTable( len( rows ) )
+        table._num_jobs = len( rows )
+
+        for column in JOB_COLUMNS:
+            setattr( table, column, getattr( self, column )[ rows ] )
+
+        return table
+
+    # This function gets the number of jobs in the table
+    def __len__( self ):
+        return self._num_jobs - len( self._free_rows )
+
+# This function gets a table of the state of the given jobs, in
+# order. When all the jobs are in the same table the rows are
+# taken in one step, otherwise every job is copied over
+def gather_jobs( jobs ) -> JobTable:
+    if len( jobs ) > 0 and all( job.get_table() is jobs[ 0 ].get_table() for job in jobs ):
+        rows = np.fromiter( ( job.get_row() for job in jobs ), np.int64, len( jobs ) )
+        return jobs[ 0 ].get_table().take( rows )
+
+    table = JobTable( len( jobs ) )
+    for job in jobs:
+        table.copy_row( job.get_table(), job.get_row() )
+
+    return table
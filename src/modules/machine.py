@@ -1,8 +1,12 @@
 from modules.job import Job
+from modules.machinestate import MachineState
 from typing import Callable, Type
+import math
 
 class Machine:
-    def __init__( self, id : int, checkpointing_progression : float, progression_algo , checkpoint_algo ) -> None:        
+    __slots__ = ( '_id', '_curr_job', '_state', '_row', '_stored_checkpoints', '_progression_algo', '_checkpoint_algo', '_machine_index' )
+
+    def __init__( self, id : int, checkpointing_progression : float, progression_algo , checkpoint_algo, machine_index = None, machine_state = None ) -> None:        
         ################################################
         # The following are meta in formation about machines 
         ################################################
@@ -13,22 +17,40 @@ class Machine:
         # currently running
         self._curr_job : Job = None
         
+        ################################################
+        # The following is where the state of the
+        # machine is stored. A machine that belongs to a
+        # scheduler is a row in the scheduler's machine
+        # state, and a machine on its own gets a state
+        # with a single row
+        ################################################
+        if machine_state is None:
+            machine_state = MachineState( 1, checkpointing_progression )
+            row = 0
+        else:
+            row = id
+
+        # These are the arrays that hold the state of the machine
+        self._state : MachineState = machine_state
+
+        # This is the row of the machine within the arrays
+        self._row : int = row
+
+        # The lock time, checkpoint time, checkpoint progression
+        # and the active and waiting time statistics of the machine
+        # are all stored in the machine state. Locks are when a
+        # machine needs to handle recovery and overhead
+
         ################################################
         # The following are checkpointing information
         # for the machine 
         ################################################
         # This is a local machine storage for all the
-        # checkpoints that a machine has
+        # checkpoints that a machine has. The checkpoint of
+        # the current job is kept in the machine state until
+        # the job leaves the machine
         self._stored_checkpoints : dict[ int : float ] = {}
         
-        # This is the time that the job should checkpoint
-        # next
-        self._checkpoint_time = checkpointing_progression
-        
-        # This is how much the checkpoint time should increase
-        # by
-        self._checkpoint_progression = checkpointing_progression
-        
         ################################################
         # The following are functions to define how a
         # machine should behave 
@@ -41,39 +63,65 @@ class Machine:
         # handle checkpoints
         self._checkpoint_algo = checkpoint_algo
         
-        # This determines how long a machine is locked for.
-        # Locks are when a machine needs to handle recovery
-        # and overhead
-        self._lock_time = 0
-        
         ################################################
-        # The following are statistics about the machine
+        # The following keeps the scheduler informed
+        # about the state of the machine
         ################################################
-        # This stores how long the machine was active
-        self._active_time = 0
+        # This is the index of free, busy and locked machines
+        # that is updated on every job or lock transition
+        self._machine_index = machine_index
+
+    # This function tells the machine index that the state of
+    # this machine has changed
+    def _update_index( self ):
+        if self._machine_index is not None:
+            self._machine_index.update_machine( self )
+
+    # This function add locks time to the machine. Locks that another
+    # event already implies can be left out of the recorded events
+    def add_lock_time( self, lock_time, record_event = True ):
+        self._state.lock_time[ self._row ] += lock_time
+        self._update_index()
 
-        # This stores how long the machine was waiting
-        self._waiting_time = 0
+        if record_event and self._state.events is not None:
+            self._record_event( 'lock', lock_time )
 
-    # This function add locks time to the machine
-    def add_lock_time( self, lock_time ):
-        self._lock_time += lock_time
+    # This function sets the lock time for a machine
+    def set_lock_time( self, lock_time ):
+        self._state.lock_time[ self._row ] = lock_time
+        self._update_index()
 
     # This functions gets the locktime for a machine
     def get_lock_time( self ):
-        return self._lock_time
+        return self._state.lock_time.item( self._row )
+
+    # This function records an event of the machine and its current
+    # job. Without a time the event is recorded at the current timestamp
+    def _record_event( self, event : str, value : float = 0, time : float = None ) -> None:
+        job_id = -1 if self._curr_job is None else self._curr_job.get_id()
+        self._state.events.record( event, self._id, job_id, value, time )
+
+    # This function gets the config of the scheduler the machine
+    # belongs to
+    def get_config( self ):
+        return self._state.config
 
     # This function gets the id of the machine
     def get_id( self ):
         return self._id
 
+    # This function gets the random stream of the machine, or None if
+    # the scheduler does not use common random numbers
+    def get_stream( self ):
+        return None if self._state.streams is None else self._state.streams.machine_stream( self._id )
+
     # This function gets the active time of the machine
     def get_active_time(self):
-        return self._active_time
+        return self._state.active_time.item( self._row )
 
     # This function gets the waiting time of the machine
     def get_waiting_time(self):
-        return self._waiting_time
+        return self._state.waiting_time.item( self._row )
 
     # This function defines the progression behavior of the
     # machine. It pprogression by the given amount and updates
@@ -86,28 +134,45 @@ class Machine:
         if is_active:
             # If the progression amount is determined to be
             # active, update the machine's activate time
-            self._active_time += progression_time
+            self._state.active_time[ self._row ] += progression_time
 
         else:
             # Otherwise, update the machine's waiting
             # time
-            self._waiting_time += progression_time
+            self._state.waiting_time[ self._row ] += progression_time
+
+        # The progression can change the lock and the remaining
+        # runtime of the job
+        self._update_index()
 
         return progression_time
     
     # This function adds waiting time to the machine
     def add_waiting_time( self, waiting_time ):
-        self._waiting_time += waiting_time
+        self._state.waiting_time[ self._row ] += waiting_time
 
     # This function determines if a machine is free. This
     # requires that there is no job currently scheduled
     # on the machine and the machine's lock_time is 0
     def is_machine_free( self ): 
-        return self._curr_job is None and self._lock_time < 0.000001
+        return self._curr_job is None and self._state.lock_time.item( self._row ) < 0.000001
+
+    # This function determines if a machine is locked
+    def is_machine_locked( self ):
+        return self._state.lock_time.item( self._row ) >= 0.000001
 
     # This function sets the current job on the machine
     def set_curr_job( self, new_job : Job ) -> None:
+        # Move the checkpoint of the job that is leaving the
+        # machine into the machine's checkpoint storage
+        if self._state.has_stored_checkpoint[ self._row ]:
+            self._stored_checkpoints[ self._curr_job.get_id() ] = self._state.stored_checkpoint.item( self._row )
+            self._state.has_stored_checkpoint[ self._row ] = False
+
         self._curr_job = new_job
+        self._state.has_job[ self._row ] = new_job is not None
+        self._state.job_row[ self._row ] = -1 if new_job is None else self._state.adopt_job( new_job )
+        self._update_index()
 
     # This function gets the current job on the machine
     def get_curr_job( self ):
@@ -119,14 +184,50 @@ class Machine:
         # with this machine
         self._checkpoint_algo( self )
 
+    # This function stores a checkpoint of a job on the machine
+    def store_checkpoint( self, job_id : int, runtime : float ) -> None:
+        if self._curr_job is not None and self._curr_job.get_id() == job_id:
+            # The checkpoint of the current job is kept in the
+            # machine state
+            self._state.stored_checkpoint[ self._row ] = runtime
+            self._state.has_stored_checkpoint[ self._row ] = True
+
+        else:
+            self._stored_checkpoints[ job_id ] = runtime
+
+    # This function determines if the machine has a checkpoint
+    # stored for a job
+    def has_stored_checkpoint( self, job_id : int ) -> bool:
+        if self._curr_job is not None and self._curr_job.get_id() == job_id and self._state.has_stored_checkpoint[ self._row ]:
+            return True
+
+        return job_id in self._stored_checkpoints.keys()
+
+    # This function gets the checkpoint stored for a job
+    def get_stored_checkpoint( self, job_id : int ) -> float:
+        if self._curr_job is not None and self._curr_job.get_id() == job_id and self._state.has_stored_checkpoint[ self._row ]:
+            return self._state.stored_checkpoint.item( self._row )
+
+        return self._stored_checkpoints[ job_id ]
+
     # This function tries to migrate a checkpoint from one
     # machine to another
     def migrate_checkpoint( self, target_machine, job ) -> bool:
-        if job.get_id() in self._stored_checkpoints.keys():
+        if self.has_stored_checkpoint( job.get_id() ):
             # If the job exists in this machine's checkpoint storage
             # send it to the target machine and indicate that
             # the checkpointing was successful
-            target_machine._stored_checkpoints[ job.get_id() ] = self._stored_checkpoints.pop( job.get_id() )
+            runtime = self.get_stored_checkpoint( job.get_id() )
+
+            if self._curr_job is not None and self._curr_job.get_id() == job.get_id():
+                self._state.has_stored_checkpoint[ self._row ] = False
+
+            self._stored_checkpoints.pop( job.get_id(), None )
+            target_machine.store_checkpoint( job.get_id(), runtime )
+
+            if self._state.events is not None and target_machine is not self:
+                self._state.events.record( 'migrate', target_machine.get_id(), job.get_id(), self._id )
+
             return True
         
         else:
@@ -135,9 +236,38 @@ class Machine:
     
     # This function returns the current checkpointing time
     def get_checkpoint_time( self ):
-        return self._checkpoint_time
+        return self._state.checkpoint_time.item( self._row )
     
     # This function progresses the current checkpointing
     # time
     def progress_checkpoint_time( self ):
-        self._checkpoint_time += self._checkpoint_progression
+        self._state.checkpoint_time[ self._row ] += self._state.checkpoint_progression[ self._row ]
+
+    # This function moves the checkpoint time of the machine past the
+    # current timestamp in one step. It returns the number of
+    # checkpoint boundaries that were passed along with the last
+    # boundary that was passed. The checkpoints are only recorded as an
+    # event if record_event is set, which algorithms do when the
+    # checkpoints lock the machine
+    def catch_up_checkpoint_time( self, current_timestamp, record_event = False ):
+        checkpoint_time = self._state.checkpoint_time.item( self._row )
+        checkpoint_progression = self._state.checkpoint_progression.item( self._row )
+
+        if current_timestamp < checkpoint_time:
+            return 0, checkpoint_time
+
+        if checkpoint_progression <= 0:
+            # Without a progression a checkpoint is taken on every
+            # timestep
+            self._state.checkpoint_time[ self._row ] = current_timestamp + 1
+            passed, last_checkpoint_time = 1, checkpoint_time
+
+        else:
+            passed = math.floor( ( current_timestamp - checkpoint_time ) / checkpoint_progression ) + 1
+            self._state.checkpoint_time[ self._row ] = checkpoint_time + passed * checkpoint_progression
+            last_checkpoint_time = checkpoint_time + ( passed - 1 ) * checkpoint_progression
+
+        if record_event and self._state.events is not None:
+            self._record_event( 'checkpoint', passed, last_checkpoint_time )
+
+        return passed, last_checkpoint_time
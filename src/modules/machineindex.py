@@ -0,0 +1,193 @@
+import heapq
+
+class MachineIndex:
+    def __init__( self, num_of_machines : int, victim_key_func = None ):
+        ################################################
+        # The following are the sets of machine ids in
+        # each state. A machine is free when it has no
+        # job and no lock, busy when it has a job and
+        # locked when it has lock time left. A busy
+        # machine can also be locked
+        ################################################
+        # This is the set of machines that are free
+        self._free_machines : set[ int ] = set( range( num_of_machines ) )
+
+        # This is the set of machines that are running a job
+        self._busy_machines : set[ int ] = set()
+
+        # This is the set of machines that are locked
+        self._locked_machines : set[ int ] = set()
+
+        ################################################
+        # The following is used to find the free machine
+        # with the lowest id without scanning every machine
+        ################################################
+        # This is a min heap of free machine ids. Machines that
+        # stop being free are only removed lazily when they reach
+        # the top of the heap
+        self._free_heap : list[ int ] = list( range( num_of_machines ) )
+
+        # This is the set of machine ids that are in the heap
+        self._in_free_heap : set[ int ] = set( range( num_of_machines ) )
+
+        # This is the total number of machines in the index
+        self._num_of_machines : int = num_of_machines
+
+        ################################################
+        # The following orders the running jobs on
+        # unlocked machines to find preemption victims.
+        # It is only kept when a victim key function
+        # is given
+        ################################################
+        # This function returns the sort key of a job given the
+        # victim progress below. The job with the smallest key is
+        # the weakest job
+        self._victim_key_func = victim_key_func
+
+        # This is the progress that every running job on an unlocked
+        # machine made since the index was created. Keys are taken
+        # relative to it, so they stay in order without being
+        # recomputed while every candidate progresses by the same
+        # amount. Only the machines that progress by a different
+        # amount are marked as changed
+        self._victim_progress : float = 0
+
+        # This is a min heap of ( key, machine id, version ). An
+        # entry is only valid while its version is the latest
+        # version of the machine
+        self._victim_heap : list = []
+
+        # This is the latest version of every machine's entry
+        self._victim_versions : list[ int ] = [ 0 ] * num_of_machines
+
+        # These are the machines that changed since the victims were
+        # last looked up. Their keys are only computed on the next
+        # lookup
+        self._changed_machines : dict = {}
+
+    # This function updates the state of a machine in the index. It
+    # is called by the machine on every job or lock transition
+    def update_machine( self, machine ) -> None:
+        machine_id = machine.get_id()
+
+        # Update whether the machine is running a job
+        if machine.get_curr_job() is not None:
+            self._busy_machines.add( machine_id )
+        else:
+            self._busy_machines.discard( machine_id )
+
+        # Update whether the machine is locked
+        if machine.is_machine_locked():
+            self._locked_machines.add( machine_id )
+        else:
+            self._locked_machines.discard( machine_id )
+
+        # Update whether the machine is free
+        if machine.is_machine_free():
+            self._free_machines.add( machine_id )
+
+            # Only push the machine if it is not already in the heap
+            if machine_id not in self._in_free_heap:
+                heapq.heappush( self._free_heap, machine_id )
+                self._in_free_heap.add( machine_id )
+        else:
+            self._free_machines.discard( machine_id )
+
+        # Remember to recompute the victim key of this machine
+        if self._victim_key_func is not None:
+            self._changed_machines[ machine_id ] = machine
+
+    # This function updates the state of several machines in the index
+    def update_machines( self, machines ) -> None:
+        for machine in machines:
+            self.update_machine( machine )
+
+    # This function marks machines whose running jobs changed without
+    # a job or lock transition, so their victim keys are recomputed
+    def mark_machines_changed( self, machines ) -> None:
+        if self._victim_key_func is not None:
+            self._changed_machines.update( ( machine.get_id(), machine ) for machine in machines )
+
+    # This function moves the victim progress forward by the progress
+    # that every running job on an unlocked machine made. The machines
+    # whose jobs progressed by a different amount must be marked as
+    # changed
+    def advance_victim_progress( self, progress : float ) -> None:
+        self._victim_progress += progress
+
+    # This function gets the id of the free machine with the lowest
+    # id, or None if there are no free machines
+    def get_first_free_machine( self ):
+        # Throw away the entries of machines that are no longer free
+        while len( self._free_heap ) > 0 and self._free_heap[ 0 ] not in self._free_machines:
+            self._in_free_heap.discard( heapq.heappop( self._free_heap ) )
+
+        if len( self._free_heap ) == 0:
+            return None
+
+        return self._free_heap[ 0 ]
+
+    # This function pushes a fresh entry for every machine that
+    # changed since the last lookup
+    def _refresh_victims( self ) -> None:
+        for machine_id, machine in self._changed_machines.items():
+            # Invalidate the old entry of the machine
+            self._victim_versions[ machine_id ] += 1
+
+            # Only machines that are running a job and have no lock
+            # time at all are candidates to be preempted
+            if machine.get_curr_job() is not None and machine.get_lock_time() == 0:
+                heapq.heappush( self._victim_heap, ( self._victim_key_func( machine.get_curr_job(), self._victim_progress ), machine_id, self._victim_versions[ machine_id ] ) )
+
+        self._changed_machines.clear()
+
+        # Rebuild the heap once it is mostly invalid entries so that
+        # it does not grow with the number of timesteps
+        if len( self._victim_heap ) > 2 * self._num_of_machines + 16:
+            self._victim_heap = [ entry for entry in self._victim_heap if entry[ 2 ] == self._victim_versions[ entry[ 1 ] ] ]
+            heapq.heapify( self._victim_heap )
+
+    # This function gets the id of the unlocked machine that is
+    # running the job with the smallest victim key, or None if
+    # there is no such machine. Machines with equal keys are
+    # ordered by their id
+    def get_weakest_machine( self ):
+        self._refresh_victims()
+
+        # Throw away the entries that are no longer valid
+        while len( self._victim_heap ) > 0 and self._victim_heap[ 0 ][ 2 ] != self._victim_versions[ self._victim_heap[ 0 ][ 1 ] ]:
+            heapq.heappop( self._victim_heap )
+
+        if len( self._victim_heap ) == 0:
+            return None
+
+        return self._victim_heap[ 0 ][ 1 ]
+
+    # This function determines if the running jobs are ordered to find
+    # preemption victims
+    def has_victim_index( self ) -> bool:
+        return self._victim_key_func is not None
+
+    # This function determines if there is at least one free machine
+    def has_free_machine( self ) -> bool:
+        return len( self._free_machines ) > 0
+
+    # This function determines if every machine is free
+    def are_all_machines_free( self ) -> bool:
+        return len( self._free_machines ) == self._num_of_machines
+
+    # This function determines if any machine is running a job
+    def has_busy_machine( self ) -> bool:
+        return len( self._busy_machines ) > 0
+
+    # This function gets the number of free machines
+    def get_num_free_machines( self ) -> int:
+        return len( self._free_machines )
+
+    # This function gets the number of busy machines
+    def get_num_busy_machines( self ) -> int:
+        return len( self._busy_machines )
+
+    # This function gets the number of locked machines
+    def get_num_locked_machines( self ) -> int:
+        return len( self._locked_machines )
@@ -0,0 +1,449 @@
+import numpy as np
+import math
+
+# Below this many busy machines it is faster to progress the
+# machines one at a time than to gather them into arrays
+VECTORIZE_THRESHOLD = 8
+
+# Below this many timesteps it is faster to advance the machines one
+# timestep at a time than to skip over the timesteps at once
+SKIP_THRESHOLD = 4
+
+################################################
+# The following advances every machine of a
+# scheduler by one timestep at once. The common
+# case is computed on the machine state arrays,
+# and only the machines with a completion, an
+# error or a fraction of the timestep left over
+# are handed to the per machine code
+################################################
+
+# This function computes the completion statistics of a job and
+# sends it to the finished jobs of the scheduler
+def complete_job( scheduler, machine, job, progression_time ):
+    if scheduler.events is not None:
+        scheduler.events.record( 'complete', machine.get_id(), job.get_id(), time=scheduler._current_timestamp + progression_time )
+
+    job.set_completion_time( scheduler._current_timestamp + progression_time + job.get_waiting_time() )
+    job.add_waiting_time( scheduler._current_timestamp + progression_time - job.get_release_time() - job.get_job_active_running_time())
+    scheduler.finished_tasks.append( job )
+    machine.set_curr_job( None )
+    scheduler.machine_state.release_job( job )
+
+# This function records the error of a job and lets the algorithm
+# recover it
+def recover_job( scheduler, machine, job, progression_time, recovery_func ):
+    if scheduler.events is not None:
+        scheduler.events.record( 'error', machine.get_id(), job.get_id(), progression_time, scheduler._current_timestamp + progression_time )
+
+    recovery_func( scheduler, machine, job, progression_time )
+
+# This function lets the machine index know how far the jobs on the
+# given unlocked machines progressed. The most common progress moves
+# every victim key at once, and only the machines that progressed by
+# a different amount have their keys recomputed
+def advance_victims( scheduler, machine_ids, progress ):
+    machine_index = scheduler._machine_index
+    if not machine_index.has_victim_index() or len( machine_ids ) == 0:
+        return
+
+    values, counts = np.unique( progress, return_counts=True )
+    common_progress = values[ counts.argmax() ]
+
+    machine_index.advance_victim_progress( common_progress.item() )
+    machine_index.mark_machines_changed( scheduler.machines[ machine_id ] for machine_id in machine_ids[ progress != common_progress ].tolist() )
+
+# This function progresses machines one at a time through their own
+# progression function until they have used up their progression.
+# It is given a list of [ machine id, progression left ] pairs
+def progress_machines( scheduler, total_progress_map, recovery_func, failure_rate = None ):
+    # The following code will be executed while there is atleast 1 machine
+    # who can make some progress
+    while any( [ progress[ 1 ] != 0 for progress in total_progress_map ] ):
+        # Get every progress from our progress map
+        for progress in total_progress_map:
+            # Get the associated machine for this computation
+            curr_machine = scheduler.machines[ progress[ 0 ] ]
+
+            # If the machine can't make progress or if the machine has
+            # no job, indicate that the machine is waiting
+            if progress[ 1 ] == 0 or curr_machine.get_curr_job() is None:
+                curr_machine.add_waiting_time( progress[ 1 ] )
+                progress[ 1 ] = 0
+                continue
+
+            # Give the job a failure clock if it needs one
+            if failure_rate is not None:
+                scheduler.failure_engine.arm_job( curr_machine.get_curr_job() )
+
+            # Progress the machine for progression time units
+            ret = curr_machine.progress( scheduler._current_timestamp, progress[ 1 ] )
+
+            # Get the current job on the machine
+            curr_job = curr_machine.get_curr_job()
+
+            if curr_job.is_job_complete():
+                # If the job is complete, compute all the relevant statistics and send
+                # the job to the finished jobs queue
+                complete_job( scheduler, curr_machine, curr_job, ret )
+
+            elif curr_job.is_in_error():
+                # If this job is in error, let the algorithm recover it
+                recover_job( scheduler, curr_machine, curr_job, ret, recovery_func )
+
+            # Edit the overall progression for this machine
+            progress[ 1 ] -= ret
+
+        # Sort the machines so that we prioritize machines that
+        # still have more progressions to make
+        total_progress_map.sort( key=lambda x : x[ 1 ], reverse=True )
+
+# This function advances every machine of the scheduler by one unit
+# of progress. It does the same thing as calling progress on every
+# machine with the progression functions of the algorithm modules:
+# locks are used up first, checkpoints are taken at every checkpoint
+# boundary the machine has passed, and the job progresses for the
+# rest of the timestep unless it runs into an error.
+#
+# When a failure rate is given, every job fails once the failure
+# clock it got from the scheduler's failure engine runs out, which
+# needs no random draws on a timestep. Otherwise
+# error_probability_func( current_timestamp, last_checkpoint_times )
+# returns the probability of an error for every running job, and the
+# error is placed uniformly within the progression.
+#
+# recovery_func( scheduler, machine, job, progression_time ) handles
+# a job that is in error. Every checkpoint locks the machine for
+# checkpointing_overhead and, if store_checkpoints is set, stores the
+# remaining runtime of the job on the machine
+def advance_machines( scheduler, recovery_func, error_probability_func = None, failure_rate = None, checkpointing_overhead = 0, store_checkpoints = False ):
+    state = scheduler.machine_state
+    current_timestamp = scheduler._current_timestamp
+
+    # Machines without a job wait for the whole timestep
+    state.waiting_time[ ~state.has_job ] += 1
+
+    # Get the machines with a job on them
+    busy = np.flatnonzero( state.has_job )
+    if len( busy ) == 0:
+        return
+
+    # With only a few busy machines, progress them one at a time
+    if len( busy ) < VECTORIZE_THRESHOLD:
+        progress_machines( scheduler, [ [ machine_id, 1 ] for machine_id in busy.tolist() ], recovery_func, failure_rate )
+        return
+
+    num_busy = len( busy )
+
+    ################################################
+    # Gather the state of the running jobs
+    ################################################
+    job_table = state.job_table
+    job_rows = state.job_row[ busy ]
+    runtime = job_table.runtime[ job_rows ]
+    last_checkpoint_time = job_table.last_checkpoint_time[ job_rows ]
+    job_active_time = job_table.active_running_time[ job_rows ]
+    job_waiting_time = job_table.waiting_time[ job_rows ]
+    in_error = job_table.in_error[ job_rows ]
+
+    ################################################
+    # Gather the state of the busy machines
+    ################################################
+    lock_time = state.lock_time[ busy ]
+    was_locked = lock_time >= 0.000001
+
+    # Only machines without any lock time are candidates to be
+    # preempted
+    was_candidate = lock_time == 0
+
+    # Remove any floating point errors in the lock time
+    lock_time[ lock_time < 0.000001 ] = 0
+
+    # Move the checkpoint time of every machine past the current
+    # timestamp in one step. Every boundary that was passed locks the
+    # machine, and the job keeps the last boundary as its checkpoint
+    num_checkpoints, passed_checkpoint_time = state.catch_up_checkpoints( busy, current_timestamp )
+    checkpointed = num_checkpoints > 0
+    last_checkpoint_time[ checkpointed ] = passed_checkpoint_time[ checkpointed ]
+    lock_time += num_checkpoints * checkpointing_overhead
+
+    if store_checkpoints:
+        state.stored_checkpoint[ busy[ checkpointed ] ] = runtime[ checkpointed ]
+        state.has_stored_checkpoint[ busy[ checkpointed ] ] = True
+
+    # Record the checkpoints that lock the machine. The locks they cause
+    # are implied by them
+    if scheduler.events is not None and checkpointing_overhead > 0 and checkpointed.any():
+        scheduler.events.record_many( 'checkpoint', passed_checkpoint_time[ checkpointed ], busy[ checkpointed ], job_table.job_id[ job_rows[ checkpointed ] ], num_checkpoints[ checkpointed ] )
+
+    # This is how much of the timestep every machine used
+    progression_time = np.ones( num_busy, dtype=np.float64 )
+
+    ################################################
+    # Machines that are locked for the whole timestep
+    # only use up their lock
+    ################################################
+    locked = ~( 1 > lock_time )
+
+    # When the lock is within floating point error of the timestep
+    # it ends exactly, and the machine only used the lock time
+    lock_ends = locked & ( np.abs( lock_time - 1 ) <= 1e-9 * np.maximum( np.abs( lock_time ), 1 ) )
+    progression_time[ lock_ends ] = lock_time[ lock_ends ]
+    job_waiting_time[ locked ] += progression_time[ locked ]
+    lock_time[ locked ] = np.where( lock_ends[ locked ], 0, lock_time[ locked ] - 1 )
+
+    ################################################
+    # Machines that are not locked for the whole
+    # timestep progress their job after the lock
+    ################################################
+    progressing = ~locked
+    orig_lock_time = lock_time[ progressing ]
+    job_waiting_time[ progressing ] += orig_lock_time
+    increment = 1 - orig_lock_time
+
+    # Jobs progress as far as they can
+    progress = np.minimum( runtime[ progressing ], increment )
+
+    if failure_rate is not None:
+        # Jobs whose failure clock runs out before the end of their
+        # progression fail when it runs out, and need a new clock
+        scheduler.failure_engine.arm_jobs( job_table, job_rows )
+        failure_clock = job_table.failure_clock[ job_rows[ progressing ] ]
+        time_to_failure = failure_clock / failure_rate
+        error = time_to_failure < progress
+        progress = np.where( error, time_to_failure, progress )
+        job_table.failure_clock[ job_rows[ progressing ] ] = np.where( error, np.nan, failure_clock - failure_rate * progress )
+
+    else:
+        # Every machine draws from its own stream when there are streams
+        if scheduler.streams is not None:
+            error_draw, location_draw = scheduler.streams.machine_draws( busy[ progressing ].tolist(), 2 ).T
+        else:
+            error_draw = scheduler.rng.random( len( increment ) )
+            location_draw = scheduler.rng.random( len( increment ) )
+
+        # Draw whether every progressing job runs into an error
+        error = error_draw < error_probability_func( current_timestamp, last_checkpoint_time[ progressing ] )
+
+        # Jobs with an error only get to the location of the error
+        error_location = np.where( increment < 0.000001, increment, location_draw * increment )
+        progress = np.where( error, error_location, progress )
+
+    runtime_progress = np.zeros( num_busy, dtype=np.float64 )
+    runtime_progress[ progressing ] = np.where( error, 0, progress )
+    runtime -= runtime_progress
+    job_active_time[ progressing ] += progress
+    in_error[ progressing ] = error
+    progression_time[ progressing ] = progress + orig_lock_time
+    lock_time[ progressing ] = 0
+
+    ################################################
+    # Scatter the new state back
+    ################################################
+    state.lock_time[ busy ] = lock_time
+    state.active_time[ busy ] += progression_time
+
+    job_table.runtime[ job_rows ] = runtime
+    job_table.last_checkpoint_time[ job_rows ] = last_checkpoint_time
+    job_table.active_running_time[ job_rows ] = job_active_time
+    job_table.waiting_time[ job_rows ] = job_waiting_time
+    job_table.in_error[ job_rows ] = in_error
+
+    # Let the machine index know about the machines that were locked
+    # or unlocked, or that became candidates to be preempted, and
+    # about the jobs that progressed on the unlocked machines
+    lock_changed = np.flatnonzero( ( was_locked != ( lock_time >= 0.000001 ) ) | ( was_candidate != ( lock_time == 0 ) ) )
+    scheduler._machine_index.update_machines( [ scheduler.machines[ machine_id ] for machine_id in busy[ lock_changed ].tolist() ] )
+    unlocked = lock_time == 0
+    advance_victims( scheduler, busy[ unlocked ], runtime_progress[ unlocked ] )
+
+    ################################################
+    # Hand the completed jobs and the jobs in error
+    # to the per machine code
+    ################################################
+    completed = runtime == 0
+    for i in np.flatnonzero( completed | in_error ).tolist():
+        machine = scheduler.machines[ busy[ i ] ]
+
+        if completed[ i ]:
+            complete_job( scheduler, machine, machine.get_curr_job(), progression_time.item( i ) )
+        else:
+            recover_job( scheduler, machine, machine.get_curr_job(), progression_time.item( i ), recovery_func )
+
+    # Every machine that has some of the timestep left over finishes
+    # it one machine at a time, the same way as the first pass
+    left_over = 1 - progression_time
+    total_progress_map = [ [ busy.item( i ), left_over.item( i ) ] for i in np.flatnonzero( left_over != 0 ).tolist() ]
+    total_progress_map.sort( key=lambda x : x[ 1 ], reverse=True )
+    progress_machines( scheduler, total_progress_map, recovery_func, failure_rate )
+
+# This function counts the checkpoint boundaries that machines pass
+# up to a timestamp, given the next boundary of every machine and the
+# progression between boundaries. The timestamp may be given for
+# every machine. A machine without a progression passes one boundary
+# on every timestep from its next boundary on
+def count_checkpoints( checkpoint_time, checkpoint_progression, timestamp ):
+    # Without a progression the boundaries are one unit apart
+    period = np.where( checkpoint_progression > 0, checkpoint_progression, 1 )
+    return np.maximum( np.floor( ( timestamp - checkpoint_time ) / period ).astype( np.int64 ) + 1, 0 )
+
+# This function advances every machine of the scheduler over as many
+# of the next max_ticks timesteps as it can in one step, and returns
+# the number of timesteps it advanced. On the timesteps it skips, a
+# locked machine stays locked for the whole timestep, and an unlocked
+# machine only checkpoints and then progresses its job for the rest
+# of the timestep. It stops before the first timestep in which a job
+# would complete or run into an error, or a lock would end, so those
+# are always handled by advance_machines on their own timestep.
+# Advancing over the skipped timesteps at once gives the same state
+# as calling advance_machines with the same arguments on every one of
+# them. The jobs must fail at a failure rate, since drawing errors
+# needs every timestep
+def skip_machines( scheduler, max_ticks, failure_rate, checkpointing_overhead = 0, store_checkpoints = False ):
+    state = scheduler.machine_state
+    current_timestamp = scheduler._current_timestamp
+
+    busy = np.flatnonzero( state.has_job )
+    if len( busy ) == 0 or max_ticks < SKIP_THRESHOLD:
+        return 0
+
+    job_table = state.job_table
+
+    # With only a few busy machines, look for one that has an event
+    # within the next few timesteps one machine at a time, which is
+    # faster than gathering them into arrays. This is the common case
+    # between events, where nothing can be skipped
+    if len( busy ) < VECTORIZE_THRESHOLD:
+        for machine_id in busy.tolist():
+            job_row = state.job_row[ machine_id ]
+            failure_clock = job_table.failure_clock[ job_row ]
+            if math.isnan( failure_clock ):
+                return 0
+
+            if state.lock_time[ machine_id ] > 0:
+                time_left = state.lock_time[ machine_id ]
+            elif failure_rate > 0:
+                time_left = min( job_table.runtime[ job_row ], failure_clock / failure_rate )
+            else:
+                time_left = job_table.runtime[ job_row ]
+
+            if time_left - 0.000001 < SKIP_THRESHOLD:
+                return 0
+
+    ################################################
+    # Gather the state of the running jobs and of
+    # the busy machines
+    ################################################
+    job_rows = state.job_row[ busy ]
+    runtime = job_table.runtime[ job_rows ]
+    failure_clock = job_table.failure_clock[ job_rows ]
+
+    # Jobs without a failure clock get one on their next timestep
+    if np.isnan( failure_clock ).any():
+        return 0
+
+    lock_time = state.lock_time[ busy ]
+    locked = lock_time > 0
+
+    ################################################
+    # Find how much time every machine can use up
+    # before its next event. A job can progress until
+    # it would complete or fail, and a lock can be
+    # used up until it would end. The bound is kept a
+    # little short of the real one so that floating
+    # point error never skips over an event
+    ################################################
+    time_to_failure = failure_clock / failure_rate if failure_rate > 0 else np.inf
+    limit = np.where( locked, lock_time, np.minimum( runtime, time_to_failure ) ) - 0.000001
+
+    # A machine with an event within the next few timesteps is advanced
+    # one timestep at a time
+    if limit.min() < SKIP_THRESHOLD:
+        return 0
+
+    checkpoint_time = state.checkpoint_time[ busy ]
+    checkpoint_progression = state.checkpoint_progression[ busy ]
+    has_progression = checkpoint_progression > 0
+    period = np.where( has_progression, checkpoint_progression, 1 )
+
+    # Every checkpoint boundary within a timestep locks the machine. An
+    # unlocked machine only stays unlocked when the locks of a timestep
+    # always end within it
+    if checkpointing_overhead > 0 and ( math.floor( 1 / period.min() ) + 1 ) * checkpointing_overhead >= 1:
+        return 0
+
+    # This function gets how much of the given number of timesteps every
+    # machine has left after the locks of its checkpoints. An unlocked
+    # machine progresses its job for all of it, and a locked machine
+    # uses it up on the lock it started with
+    def time_after_checkpoints( num_ticks ):
+        return num_ticks - checkpointing_overhead * count_checkpoints( checkpoint_time, checkpoint_progression, current_timestamp + num_ticks )
+
+    ################################################
+    # Find the number of timesteps every machine can
+    # be advanced over. At least one boundary is
+    # passed for every period after the next one, so
+    # the time left after n timesteps is at most
+    # n - C * max( 0, ( t + n - b ) / p ). Solving it
+    # against the limit never overshoots the real
+    # number of timesteps and only falls short of
+    # it by about a timestep
+    ################################################
+    num_ticks_left = np.ceil( limit ) - 1
+    if checkpointing_overhead > 0:
+        num_ticks_left = np.maximum( num_ticks_left, np.ceil( ( limit + checkpointing_overhead * ( current_timestamp - checkpoint_time ) / period ) / ( 1 - checkpointing_overhead / period ) ) - 1 )
+
+    num_ticks = int( min( num_ticks_left.min(), max_ticks ) )
+
+    if num_ticks < SKIP_THRESHOLD:
+        return 0
+
+    ################################################
+    # Advance every machine over the timesteps
+    ################################################
+    num_checkpoints = count_checkpoints( checkpoint_time, checkpoint_progression, current_timestamp + num_ticks )
+    checkpoint_lock_time = checkpointing_overhead * num_checkpoints
+    progress = np.where( locked, 0, num_ticks - checkpoint_lock_time )
+
+    # Every boundary that was passed is the checkpoint of the timestep
+    # that passed it, which is the first timestep at or after it. The
+    # next boundary of a machine without a progression is on the next
+    # timestep once it has passed one
+    checkpointed = num_checkpoints > 0
+    last_checkpoint_time = np.where( has_progression, checkpoint_time + ( num_checkpoints - 1 ) * checkpoint_progression, current_timestamp + num_ticks )
+    state.checkpoint_time[ busy ] = np.where( has_progression, checkpoint_time + num_checkpoints * checkpoint_progression, np.where( checkpointed, current_timestamp + num_ticks + 1, checkpoint_time ) )
+    job_table.last_checkpoint_time[ job_rows[ checkpointed ] ] = last_checkpoint_time[ checkpointed ]
+
+    if store_checkpoints:
+        # The checkpoint stores the runtime at the start of the timestep
+        # that passed the last boundary
+        last_checkpoint_tick = np.where( has_progression, np.ceil( last_checkpoint_time ) - current_timestamp, num_ticks ).astype( np.int64 )
+        stored_checkpoint = runtime - np.where( locked, 0, time_after_checkpoints( last_checkpoint_tick - 1 ) )
+
+        state.stored_checkpoint[ busy[ checkpointed ] ] = stored_checkpoint[ checkpointed ]
+        state.has_stored_checkpoint[ busy[ checkpointed ] ] = True
+
+    # Record the checkpoints of every machine that they lock as one event
+    # at the last boundary it passed
+    if scheduler.events is not None and checkpointing_overhead > 0 and checkpointed.any():
+        scheduler.events.record_many( 'checkpoint', last_checkpoint_time[ checkpointed ], busy[ checkpointed ], job_table.job_id[ job_rows[ checkpointed ] ], num_checkpoints[ checkpointed ] )
+
+    # The jobs wait for every timestep that is not spent progressing
+    # them, and use up their failure clocks as they progress
+    job_table.runtime[ job_rows ] = runtime - progress
+    job_table.active_running_time[ job_rows ] += progress
+    job_table.waiting_time[ job_rows ] += num_ticks - progress
+    job_table.failure_clock[ job_rows ] = failure_clock - failure_rate * progress
+
+    # The locked machines use up their locks along with the locks of
+    # their checkpoints
+    state.lock_time[ busy ] = np.where( locked, lock_time + checkpoint_lock_time - num_ticks, 0 )
+
+    # The busy machines are active for every timestep and the rest wait
+    state.active_time[ busy ] += num_ticks
+    state.waiting_time[ ~state.has_job ] += num_ticks
+
+    # Let the machine index know about the jobs that progressed
+    advance_victims( scheduler, busy[ ~locked ], progress[ ~locked ] )
+
+    return num_ticks
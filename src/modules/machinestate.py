@@ -0,0 +1,134 @@
+import numpy as np
+from modules.schedulerconfig import DEFAULT_CONFIG
+
+class MachineState:
+    def __init__( self, num_of_machines : int, checkpointing_progression : float ):
+        ################################################
+        # The following is the state of every machine
+        # stored as one array per field, so that all the
+        # machines can be advanced in a single step.
+        # Row i belongs to the machine with id i
+        ################################################
+        # This determines how long every machine is locked for
+        self.lock_time = np.zeros( num_of_machines, dtype=np.float64 )
+
+        # This is the time that every machine should checkpoint next
+        self.checkpoint_time = np.full( num_of_machines, checkpointing_progression, dtype=np.float64 )
+
+        # This is how much the checkpoint time of every machine
+        # increases by
+        self.checkpoint_progression = np.full( num_of_machines, checkpointing_progression, dtype=np.float64 )
+
+        # This indicates whether every machine has a job on it
+        self.has_job = np.zeros( num_of_machines, dtype=np.bool_ )
+
+        ################################################
+        # The following locates the job that is on every
+        # machine. The jobs on the machines are all kept
+        # in one job table, so their state can be read
+        # and written for every machine at once
+        ################################################
+        # This is the table that the jobs on the machines are in
+        self.job_table = None
+
+        # This is the row of the job on every machine within the
+        # job table
+        self.job_row = np.full( num_of_machines, -1, dtype=np.int64 )
+
+        # This is the table and row that every job that was moved
+        # into the job table came from, by its row in the job table
+        self._home_rows = {}
+
+        ################################################
+        # The following is the latest checkpoint of the
+        # job that is currently on every machine. It is
+        # moved to the machine's checkpoint storage when
+        # the job leaves the machine
+        ################################################
+        # This is the remaining runtime stored by the latest
+        # checkpoint of the current job
+        self.stored_checkpoint = np.zeros( num_of_machines, dtype=np.float64 )
+
+        # This indicates whether the current job has been
+        # checkpointed on the machine
+        self.has_stored_checkpoint = np.zeros( num_of_machines, dtype=np.bool_ )
+
+        ################################################
+        # The following are statistics about every machine
+        ################################################
+        # This stores how long every machine was active
+        self.active_time = np.zeros( num_of_machines, dtype=np.float64 )
+
+        # This stores how long every machine was waiting
+        self.waiting_time = np.zeros( num_of_machines, dtype=np.float64 )
+
+        # This is the recorder of the events of the machines, or None
+        # if the scheduler is not recording events
+        self.events = None
+
+        # This is the config of the scheduler the machines belong to
+        self.config = DEFAULT_CONFIG
+
+        # These are the random streams of the scheduler the machines
+        # belong to, or None if it does not use common random numbers
+        self.streams = None
+
+    # This function makes sure a job is in the job table of the
+    # machines and returns its row. The table of the first job is
+    # used, and jobs from any other table are moved into it
+    def adopt_job( self, job ) -> int:
+        if self.job_table is None:
+            self.job_table = job.get_table()
+
+        home = job.get_table()
+        if home is not self.job_table:
+            home_row = job.get_row()
+            job.move_to_table( self.job_table )
+            self._home_rows[ job.get_row() ] = ( home, home_row )
+
+        return job.get_row()
+
+    # This function moves a completed job that was moved into the job
+    # table back to the row it came from, and frees its row in the job
+    # table. The job table then only holds the jobs of the first table
+    # and the jobs that have run but not completed
+    def release_job( self, job ) -> None:
+        if job.get_table() is not self.job_table:
+            return
+
+        home = self._home_rows.pop( job.get_row(), None )
+        if home is None:
+            return
+
+        row = job.get_row()
+        job.move_to_table( *home )
+        self.job_table.free_row( row )
+
+    # This function moves the checkpoint time of the given machines
+    # past the current timestamp in one step. It returns the number
+    # of checkpoint boundaries every machine passed along with the
+    # last boundary it passed. A machine without a checkpoint
+    # progression passes one boundary on every timestep
+    def catch_up_checkpoints( self, rows, current_timestamp ):
+        checkpoint_time = self.checkpoint_time[ rows ]
+        checkpoint_progression = self.checkpoint_progression[ rows ]
+        has_progression = checkpoint_progression > 0
+
+        # Count the boundaries between the checkpoint time and the
+        # current timestamp
+        passed = np.zeros( len( checkpoint_time ), dtype=np.int64 )
+        crossed = current_timestamp >= checkpoint_time
+        periodic = crossed & has_progression
+        passed[ periodic ] = np.floor( ( current_timestamp - checkpoint_time[ periodic ] ) / checkpoint_progression[ periodic ] ).astype( np.int64 ) + 1
+        passed[ crossed & ~has_progression ] = 1
+
+        # The last boundary is one progression before the new
+        # checkpoint time
+        last_checkpoint_time = checkpoint_time + ( passed - 1 ) * checkpoint_progression
+        self.checkpoint_time[ rows ] = np.where( has_progression, checkpoint_time + passed * checkpoint_progression, np.where( crossed, current_timestamp + 1, checkpoint_time ) )
+
+        return passed, last_checkpoint_time
+
+    # This function gets the number of machines in the state
+    def __len__( self ):
+        return len( self.lock_time )
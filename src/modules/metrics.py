@@ -0,0 +1,126 @@
+import numpy as np
+from modules.onlinestats import OnlineStatistics
+
+# These are the events that are counted during a run
+METRIC_COUNTERS = ( 'preempts', 'kills', 'migrations', 'errors' )
+
+# These are the columns that are recorded for every finished job
+# along with their types
+JOB_METRIC_COLUMNS = {
+    'priority' : np.int64,
+    'orig_runtime' : np.float64,
+    'active_running_time' : np.float64,
+}
+
+# This is the number of bins of the histogram of every job column
+JOB_METRIC_BINS = 128
+
+class MetricsCollector:
+    def __init__( self, capacity : int = 64, keep_jobs : bool = True ):
+        ################################################
+        # The following are the metrics of a single run.
+        # Counters are kept in one typed array and the
+        # job metrics in one array per column, so that
+        # collectors from many runs merge cheaply. The
+        # job metrics are also kept as running
+        # statistics, which is all that is kept without
+        # keep_jobs, so that a collector merged from any
+        # number of runs stays the same size
+        ################################################
+        # This is the count of every event in METRIC_COUNTERS
+        self.counts = np.zeros( len( METRIC_COUNTERS ), dtype=np.int64 )
+
+        # This is the position of every counter in the counts
+        self._counter_index = { name : i for i, name in enumerate( METRIC_COUNTERS ) }
+
+        # This is the number of jobs that have been recorded
+        self._num_jobs : int = 0
+
+        # This is whether the job columns are kept
+        self.keep_jobs : bool = keep_jobs
+
+        # These are the running statistics and histograms of every job
+        # column, in the order of JOB_METRIC_COLUMNS
+        self.job_stats = OnlineStatistics( len( JOB_METRIC_COLUMNS ), JOB_METRIC_BINS )
+
+        # Create one buffer for every job column
+        for column, dtype in JOB_METRIC_COLUMNS.items():
+            setattr( self, '_' + column, np.zeros( max( capacity, 1 ) if keep_jobs else 0, dtype=dtype ) )
+
+    # This function adds to the count of an event
+    def count( self, name : str, amount : int = 1 ) -> None:
+        self.counts[ self._counter_index[ name ] ] += amount
+
+    # This function gets the count of an event
+    def get_count( self, name : str ) -> int:
+        return self.counts.item( self._counter_index[ name ] )
+
+    # This function makes room for the given number of jobs
+    def _reserve( self, num_of_jobs : int ) -> None:
+        capacity = len( self._priority )
+        if self._num_jobs + num_of_jobs <= capacity:
+            return
+
+        while capacity < self._num_jobs + num_of_jobs:
+            capacity *= 2
+
+        for column in JOB_METRIC_COLUMNS:
+            old = getattr( self, '_' + column )
+            new = np.zeros( capacity, dtype=old.dtype )
+            new[ :self._num_jobs ] = old[ :self._num_jobs ]
+            setattr( self, '_' + column, new )
+
+    # This function records the metrics of finished jobs. Every
+    # argument is an array with one entry per job
+    def record_jobs( self, priority, orig_runtime, active_running_time ) -> None:
+        self.job_stats.add_many( np.column_stack( ( priority, orig_runtime, active_running_time ) ) )
+        self._store_jobs( priority, orig_runtime, active_running_time )
+
+    # This function stores the job columns of finished jobs, if they
+    # are kept
+    def _store_jobs( self, priority, orig_runtime, active_running_time ) -> None:
+        num_of_jobs = len( priority )
+
+        if self.keep_jobs:
+            self._reserve( num_of_jobs )
+
+            end = self._num_jobs + num_of_jobs
+            self._priority[ self._num_jobs:end ] = priority
+            self._orig_runtime[ self._num_jobs:end ] = orig_runtime
+            self._active_running_time[ self._num_jobs:end ] = active_running_time
+
+        self._num_jobs += num_of_jobs
+
+    # This function gets a recorded job column
+    def get_job_column( self, column : str ) -> np.ndarray:
+        if not self.keep_jobs:
+            raise ValueError( 'Job columns were not kept' )
+
+        return getattr( self, '_' + column )[ :self._num_jobs ]
+
+    # This function stops keeping the job columns and frees them. The
+    # running statistics of the jobs are kept
+    def drop_jobs( self ) -> "MetricsCollector":
+        self.keep_jobs = False
+
+        for column, dtype in JOB_METRIC_COLUMNS.items():
+            setattr( self, '_' + column, np.zeros( 0, dtype=dtype ) )
+
+        return self
+
+    # This function gets the number of jobs that have been recorded
+    def get_num_jobs( self ) -> int:
+        return self._num_jobs
+
+    # This function adds the metrics of another collector to this one.
+    # The job columns can only be kept if the other collector kept them
+    def merge( self, other : "MetricsCollector" ) -> "MetricsCollector":
+        self.counts += other.counts
+        self.job_stats.merge( other.job_stats )
+
+        if self.keep_jobs:
+            self._store_jobs( *( other.get_job_column( column ) for column in JOB_METRIC_COLUMNS ) )
+        else:
+            self._num_jobs += other.get_num_jobs()
+
+        return self
@@ -0,0 +1,212 @@
+import numpy as np
+
+class StreamingHistogram:
+    def __init__( self, num_of_bins : int = 1024, bin_width : float = 2.0 ** -10 ):
+        ################################################
+        # The following is a histogram with a fixed
+        # number of equal width bins. Whenever the values
+        # do not fit, neighbouring bins are combined and
+        # the width doubles. Bin i covers the values from
+        # i * width up to ( i + 1 ) * width, so two
+        # histograms that start from the same width can
+        # always be merged
+        ################################################
+        # This is the number of bins in the histogram
+        self._num_of_bins : int = num_of_bins
+
+        # This is the width of every bin
+        self._bin_width : float = bin_width
+
+        # This is the index of the first bin in the counts
+        self._offset : int = 0
+
+        # This is the number of values in every bin
+        self.counts = np.zeros( num_of_bins, dtype=np.int64 )
+
+        # This is the number of values in the histogram
+        self._total : int = 0
+
+    # This function combines every pair of neighbouring bins, which
+    # doubles the width of the bins
+    def _coarsen( self ) -> None:
+        indices = np.arange( self._num_of_bins, dtype=np.int64 ) + self._offset
+        new_offset = self._offset >> 1
+        self.counts = np.bincount( ( indices >> 1 ) - new_offset, weights=self.counts, minlength=self._num_of_bins ).astype( np.int64 )
+        self._offset = new_offset
+        self._bin_width *= 2
+
+    # This function adds counts to the bins with the given indices
+    # at the given bin width
+    def _add_bins( self, indices, weights, bin_width : float ) -> None:
+        if len( indices ) == 0:
+            return
+
+        # Bring both to the wider of the two bin widths
+        while self._bin_width < bin_width:
+            self._coarsen()
+
+        while bin_width < self._bin_width:
+            indices = indices >> 1
+            bin_width *= 2
+
+        while True:
+            low = indices.min()
+            high = indices.max()
+
+            # Include the bins that are already filled
+            if self._total > 0:
+                filled = np.flatnonzero( self.counts )
+                low = min( low, self._offset + filled[ 0 ] )
+                high = max( high, self._offset + filled[ -1 ] )
+
+            if high - low < self._num_of_bins:
+                break
+
+            # The values do not fit, so double the width of the bins
+            self._coarsen()
+            indices = indices >> 1
+
+        # Move the counts so that the lowest bin is the first bin
+        if self._total == 0:
+            self._offset = int( low )
+        elif low < self._offset:
+            shift = int( self._offset - low )
+            self.counts = np.concatenate( ( np.zeros( shift, dtype=np.int64 ), self.counts[ :self._num_of_bins - shift ] ) )
+            self._offset = int( low )
+        elif high >= self._offset + self._num_of_bins:
+            shift = int( high - self._offset - self._num_of_bins + 1 )
+            self.counts = np.concatenate( ( self.counts[ shift: ], np.zeros( shift, dtype=np.int64 ) ) )
+            self._offset += shift
+
+        self.counts += np.bincount( indices - self._offset, weights=weights, minlength=self._num_of_bins ).astype( np.int64 )
+        self._total += int( np.sum( weights ) )
+
+    # This function adds values to the histogram
+    def add( self, values ) -> None:
+        values = np.atleast_1d( np.asarray( values, dtype=np.float64 ) )
+        indices = np.floor( values / self._bin_width ).astype( np.int64 )
+        self._add_bins( indices, np.ones( len( indices ), dtype=np.int64 ), self._bin_width )
+
+    # This function adds the counts of another histogram to this one
+    def merge( self, other : "StreamingHistogram" ) -> "StreamingHistogram":
+        filled = np.flatnonzero( other.counts )
+        self._add_bins( filled + other._offset, other.counts[ filled ], other._bin_width )
+        return self
+
+    # This function gets the edges and counts of the filled range of
+    # the histogram
+    def get_bins( self ):
+        filled = np.flatnonzero( self.counts )
+        if len( filled ) == 0:
+            return np.zeros( 1 ), np.zeros( 0, dtype=np.int64 )
+
+        counts = self.counts[ filled[ 0 ]:filled[ -1 ] + 1 ]
+        edges = ( self._offset + filled[ 0 ] + np.arange( len( counts ) + 1 ) ) * self._bin_width
+        return edges, counts
+
+    # This function estimates the value below which the given fraction
+    # of the values fall, by interpolating within the bins
+    def quantile( self, q : float ) -> float:
+        edges, counts = self.get_bins()
+        if len( counts ) == 0:
+            return np.nan
+
+        cumulative = np.concatenate( ( [ 0 ], np.cumsum( counts ) ) ) / self._total
+        return float( np.interp( q, cumulative, edges ) )
+
+    # This function gets the number of values in the histogram
+    def __len__( self ):
+        return self._total
+
+class OnlineStatistics:
+    def __init__( self, num_of_metrics : int, num_of_bins : int = 1024 ):
+        ################################################
+        # The following are running statistics of a
+        # fixed number of metrics. The mean and variance
+        # are kept with Welford's algorithm, so the
+        # values themselves are never stored
+        ################################################
+        # This is the number of values of every metric
+        self.count : int = 0
+
+        # This is the running mean of every metric
+        self.mean = np.zeros( num_of_metrics, dtype=np.float64 )
+
+        # This is the running sum of squared differences from the
+        # mean of every metric
+        self._m2 = np.zeros( num_of_metrics, dtype=np.float64 )
+
+        # This is the smallest and largest value of every metric
+        self.min = np.full( num_of_metrics, np.inf, dtype=np.float64 )
+        self.max = np.full( num_of_metrics, -np.inf, dtype=np.float64 )
+
+        # This is the histogram of every metric
+        self.histograms = [ StreamingHistogram( num_of_bins ) for _ in range( num_of_metrics ) ]
+
+    # This function adds one value of every metric
+    def add( self, values ) -> None:
+        values = np.asarray( values, dtype=np.float64 )
+
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * ( values - self.mean )
+
+        self.min = np.minimum( self.min, values )
+        self.max = np.maximum( self.max, values )
+
+        for histogram, value in zip( self.histograms, values ):
+            histogram.add( value )
+
+    # This function adds many values of every metric at once, with one
+    # row of values for every sample
+    def add_many( self, values ) -> None:
+        values = np.asarray( values, dtype=np.float64 ).reshape( -1, len( self.mean ) )
+        if len( values ) == 0:
+            return
+
+        mean = values.mean( axis=0 )
+        self._combine( len( values ), mean, ( ( values - mean ) ** 2 ).sum( axis=0 ) )
+
+        self.min = np.minimum( self.min, values.min( axis=0 ) )
+        self.max = np.maximum( self.max, values.max( axis=0 ) )
+
+        for histogram, column in zip( self.histograms, values.T ):
+            histogram.add( column )
+
+    # This function combines the running mean and squared differences
+    # with those of other values, with the parallel form of Welford's
+    # algorithm
+    def _combine( self, other_count : int, other_mean, other_m2 ) -> None:
+        count = self.count + other_count
+        delta = other_mean - self.mean
+        self._m2 += other_m2 + delta ** 2 * self.count * other_count / count
+        self.mean += delta * other_count / count
+        self.count = count
+
+    # This function adds the statistics of another accumulator to this
+    # one
+    def merge( self, other : "OnlineStatistics" ) -> "OnlineStatistics":
+        if other.count == 0:
+            return self
+
+        self._combine( other.count, other.mean, other._m2 )
+
+        self.min = np.minimum( self.min, other.min )
+        self.max = np.maximum( self.max, other.max )
+
+        for histogram, other_histogram in zip( self.histograms, other.histograms ):
+            histogram.merge( other_histogram )
+
+        return self
+
+    # This function gets the sample variance of every metric
+    def variance( self ) -> np.ndarray:
+        if self.count < 2:
+            return np.full( len( self.mean ), np.nan )
+
+        return self._m2 / ( self.count - 1 )
+
+    # This function estimates the given quantile of every metric
+    def quantile( self, q : float ) -> np.ndarray:
+        return np.array( [ histogram.quantile( q ) for histogram in self.histograms ] )
@@ -0,0 +1,111 @@
+import time
+
+# These are the phases of a timestep that can be profiled, named after
+# the scheduler callbacks that run them
+PROFILE_PHASES = ( 'new_job', 'reschedule', 'current_timestamp' )
+
+# This is the number of buckets in every latency histogram. Bucket b
+# holds the calls that took from 2 ** ( b - 1 ) up to 2 ** b
+# nanoseconds, which covers every latency that can be measured
+NUM_LATENCY_BUCKETS = 64
+
+class SchedulerProfiler:
+    def __init__( self ):
+        ################################################
+        # The following is the time spent in every phase
+        # of a timestep. Calls are timed in nanoseconds
+        # and their latencies are kept in power of two
+        # buckets, so timing a call costs a few integer
+        # operations
+        ################################################
+        # This is the total time in nanoseconds spent in every phase
+        self.total_time = { phase : 0 for phase in PROFILE_PHASES }
+
+        # This is the number of calls of every phase
+        self.calls = { phase : 0 for phase in PROFILE_PHASES }
+
+        # This is the latency histogram of every phase
+        self.latency_buckets = { phase : [ 0 ] * NUM_LATENCY_BUCKETS for phase in PROFILE_PHASES }
+
+    # This function wraps a callback so that its calls are timed as
+    # the given phase
+    def wrap( self, phase : str, func ):
+        total_time = self.total_time
+        calls = self.calls
+        buckets = self.latency_buckets[ phase ]
+        perf_counter_ns = time.perf_counter_ns
+
+        def profiled( *args ):
+            start = perf_counter_ns()
+            result = func( *args )
+            elapsed = perf_counter_ns() - start
+
+            total_time[ phase ] += elapsed
+            calls[ phase ] += 1
+            buckets[ min( elapsed.bit_length(), NUM_LATENCY_BUCKETS - 1 ) ] += 1
+            return result
+
+        return profiled
+
+    # This function gets the total time in seconds spent in a phase
+    def get_total_time( self, phase : str ) -> float:
+        return self.total_time[ phase ] / 1e9
+
+    # This function gets the number of calls of a phase
+    def get_calls( self, phase : str ) -> int:
+        return self.calls[ phase ]
+
+    # This function gets the mean time in seconds of a call of a phase
+    def get_mean_time( self, phase : str ) -> float:
+        if self.calls[ phase ] == 0:
+            return 0.0
+
+        return self.get_total_time( phase ) / self.calls[ phase ]
+
+    # This function gets the latency histogram of a phase as the
+    # upper edge of every bucket in seconds along with the number of
+    # calls in the bucket. Empty buckets at either end are left out
+    def get_latency_histogram( self, phase : str ):
+        buckets = self.latency_buckets[ phase ]
+        filled = [ b for b, count in enumerate( buckets ) if count > 0 ]
+
+        if not filled:
+            return [], []
+
+        bucket_range = range( filled[ 0 ], filled[ -1 ] + 1 )
+        return [ 2 ** b / 1e9 for b in bucket_range ], [ buckets[ b ] for b in bucket_range ]
+
+    # This function estimates the latency in seconds below which the
+    # given fraction of the calls of a phase fall
+    def get_latency_quantile( self, phase : str, q : float ) -> float:
+        target = q * self.calls[ phase ]
+        seen = 0
+
+        for b, count in enumerate( self.latency_buckets[ phase ] ):
+            seen += count
+            if count > 0 and seen >= target:
+                return 2 ** b / 1e9
+
+        return 0.0
+
+    # This function gets a summary of every phase that can be saved
+    # as JSON
+    def summary( self ) -> dict:
+        return { phase : { 'time' : self.get_total_time( phase ),
+                           'calls' : self.get_calls( phase ),
+                           'mean' : self.get_mean_time( phase ),
+                           'p50' : self.get_latency_quantile( phase, 0.5 ),
+                           'p99' : self.get_latency_quantile( phase, 0.99 ) }
+                 for phase in PROFILE_PHASES }
+
+    # This function adds the times of another profiler to this one
+    def merge( self, other : "SchedulerProfiler" ) -> "SchedulerProfiler":
+        for phase in PROFILE_PHASES:
+            self.total_time[ phase ] += other.total_time[ phase ]
+            self.calls[ phase ] += other.calls[ phase ]
+
+            buckets = self.latency_buckets[ phase ]
+            for b, count in enumerate( other.latency_buckets[ phase ] ):
+                buckets[ b ] += count
+
+        return self
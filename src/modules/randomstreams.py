@@ -0,0 +1,58 @@
+import numpy as np
+
+# These are the kinds of streams, which keep the streams of job 3 and
+# machine 3 apart
+JOB_STREAM = 0
+MACHINE_STREAM = 1
+
+class RandomStreams:
+    def __init__( self, seed : int ):
+        ################################################
+        # The following hands out an independent random
+        # number generator for every job and for every
+        # machine, all derived from one seed. The stream
+        # of a job only depends on the seed and the id of
+        # the job, not on when or by which algorithm it
+        # is asked for, so every algorithm that runs the
+        # same jobs with the same seed sees the same
+        # random numbers for every job
+        ################################################
+        # This is the entropy of the seed that every stream is spawned from
+        self._entropy = np.random.SeedSequence( seed ).entropy
+
+        # These are the generators that have been created so far
+        self._job_streams = {}
+        self._machine_streams = {}
+
+    # This function creates the generator of a stream. The spawn key
+    # places it in the same tree of streams as SeedSequence.spawn
+    def _create_stream( self, kind : int, index : int ) -> np.random.Generator:
+        return np.random.Generator( np.random.PCG64( np.random.SeedSequence( self._entropy, spawn_key=( kind, index ) ) ) )
+
+    # This function gets the generator of a job
+    def job_stream( self, job_id : int ) -> np.random.Generator:
+        stream = self._job_streams.get( job_id )
+
+        if stream is None:
+            stream = self._job_streams[ job_id ] = self._create_stream( JOB_STREAM, job_id )
+
+        return stream
+
+    # This function gets the generator of a machine
+    def machine_stream( self, machine_id : int ) -> np.random.Generator:
+        stream = self._machine_streams.get( machine_id )
+
+        if stream is None:
+            stream = self._machine_streams[ machine_id ] = self._create_stream( MACHINE_STREAM, machine_id )
+
+        return stream
+
+    # This function draws num_of_draws uniform numbers from the stream of
+    # every one of the given machines, with one row for every machine
+    def machine_draws( self, machine_ids, num_of_draws : int ) -> np.ndarray:
+        draws = np.empty( ( len( machine_ids ), num_of_draws ), dtype=np.float64 )
+
+        for i, machine_id in enumerate( machine_ids ):
+            draws[ i ] = self.machine_stream( machine_id ).random( num_of_draws )
+
+        return draws
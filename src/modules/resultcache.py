@@ -0,0 +1,130 @@
+import hashlib
+import os
+import pickle
+
+class ResultCache:
+    def __init__( self, path, max_bytes : int = 1 << 30 ):
+        ################################################
+        # The following is a cache of results on disk.
+        # Every result is stored in its own file named
+        # after the hash of its key, so the same inputs
+        # always find the same file. A hit touches the
+        # file, and once the cache grows past max_bytes
+        # the files that were used the longest time ago
+        # are removed. Files are written to a temporary
+        # name first and then renamed, so processes can
+        # share a cache without reading partial results
+        ################################################
+        # This is the directory the results are stored in
+        self.path = path
+
+        # This is the size the cache is kept under
+        self.max_bytes : int = max_bytes
+
+        # This is how many bytes this process has written since it last
+        # checked the size of the cache
+        self._bytes_since_check : int = 0
+
+        # These are the lookups of this process that found a result and
+        # that did not
+        self.hits : int = 0
+        self.misses : int = 0
+
+        os.makedirs( path, exist_ok=True )
+
+    # This function hashes the parts of a key into a hex digest. Parts
+    # are bytes or are turned into strings
+    @staticmethod
+    def make_key( *parts ) -> str:
+        digest = hashlib.sha256()
+
+        for part in parts:
+            data = part if isinstance( part, bytes ) else repr( part ).encode()
+
+            # Prefix every part with its length so parts can not run together
+            digest.update( len( data ).to_bytes( 8, 'little' ) )
+            digest.update( data )
+
+        return digest.hexdigest()
+
+    # This function gets the file of a key
+    def _file( self, key : str ) -> str:
+        return os.path.join( self.path, key + '.pkl' )
+
+    # This function gets the result stored for a key, or None if there
+    # is none
+    def get( self, key : str ):
+        path = self._file( key )
+
+        try:
+            with open( path, 'rb' ) as f:
+                result = pickle.load( f )
+
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Mark the result as used so that it is evicted last
+        try:
+            os.utime( path )
+        except FileNotFoundError:
+            pass
+
+        self.hits += 1
+        return result
+
+    # This function stores the result of a key
+    def put( self, key : str, result ) -> None:
+        path = self._file( key )
+        temp_path = f'{path}.{os.getpid()}.tmp'
+
+        with open( temp_path, 'wb' ) as f:
+            pickle.dump( result, f, protocol=pickle.HIGHEST_PROTOCOL )
+            size = f.tell()
+
+        os.replace( temp_path, path )
+
+        # Only look at the whole cache once enough has been written for
+        # it to have grown noticeably
+        self._bytes_since_check += size
+        if self._bytes_since_check >= self.max_bytes // 16:
+            self.evict()
+
+    # This function removes the least recently used results until the
+    # cache is under its size. Returns the number of results removed
+    def evict( self ) -> int:
+        self._bytes_since_check = 0
+
+        files = []
+        with os.scandir( self.path ) as entries:
+            for entry in entries:
+                if entry.name.endswith( '.pkl' ):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append( ( stat.st_mtime, stat.st_size, entry.path ) )
+
+        total_bytes = sum( size for _, size, _ in files )
+        num_removed = 0
+
+        # Remove the results that were used the longest time ago first
+        files.sort()
+        for _, size, path in files:
+            if total_bytes <= self.max_bytes:
+                break
+
+            try:
+                os.remove( path )
+                num_removed += 1
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= size
+
+        return num_removed
+
+    # This function gets the total size of the results in the cache
+    def get_size( self ) -> int:
+        with os.scandir( self.path ) as entries:
+            return sum( entry.stat().st_size for entry in entries if entry.name.endswith( '.pkl' ) )
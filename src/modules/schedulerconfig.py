@@ -0,0 +1,53 @@
+from dataclasses import dataclass, asdict, replace
+
+@dataclass( frozen = True )
+class SchedulerConfig:
+    ################################################
+    # The following are the constants that the
+    # algorithms run with. A config can not be
+    # changed once it is made, so one config can be
+    # shared by every scheduler and callback of a
+    # run. Use with_changes to get a config that
+    # differs in some of its constants
+    ################################################
+    # This is the mean time between the errors of a job
+    mew : float = 3
+
+    # This is the overhead of taking a checkpoint
+    checkpointing_overhead : float = 0.1
+
+    # This is the overhead of migrating a job to a different processor
+    migration_overhead : float = 0.3
+
+    # This is the overhead of recovering from an error
+    recovery_overhead : float = 0.3
+
+    # This is the rate of errors per unit of running time. When it is
+    # not given it is 1 / mew
+    failure_rate : float = None
+
+    # This is the checkpointing period for when a machine should
+    # trigger a checkpoint. When it is not given it is the optimal
+    # period for mew and the checkpointing overhead
+    period : float = None
+
+    # This function gets the rate of errors per unit of running time
+    def get_failure_rate( self ) -> float:
+        return 1 / self.mew if self.failure_rate is None else self.failure_rate
+
+    # This function gets the checkpointing period
+    def get_period( self ) -> float:
+        return ( 2 * self.mew * self.checkpointing_overhead ) ** (0.5) if self.period is None else self.period
+
+    # This function gets a copy of the config with some of its
+    # constants changed
+    def with_changes( self, **changes ) -> "SchedulerConfig":
+        return replace( self, **changes )
+
+    # This function gets the constants of the config as a dictionary,
+    # along with the failure rate and period that are used
+    def as_dict( self ) -> dict:
+        return asdict( self ) | { 'failure_rate' : self.get_failure_rate(), 'period' : self.get_period() }
+
+# This is the config that is used when a scheduler is not given one
+DEFAULT_CONFIG = SchedulerConfig()
@@ -0,0 +1,139 @@
+from collections import deque
+import heapq
+import random
+
+################################################
+# The following are the task queues that the
+# global scheduler can keep its waiting jobs in.
+# Every queue supports push, pop, peek and len so
+# the algorithms can swap them out freely
+################################################
+
+class FifoTaskQueue:
+    def __init__( self ):
+        # These are the waiting jobs in the order they arrived
+        self._jobs = deque()
+
+    # This function adds a job to the back of the queue
+    def push( self, job ) -> None:
+        self._jobs.append( job )
+
+    # This function removes the job at the front of the queue
+    def pop( self ):
+        return self._jobs.popleft()
+
+    # This function returns the job at the front of the queue
+    # without removing it
+    def peek( self ):
+        return self._jobs[ 0 ]
+
+    def __len__( self ):
+        return len( self._jobs )
+
+    def __iter__( self ):
+        return iter( self._jobs )
+
+class HeapTaskQueue:
+    def __init__( self, key_func ):
+        # This function returns the sort key tuple of a job. The
+        # job with the largest key is popped first
+        self._key_func = key_func
+
+        # This is a binary heap of ( negated key, arrival number, job ).
+        # The key is negated so the largest key is on top of the heap
+        # and the arrival number keeps jobs with equal keys in the
+        # order they were pushed
+        self._heap = []
+
+        # This is the number of jobs that have ever been ordered
+        self._num_pushed = 0
+
+        # These are jobs that were added to the back of the queue
+        # without being ordered. They are only handed out once the
+        # heap is empty, and are ordered on the next push
+        self._unordered = deque()
+
+    # This function moves the unordered jobs into the heap
+    def _order_unordered( self ) -> None:
+        while len( self._unordered ) > 0:
+            job = self._unordered.popleft()
+            key = tuple( -value for value in self._key_func( job ) )
+            heapq.heappush( self._heap, ( key, self._num_pushed, job ) )
+            self._num_pushed += 1
+
+    # This function adds a job to the queue. The key of the job is
+    # computed once here instead of on every comparison
+    def push( self, job ) -> None:
+        self._unordered.append( job )
+        self._order_unordered()
+
+    # This function adds a job to the back of the queue without
+    # ordering it, the same way appending to a sorted list would
+    def push_unordered( self, job ) -> None:
+        self._unordered.append( job )
+
+    # This function removes the job with the largest key
+    def pop( self ):
+        if len( self._heap ) == 0:
+            return self._unordered.popleft()
+
+        return heapq.heappop( self._heap )[ 2 ]
+
+    # This function returns the job with the largest key without
+    # removing it
+    def peek( self ):
+        if len( self._heap ) == 0:
+            return self._unordered[ 0 ]
+
+        return self._heap[ 0 ][ 2 ]
+
+    def __len__( self ):
+        return len( self._heap ) + len( self._unordered )
+
+    # This iterates over the ordered jobs from the largest key to
+    # the smallest key, followed by the unordered jobs
+    def __iter__( self ):
+        for entry in sorted( self._heap ):
+            yield entry[ 2 ]
+
+        yield from self._unordered
+
+class RandomTaskQueue:
+    def __init__( self ):
+        # These are the waiting jobs in no particular order
+        self._jobs = []
+
+        # This is the position of the job that will be popped next.
+        # It is drawn once so that peek and pop agree
+        self._next_position = None
+
+    # This function adds a job to the queue
+    def push( self, job ) -> None:
+        self._jobs.append( job )
+        self._next_position = None
+
+    # This function draws the position of the next job to pop
+    def _draw_next_position( self ) -> int:
+        if self._next_position is None:
+            self._next_position = random.randrange( len( self._jobs ) )
+
+        return self._next_position
+
+    # This function removes a uniformly random job by swapping it
+    # with the last job, so the removal is O(1)
+    def pop( self ):
+        position = self._draw_next_position()
+        self._next_position = None
+
+        self._jobs[ position ], self._jobs[ -1 ] = self._jobs[ -1 ], self._jobs[ position ]
+        return self._jobs.pop()
+
+    # This function returns the job that will be popped next
+    def peek( self ):
+        return self._jobs[ self._draw_next_position() ]
+
+    def __len__( self ):
+        return len( self._jobs )
+
+    def __iter__( self ):
+        return iter( self._jobs )
@@ -1,33 +1,34 @@
 from modules.job import Job
+from modules.jobstrategy import JobStrategy
 from modules.globalscheduler import GlobalScheduler
 from modules.machine import Machine
+from modules.taskqueue import RandomTaskQueue
+from modules.machineprogression import advance_machines
+from modules.schedulerconfig import SchedulerConfig, DEFAULT_CONFIG
+import numpy as np
 import random
 import math
 
-# Define the rate of errors in the scheduler
-MEW = 3
-LAMBDA = 1 / MEW
-
-# Define the checkpointing overhead
-CHECKPOINTING_OVERHEAD = 0.1
-
-# Define the migration overhead for when jobs are
-# migrated to a different processor
-MIGRATION_OVERHEAD = 0.3
-
-# Define the error recovery overhead
-RECOVERY_OVERHEAD = 0.3
-
-# Define the checkpointing period for when a machine
-# should trigger a checkpoint
-PERIOD = ( 2 * MEW * CHECKPOINTING_OVERHEAD ) ** (0.5)
+# These are the constants of the algorithm when the scheduler is
+# not given a config. The callbacks read the constants from the
+# config of the scheduler they run in
+MEW = DEFAULT_CONFIG.mew
+LAMBDA = DEFAULT_CONFIG.get_failure_rate()
+CHECKPOINTING_OVERHEAD = DEFAULT_CONFIG.checkpointing_overhead
+MIGRATION_OVERHEAD = DEFAULT_CONFIG.migration_overhead
+RECOVERY_OVERHEAD = DEFAULT_CONFIG.recovery_overhead
+PERIOD = DEFAULT_CONFIG.get_period()
 
 # This function defines the liklehood of an error
 # within the context of the job and the current
-# timestamp
-def job_error_func( job : Job, current_timestamp ):
+# timestamp. A uniform draw from a random stream
+# decides the error instead of the random module
+def job_error_func( job : Job, current_timestamp, draw = None ):
     # The error has a 50/50 chance of occurring
-    return random.choice([ True, False ])
+    if draw is None:
+        return random.choice([ True, False ])
+
+    return draw < 0.5
 
 # This function compares two jobs against eachother
 def job_comparison_func( job1 : Job, job2 : Job ):
@@ -35,12 +36,22 @@ def job_comparison_func( job1 : Job, job2 : Job ):
     # higher priority or not
     return random.choice([ -1, 0 , 1 ])
 
+# This function creates the strategy shared by every job of this
+# algorithm. Errors are drawn with job_error_func, so the strategy
+# is the same for every config
+def job_strategy( config : SchedulerConfig ):
+    return JobStrategy( job_comparison_func, job_error_func )
+
+# This is the strategy of the jobs when the scheduler is not given
+# a config
+JOB_STRATEGY = job_strategy( DEFAULT_CONFIG )
+
 # This function determines the behavior of a machine
 # that is progressing in the current machine
 def machine_progression_func( machine : Machine, current_timestamp, progression_amount ):
     # Remove any floating point errors in the lock time
-    if machine._lock_time < 0.000001:
-        machine._lock_time = 0
+    if machine.get_lock_time() < 0.000001:
+        machine.set_lock_time( 0 )
 
     # Check to see if the machine is free
     if machine.is_machine_free():
@@ -53,32 +64,30 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
         # job on the machine
         curr_job = machine.get_curr_job()
 
-        # While the current timestamp is later than the next expected time
-        # the machine is supposed to checkpoint, do the following
-        while( current_timestamp >= machine.get_checkpoint_time() ):
-            # Set the current job's checkpoint time to the current
-            # check point for the machine 
-            curr_job.set_last_checkpoint_time( machine.get_checkpoint_time() )
+        # Move the machine's checkpointing time past the current timestamp,
+        # counting every checkpoint boundary that the machine has passed
+        num_checkpoints, last_checkpoint_time = machine.catch_up_checkpoint_time( current_timestamp )
 
-            # Increment the machine's checkpointing time to the next
-            # time to checkpoint
-            machine.progress_checkpoint_time()
+        if num_checkpoints > 0:
+            # Set the current job's checkpoint time to the last
+            # check point for the machine 
+            curr_job.set_last_checkpoint_time( last_checkpoint_time )
 
         # Check to see if we can potentially remove the lock
         # on the machine and progress the job as well
-        if( progression_amount > machine._lock_time ):
+        if( progression_amount > machine.get_lock_time() ):
             # Locally store the original lock time
-            orig_lock_time = machine._lock_time
+            orig_lock_time = machine.get_lock_time()
 
             # Indicate that the current job was waiting for at
             # least lock time units of time
-            curr_job.add_waiting_time( machine._lock_time )
+            curr_job.add_waiting_time( machine.get_lock_time() )
 
             # Attempt to progress on the remaining units of progression
-            ret = curr_job.progress( current_timestamp, progression_amount - machine._lock_time )
+            ret = curr_job.progress( current_timestamp, progression_amount - machine.get_lock_time(), machine.get_stream() )
 
             # Indicate that the machine is no longer locked
-            machine._lock_time = 0
+            machine.set_lock_time( 0 )
 
             # Indicate that this progreession was active progression
             # for the lock time + any prgression made on the job
@@ -88,12 +97,12 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
             # In the case that this machine has locked for more than the progression
             # that we have available, just reduce the lock time. We have this check
             # to account for floating point errors
-            if math.isclose( machine._lock_time, progression_amount , rel_tol=1e-9 ):
-                progression_amount = machine._lock_time
-                machine._lock_time = 0
+            if math.isclose( machine.get_lock_time(), progression_amount , rel_tol=1e-9 ):
+                progression_amount = machine.get_lock_time()
+                machine.set_lock_time( 0 )
 
             else:
-                machine._lock_time -= progression_amount
+                machine.set_lock_time( machine.get_lock_time() - progression_amount )
 
             # Indicate that the job was waiting for the progression
             # amount
@@ -108,12 +117,18 @@ def machine_progression_func( machine : Machine, current_timestamp, progression_
 def machine_checkpointing_func( machine : Machine ):
     pass
 
+# This function creates the queue that the scheduler keeps
+# waiting jobs in
+def task_queue_func():
+    # Every pop hands out a uniformly random waiting job, which is
+    # the same as shuffling the queue on every new job
+    return RandomTaskQueue()
+
 # This function adds new jobs to the scheduler
 def new_job_func( scheduler : GlobalScheduler, job : Job ):
-    # Just add the job to the end of the queue and shuffle
-    # it for randomness
-    scheduler.task_queue.append( job )
-    random.shuffle( scheduler.task_queue )
+    # Just add the job to the queue, the queue itself takes
+    # care of the randomness
+    scheduler.task_queue.push( job )
 
 # This function defines the rescheduling behavior for
 # this algorithm
@@ -123,63 +138,40 @@ def reschedule_func( scheduler : GlobalScheduler ):
     if len( scheduler.task_queue ) == 0:
         return
 
-    # For every machine that is in the scheduler, do the following
-    for machine in scheduler.machines:
-        # If the machine is free and is not locked, schedule the new job
-        if machine.is_machine_free() and machine.get_lock_time() < 0.000001 and len( scheduler.task_queue ) > 0:
-            machine._lock_time = 0
-            new_job = scheduler.task_queue.pop( 0 )
-            new_job.set_first_schedule_time( scheduler._current_timestamp )
-            machine.set_curr_job( new_job )
+    # While there is a free machine that is not locked and a job
+    # to schedule, place the next job on the free machine with the
+    # lowest id
+    while scheduler.has_free_machine() and len( scheduler.task_queue ) > 0:
+        machine = scheduler.get_free_machine()
+        machine.set_lock_time( 0 )
+        new_job = scheduler.task_queue.pop()
+        new_job.set_first_schedule_time( scheduler._current_timestamp )
+        machine.set_curr_job( new_job )
+
+        if scheduler.events is not None:
+            scheduler.events.record( 'schedule', machine.get_id(), new_job.get_id() )
+
+# This function gives the probability of an error for every
+# running job. The error has a 50/50 chance of occurring
+def job_error_probabilities( current_timestamp, last_checkpoint_times ):
+    return np.full( len( last_checkpoint_times ), 0.5 )
+
+# This function determines how a machine recovers a job that
+# ran into an error after progression_time units of progress
+def job_recovery_func( scheduler : GlobalScheduler, machine : Machine, job : Job, progression_time ):
+    # Count the error in the metrics of the run
+    scheduler.metrics.count( 'errors' )
+
+    # Add lock for recovery and restart the job. The error event
+    # already records the lock
+    machine.add_lock_time( scheduler.config.recovery_overhead, record_event=False )
+    job.restart_job()
+
+    # Indicate when the job was last checkpointed
+    job.set_last_checkpoint_time( scheduler._current_timestamp + progression_time )
 
 # This function determines the behavior of the scheduler during the current timestamp
 def curr_timestamp_func( scheduler : GlobalScheduler ):
-    # First initalize the progress map to indicate that every machine
-    # can make 1 unit of progress
-    total_progress_map = [ [ machine.get_id(), 1 ] for machine in scheduler.machines ]
-
-    # The following code will be executed while there is atleast 1 machine
-    # who can make some progress
-    while any( [ progress[ 1 ] != 0 for progress in total_progress_map ] ):
-        # Get every progress from our progress map
-        for progress in total_progress_map:
-            # Get the associated machine for this computation
-            curr_machine = scheduler.machines[ progress[ 0 ] ]
-            
-            # If the machine can't make progress or if the machine has
-            # no job, indicate that the machine is waiting
-            if progress[ 1 ] == 0 or curr_machine.get_curr_job() is None:
-                curr_machine.add_waiting_time( progress[ 1 ] )
-                progress[ 1 ] = 0
-                continue
-            
-            # Progress the machine for progression time units
-            ret = curr_machine.progress( scheduler._current_timestamp, progress[ 1 ] )
-
-            # Get the current job on the machine
-            curr_job = curr_machine.get_curr_job()
-            
-
-            if curr_job.is_job_complete():
-                # If the job is complete, compute all the relevant statistics and send
-                # the job to the finished jobs queue
-                curr_job.set_completion_time( scheduler._current_timestamp + ret + curr_job.get_waiting_time() )
-                curr_job.add_waiting_time( scheduler._current_timestamp + ret - curr_job.get_release_time() - curr_job.get_job_active_running_time())
-                scheduler.finished_tasks.append( curr_job )
-                curr_machine.set_curr_job( None )
-
-            else:
-                if curr_job.is_in_error():
-                    # If this job is in error, add lock for recovery
-                    curr_machine.add_lock_time( RECOVERY_OVERHEAD )
-                    curr_job.restart_job()
-
-                    # Indicate when the job was last checkpointed
-                    curr_job.set_last_checkpoint_time( scheduler._current_timestamp + ret )
-
-            # Edit the overall progression for this machine
-            progress[ 1 ] -= ret
-        
-        # Sort the machines so that we prioritize machines that
-        # still have more progressions to make
-        total_progress_map.sort( key=lambda x : x[ 1 ], reverse=True )
\ No newline at end of file
+    # Advance every machine by one unit of progress at once. This
+    # algorithm does not lock or store anything on a checkpoint
+    advance_machines( scheduler, job_recovery_func, job_error_probabilities )
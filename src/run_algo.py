@@ -1,49 +1,98 @@
 import random
 from copy import deepcopy
-import statistics
 import math
+import os
+import glob
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+import numpy as np
 
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 #matplotlib.use('TkAgg')
 
 from modules.job import Job
+from modules.jobtable import JobTable, gather_jobs
+from modules.metrics import MetricsCollector
+from modules.onlinestats import OnlineStatistics
 from modules.globalscheduler import GlobalScheduler
 from modules.machine import Machine
+from modules.schedulerconfig import DEFAULT_CONFIG
+from modules.jobstrategy import JobStrategy
+from modules.resultcache import ResultCache
 
 import novelalgo
 import LISTorg
 import randomafscheduler
-from generate_random_jobs import generate_random_jobs, LISTLambdaParams, NovelLambdaParams, RandomAlgoParams
+import generate_random_jobs as generate_random_jobs_module
+from generate_random_jobs import generate_random_jobs, build_jobs, JOB_DTYPE, LISTLambdaParams, NovelLambdaParams, RandomAlgoParams
 
 # Hightest Priority
 HIGHEST_PRIORITY = 10
 
-# Job stats for sym file
-job_stats_a_to_T = []
-job_stats_with_p = []
-
 # Define a set of parameters for machine based on algorithm
 novelalgo_machine_params = [novelalgo.machine_progression_func,
                             novelalgo.machine_checkpointing_func,
                             novelalgo.new_job_func,
                             novelalgo.reschedule_func,
                             novelalgo.curr_timestamp_func,
-                            novelalgo.PERIOD]
+                            novelalgo.PERIOD,
+                            novelalgo.task_queue_func,
+                            novelalgo.victim_key_func,
+                            novelalgo.skip_ticks_func]
 
 list_machine_params = [LISTorg.machine_progression_func,
                       LISTorg.machine_checkpointing_func,
                       LISTorg.new_job_func,
                       LISTorg.reschedule_func,
                       LISTorg.curr_timestamp_func,
-                      LISTorg.PERIOD]
+                      LISTorg.PERIOD,
+                      LISTorg.task_queue_func,
+                      None,
+                      LISTorg.skip_ticks_func]
 
 random_machine_params = [randomafscheduler.machine_progression_func,
                       randomafscheduler.machine_checkpointing_func,
                       randomafscheduler.new_job_func,
                       randomafscheduler.reschedule_func,
                       randomafscheduler.curr_timestamp_func,
-                      randomafscheduler.PERIOD]
+                      randomafscheduler.PERIOD,
+                      randomafscheduler.task_queue_func]
+
+# The module and machine parameters of every algorithm
+ALGORITHM_MODULES = { 'novelalgo' : novelalgo,
+                      'listalgo' : LISTorg,
+                      'randomalgo' : randomafscheduler }
+
+MACHINE_PARAMS = { 'novelalgo' : novelalgo_machine_params,
+                   'listalgo' : list_machine_params,
+                   'randomalgo' : random_machine_params }
+
+# The place of the checkpointing period in the machine parameters
+PERIOD_PARAM = 5
+
+
+# Get the machine parameters of an algorithm, with the checkpointing period of
+# the given config
+def get_machine_params(algorithm, config=DEFAULT_CONFIG):
+    if algorithm not in MACHINE_PARAMS:
+        raise ValueError('Algorithm Not Found')
+
+    machine_params = list(MACHINE_PARAMS[algorithm])
+    machine_params[PERIOD_PARAM] = config.get_period()
+    return machine_params
+
+
+# Get the job parameters of an algorithm for the given config, which are the
+# arguments that build_jobs takes after the workload
+def get_job_params(algorithm, config=DEFAULT_CONFIG):
+    if algorithm not in ALGORITHM_MODULES:
+        raise ValueError('Algorithm Not Found')
+
+    return [ALGORITHM_MODULES[algorithm].job_strategy(config)]
 
 
 # Print a list of jobs
@@ -82,25 +131,33 @@ def graph_averages(algorithm_list, stat_list):
     return plots
 
     
-# Make overlapping normal distributions for statistics
-def graph_distributions(algorithm_list, complete_stat_lists, n_trials):
+# Make overlapping distributions for statistics from the histograms of every algorithm
+def graph_distributions(algorithm_list, online_stat_list, n_trials):
     stat_label_list = ['Average Total Runtime over Area', 'Average Weighted Stretch', 'Average Wait Time']
     plots = []
 
     # Make a histogram for each stat
     for i, stat_label in enumerate(stat_label_list):
         fig = plt.figure()
-        stat_list = []
-        
-        for j, algo in enumerate(algorithm_list):
-            stat_list.append([stat_list[i] for stat_list in complete_stat_lists[j]])
 
-        if stat_label == 'Average Total Runtime over Area':
-            plt.hist(stat_list, 10, label=algorithm_list)
-        elif stat_label == 'Average Weighted Stretch':
-            plt.hist(stat_list, 15, label=algorithm_list)
+        if stat_label == 'Average Weighted Stretch':
+            num_bins = 15
         else:
-            plt.hist(stat_list, 10, label=algorithm_list)
+            num_bins = 10
+
+        # Rebin the histogram of every algorithm into bins spanning all of them
+        low = min(online_stats.min[i] for online_stats in online_stat_list)
+        high = max(online_stats.max[i] for online_stats in online_stat_list)
+        bins = np.linspace(low, high, num_bins + 1) if high > low else num_bins
+
+        centers_list = []
+        counts_list = []
+        for online_stats in online_stat_list:
+            edges, counts = online_stats.histograms[i].get_bins()
+            centers_list.append(np.clip((edges[:-1] + edges[1:]) / 2, low, high))
+            counts_list.append(counts)
+
+        plt.hist(centers_list, bins, weights=counts_list, label=algorithm_list)
             
         plt.title('Comparison of ' + str(n_trials) + ' of ' + stat_label)
         plt.xlabel(stat_label)
@@ -112,26 +169,22 @@ def graph_distributions(algorithm_list, complete_stat_lists, n_trials):
     return plots
                          
 
-# Run a set of jobs once and returns various statistics
-def run_single_set_of_jobs(algorithm, dict_jobs, num_machines, suppress_printing=False):
+# Run a set of jobs once and returns various statistics, along with the
+# metrics collected by the scheduler if return_metrics is set. The algorithm
+# runs with the constants of the given config, and the jobs should have the
+# job strategy of the same config from get_job_params
+def run_single_set_of_jobs(algorithm, dict_jobs, num_machines, suppress_printing=False, event_driven=True, seed=None, return_metrics=False, config=DEFAULT_CONFIG, common_random_numbers=False):
     # Variable decls
     list_jobs = [item for vals in dict_jobs.values() for item in vals]
     list_jobs.sort(key=(lambda x : x.get_id()))
     
     # Make a scheduler based on algorithm
-    scheduler = None
-    if (algorithm == 'novelalgo'):
-        scheduler = GlobalScheduler(num_machines,
-                                    *novelalgo_machine_params)
-        
-    elif (algorithm == 'listalgo'):
-        scheduler = GlobalScheduler(num_machines,
-                                    *list_machine_params)
-    elif (algorithm == 'randomalgo' ):
-        scheduler = GlobalScheduler(num_machines,
-                                    *random_machine_params)
-    else:
-        raise ValueError('Algorithm Not Found')
+    scheduler = GlobalScheduler(num_machines,
+                                *get_machine_params(algorithm, config),
+                                event_driven=event_driven,
+                                seed=seed,
+                                config=config,
+                                common_random_numbers=common_random_numbers)
 
     # Print jobs
     if not suppress_printing:
@@ -169,40 +222,23 @@ def run_single_set_of_jobs(algorithm, dict_jobs, num_machines, suppress_printing
     if not suppress_printing:
         print('\nResulting Job Statistics: ')
 
-    sum_job_length = 0
-    sum_wait_time = 0
-    sum_weighted_stretch = 0
-    sum_ideal_job_length = 0
-    
-    for job in list_jobs:
-        job_id = job.get_id()
-        priority = job.get_priority()
-        release_time = job.get_release_time()
-        runtime = job.get_job_active_running_time()
-        orig_runtime = job.get_orig_runtime()
-        waiting_time = job.get_waiting_time()
-        total_runtime = job.get_completion_time() - release_time
-
-        sum_job_length += total_runtime
-        sum_ideal_job_length += orig_runtime
-        sum_wait_time += waiting_time
-        sum_weighted_stretch += priority * total_runtime / orig_runtime
-
-        global job_stats_a_to_T
-        a = int(orig_runtime / novelalgo.PERIOD)
-        job_stats_a_to_T.append((a, runtime))
-
-        global job_stats_with_p
-        job_stats_with_p.append((a, priority, runtime))
+    # Gather the state of every job as columns, in job id order
+    jobs = gather_jobs(list_jobs)
+    runtime = jobs.active_running_time
+    total_runtime = jobs.completion_time - jobs.release_time
 
-        if not suppress_printing:
-            print(f'Job ({job_id}) p = {priority}, T = {orig_runtime}, r = {release_time}, w = {waiting_time}, rT = { runtime }, r_T = {total_runtime}, s = {runtime / orig_runtime}')
+    # Record the job stats in the metrics of the run
+    scheduler.metrics.record_jobs(jobs.priority, jobs.orig_runtime, runtime)
+
+    if not suppress_printing:
+        for i in range(len(jobs)):
+            print(f'Job ({jobs.job_id[i]}) p = {jobs.priority[i]}, T = {jobs.orig_runtime[i]}, r = {jobs.release_time[i]}, w = {jobs.waiting_time[i]}, rT = { runtime[i] }, r_T = {total_runtime[i]}, s = {runtime[i] / jobs.orig_runtime[i]}')
 
     # Final Statistics
-    num_jobs = len(list_jobs)
-    avg_wait_time = sum_wait_time / num_jobs
-    avg_weighted_stretch = sum_weighted_stretch / num_jobs
-    area = sum_ideal_job_length / len(scheduler.machines)
+    num_jobs = len(jobs)
+    avg_wait_time = float(jobs.waiting_time.sum()) / num_jobs
+    avg_weighted_stretch = float((jobs.priority * total_runtime / jobs.orig_runtime).sum()) / num_jobs
+    area = float(jobs.orig_runtime.sum()) / len(scheduler.machines)
     total_runtime_over_area = total_schedule_runtime / area
 
     if not suppress_printing:
@@ -210,36 +246,202 @@ def run_single_set_of_jobs(algorithm, dict_jobs, num_machines, suppress_printing
         print(f'Average Weighted Stretch: {avg_weighted_stretch}, Average Wait Time: {avg_wait_time}')
         print()
 
+    if return_metrics:
+        return (total_runtime_over_area, avg_weighted_stretch, avg_wait_time), scheduler.metrics
+
     return total_runtime_over_area, avg_weighted_stretch, avg_wait_time
 
 
-# Run job scheduler each time on a list of job dicts and print and graph statistics
-def run_set_of_jobs(algorithm_list, job_list_list, func_arg_list, num_machines, suppress_graphing=True, suppress_printing=False):
-    n = len(job_list_list)
-    stat_dict = { }
-    complete_stat_list = []
-    stat_every_run = []
+# Derive the seed of a single trial from the seed of the whole run
+def trial_seed(seed, algorithm_index, trial_index):
+    return int(np.random.SeedSequence([seed, algorithm_index, trial_index]).generate_state(1, np.uint64)[0])
 
-    # Run suite of jobs n times for each algorithm
-    for i, algorithm in enumerate(algorithm_list):
-        stats = (0, 0, 0)
-        total_stats = []
-        
-        for job_list in job_list_list:
-            job_list = { release_time : [job_lambda(*func_arg_list[i]) for job_lambda in job_lambda_list] for release_time, job_lambda_list in job_list.items() }
-            sing_stats = run_single_set_of_jobs(algorithm, job_list, num_machines, True)
 
-            stats = tuple(x + y for x, y in zip(sing_stats, stats))
-            total_stats.append(sing_stats)
+# Build the jobs of a trial from a workload array and run them once. The
+# trial seeds all of its own random number generators, so it gives the
+# same statistics and metrics no matter which process runs it. Without
+# keep_job_metrics only the counters and job statistics of the metrics are
+# returned, not a column entry for every job
+def run_trial(algorithm, workload, func_args, num_machines, event_driven, seed, config=DEFAULT_CONFIG, common_random_numbers=False, keep_job_metrics=False):
+    random.seed(seed)
 
-        stats = [x / n for x in stats]
-        complete_stat_list.append(stats)
-        stat_every_run.append(total_stats)
+    # Store every job of this set in a single job table
+    job_list = build_jobs(workload, *func_args, JobTable(len(workload)))
+    stats, metrics = run_single_set_of_jobs(algorithm, job_list, num_machines, True, event_driven, seed, return_metrics=True, config=config, common_random_numbers=common_random_numbers)
 
-        variance_list = list(map(statistics.variance, [total_stats[i] for i in range(len(stats))]))
+    if not keep_job_metrics:
+        metrics.drop_jobs()
+
+    return stats, metrics
+
+
+# Change this whenever run_single_set_of_jobs computes its statistics differently, so
+# that results cached before the change are not used
+RESULT_VERSION = 1
+
+# This is the directory that trials run from the command line are cached in
+RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.result_cache')
+
+
+# Hash the source of an algorithm along with the source of the scheduler modules and
+# of build_jobs, which is everything that the result of a trial depends on. Results
+# cached with different code have different keys
+@lru_cache
+def code_version(algorithm):
+    modules_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+    paths = [ALGORITHM_MODULES[algorithm].__file__, generate_random_jobs_module.__file__, *sorted(glob.glob(os.path.join(modules_dir, '*.py')))]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+# Hash every field of a workload array. Workloads with the same jobs hash the same
+# however they are stored, including views of a workload file
+def workload_digest(workload):
+    digest = hashlib.sha256()
+    for field in JOB_DTYPE.names:
+        digest.update(np.ascontiguousarray(workload[field], dtype=JOB_DTYPE[field]).tobytes())
+
+    return digest.hexdigest()
+
+
+# Describe a function argument of a trial by value. Functions are described by their
+# names, and job strategies by their functions and failure rate
+def describe_func_arg(arg):
+    if isinstance(arg, JobStrategy):
+        return tuple(describe_func_arg(getattr(arg, name)) for name in JobStrategy.__slots__)
+
+    if callable(arg):
+        return f'{arg.__module__}.{arg.__qualname__}'
+
+    return arg
+
+
+# Get the key of a trial in a result cache. The key covers everything that the
+# result of run_trial depends on
+def trial_key(algorithm, workload, func_args, num_machines, event_driven, seed, config=DEFAULT_CONFIG, common_random_numbers=False, keep_job_metrics=False):
+    return ResultCache.make_key(RESULT_VERSION,
+                                algorithm,
+                                code_version(algorithm),
+                                workload_digest(workload),
+                                [describe_func_arg(arg) for arg in func_args],
+                                num_machines,
+                                event_driven,
+                                seed,
+                                sorted(config.as_dict().items()),
+                                common_random_numbers,
+                                keep_job_metrics)
+
+
+# Run a trial through a result cache. A trial that was run before with the same
+# inputs and code is read from the cache instead of being simulated
+def run_cached_trial(cache, *trial):
+    key = trial_key(*trial)
+
+    result = cache.get(key)
+    if result is None:
+        result = run_trial(*trial)
+        cache.put(key, result)
+
+    return result
+
+
+# Map a function over keyed argument tuples on a pool of processes. Only a bounded
+# number of calls are in flight at once, and the keyed results come back in order
+def map_bounded(executor, func, keyed_args, max_in_flight):
+    futures = deque()
+
+    for key, args in keyed_args:
+        futures.append((key, executor.submit(func, *args)))
+
+        if len(futures) >= max_in_flight:
+            key, future = futures.popleft()
+            yield key, future.result()
+
+    while futures:
+        key, future = futures.popleft()
+        yield key, future.result()
+
+
+# Run job scheduler each time on a list of workloads and print and graph statistics.
+# The workloads are arrays from generate_random_jobs, and may come from any iterable,
+# such as a generator or a WorkloadFile. The workloads of a WorkloadFile are sent to
+# worker processes as their place in the file, and are read from the shared map. The
+# statistics of every algorithm are kept as running totals and histograms, and only
+# the counters and job statistics of its metrics are merged, so the memory used
+# does not grow with the number of trials. With keep_job_metrics the metrics also
+# keep every job of every trial, which does. With more than one worker,
+# the trials are spread over a pool of processes and give the same statistics as
+# running them one after another. A num_workers of None uses every core. Every
+# algorithm runs with the constants of the given config, and its function arguments
+# should come from get_job_params for the same config. With a ResultCache, trials
+# that were run before with the same seed are read from the cache instead of being
+# simulated. Trials can only be found again when the seed of the run is given.
+# With common_random_numbers every algorithm runs a set of jobs with the same seed,
+# and every job and machine draws from its own random stream, so the algorithms see
+# the same failures on the same jobs. The difference between every algorithm and the
+# first one is kept trial by trial, and is far less noisy than the difference of
+# their averages when the algorithms see the same failures.
+# Returns the metrics of every algorithm merged over all of its trials
+def run_set_of_jobs(algorithm_list, job_list_list, func_arg_list, num_machines, suppress_graphing=True, suppress_printing=False, event_driven=True, num_workers=1, seed=None, config=DEFAULT_CONFIG, cache=None, common_random_numbers=False, keep_job_metrics=False):
+    online_stat_list = [OnlineStatistics(3) for _ in algorithm_list]
+    paired_stat_list = [OnlineStatistics(3) for _ in algorithm_list]
+    metrics_list = [MetricsCollector(keep_jobs=keep_job_metrics) for _ in algorithm_list]
+
+    # Every trial gets its own seed derived from the seed of the run. With common
+    # random numbers the seed of a trial is shared by every algorithm
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    # Run every algorithm on each set of jobs in turn
+    trials = ((i, (algorithm, job_list, func_arg_list[i], num_machines, event_driven, trial_seed(seed, 0 if common_random_numbers else i, j), config, common_random_numbers, keep_job_metrics))
+              for j, job_list in enumerate(job_list_list)
+              for i, algorithm in enumerate(algorithm_list))
+
+    # These are the statistics of the first algorithm on the current set of jobs,
+    # which the other algorithms are paired with
+    first_stats = None
+
+    # Add the results of a trial to the statistics of its algorithm. The trials of
+    # a set of jobs arrive in the order of the algorithms
+    def add_trial(i, sing_stats, sing_metrics):
+        nonlocal first_stats
+
+        online_stat_list[i].add(sing_stats)
+        metrics_list[i].merge(sing_metrics)
+
+        if i == 0:
+            first_stats = sing_stats
+        else:
+            paired_stat_list[i].add([stat - first_stat for stat, first_stat in zip(sing_stats, first_stats)])
+
+    # Run the trials through the cache if there is one
+    trial_func = run_trial if cache is None else partial(run_cached_trial, cache)
+
+    if num_workers == 1:
+        for i, trial in trials:
+            add_trial(i, *trial_func(*trial))
+    else:
+        # Use every core when no number of workers is given
+        num_workers = num_workers or os.cpu_count()
+
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for i, result in map_bounded(executor, trial_func, trials, 4 * num_workers):
+                add_trial(i, *result)
+
+    n = online_stat_list[0].count
+    complete_stat_list = [list(online_stats.mean) for online_stats in online_stat_list]
+
+    # Print Results
+    if not suppress_printing:
+        for algorithm, online_stats in zip(algorithm_list, online_stat_list):
+            stats = online_stats.mean
+            variance_list = online_stats.variance()
 
-        # Print Results
-        if not suppress_printing:
             print(f'{algorithm}:')
             print(f'Average Time / Area: {stats[0]}')
             print(f'\tVariance: {variance_list[0]}')
@@ -249,6 +451,20 @@ def run_set_of_jobs(algorithm_list, job_list_list, func_arg_list, num_machines,
             print(f'\tVariance: {variance_list[2]}')
             print()
 
+        # Print the paired differences against the first algorithm
+        for algorithm, paired_stats in zip(algorithm_list[1:], paired_stat_list[1:]):
+            stats = paired_stats.mean
+            variance_list = paired_stats.variance()
+
+            print(f'{algorithm} - {algorithm_list[0]} (paired by set of jobs):')
+            print(f'Average Time / Area Difference: {stats[0]}')
+            print(f'\tVariance: {variance_list[0]}')
+            print(f'Average Weighted Stretch Difference: {stats[1]}')
+            print(f'\tVariance: {variance_list[1]}')
+            print(f'Average Average Wait Time Difference: {stats[2]}')
+            print(f'\tVariance: {variance_list[2]}')
+            print()
+
     # Make graph
     if not suppress_graphing:
         plots = []
@@ -259,11 +475,13 @@ def run_set_of_jobs(algorithm_list, job_list_list, func_arg_list, num_machines,
 
         # Plot Everything
         plots += graph_averages(algorithm_titles, complete_stat_list)
-        plots += graph_distributions(algorithm_titles, stat_every_run, n)
+        plots += graph_distributions(algorithm_titles, online_stat_list, n)
 
-        # Plot only LIST and Novel
-        plots += graph_averages(algorithm_titles[:-1], complete_stat_list[:-1])
-        plots += graph_distributions(algorithm_titles[:-1], stat_every_run[:-1], n)
+        # Plot only LIST and Novel when the random algorithm was also run
+        kept = [i for i, algorithm in enumerate(algorithm_list) if algorithm != 'randomalgo']
+        if 0 < len(kept) < len(algorithm_list):
+            plots += graph_averages([algorithm_titles[i] for i in kept], [complete_stat_list[i] for i in kept])
+            plots += graph_distributions([algorithm_titles[i] for i in kept], [online_stat_list[i] for i in kept], n)
 
         # Show graph or save to pdf
         show = True # Change if you want a pdf
@@ -277,6 +495,8 @@ def run_set_of_jobs(algorithm_list, job_list_list, func_arg_list, num_machines,
 
             pp.close()
 
+    return metrics_list
+
     
 if __name__ == '__main__':
 
@@ -307,6 +527,13 @@ if __name__ == '__main__':
     #run_single_set_of_jobs('listalgo', jobs(*LISTLambdaParams), 3)
     #run_set_of_jobs(['novelalgo', 'listalgo'], [ jobs for _ in range( 1000 ) ], [NovelLambdaParams, LISTLambdaParams], 3)
 
-    jobs = [generate_random_jobs(100, HIGHEST_PRIORITY, 25, 50) for _ in range(100)]
-    run_set_of_jobs(['novelalgo', 'lptalgo'], jobs, [NovelLambdaParams, LPTLambdaParams], 4, False)
+    # Every algorithm runs on the same sets of jobs with the same random numbers, and
+    # the trials are spread over every core and cached between runs. The runtimes
+    # go up to 10 rather than the 25 of sym.py and of earlier versions of this
+    # workload. A job of randomalgo fails with a chance of 1/2 on every timestep it
+    # runs, so at 25 a single trial of it does not finish in ten minutes
+    rng = np.random.default_rng(0)
+    jobs = [generate_random_jobs(100, HIGHEST_PRIORITY, 10, 50, rng) for _ in range(100)]
+    run_set_of_jobs(['novelalgo', 'listalgo', 'randomalgo'], jobs, [NovelLambdaParams, LISTLambdaParams, RandomAlgoParams], 4, False,
+                    num_workers=None, seed=0, cache=ResultCache(RESULT_CACHE_DIR), common_random_numbers=True)
 
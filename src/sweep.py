@@ -0,0 +1,151 @@
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import run_algo
+from generate_random_jobs import generate_random_jobs
+from modules.metrics import METRIC_COUNTERS
+from modules.schedulerconfig import DEFAULT_CONFIG
+
+# The parameters that can be swept. Every parameter other than the number of
+# machines is a constant of the scheduler config
+CONFIG_PARAMETERS = ('mew', 'checkpointing_overhead', 'migration_overhead', 'recovery_overhead', 'failure_rate', 'period')
+SWEEP_PARAMETERS = CONFIG_PARAMETERS + ('num_machines',)
+
+# The statistics of every trial, in the order run_single_set_of_jobs returns them
+RESULT_COLUMNS = ('total_runtime_over_area', 'avg_weighted_stretch', 'avg_wait_time')
+
+# The workloads of every trial. Jobs that restart on an error take exponentially
+# longer to finish the longer they are, so long runtimes at a high failure rate
+# can take a very long time to simulate
+NUM_JOBS = 100
+MAX_RUNTIME = 25
+MAX_RELEASE_TIME = 50
+
+# The number of machines when it is not swept
+NUM_MACHINES = 4
+
+
+# Expand a grid of values into a design with one point for every combination.
+# values maps every parameter to the list of values it takes
+def grid_design(values):
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+# Draw a Latin hypercube design of num_points points. ranges maps every parameter
+# to the ( low, high ) range it is drawn from. The range of every parameter is split
+# into num_points strata and every stratum is drawn from exactly once, so a few
+# points still cover every parameter evenly. The number of machines is rounded
+def latin_hypercube_design(ranges, num_points, rng):
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(num_points) + rng.random(num_points)) / num_points
+        columns[name] = low + strata * (high - low)
+
+        if name == 'num_machines':
+            columns[name] = np.rint(columns[name]).astype(np.int64)
+
+    return [{ name : column[i].item() for name, column in columns.items() } for i in range(num_points)]
+
+
+# Split a point of a design into its config and its number of machines
+def point_config(point):
+    config = DEFAULT_CONFIG.with_changes(**{ name : value for name, value in point.items() if name in CONFIG_PARAMETERS })
+    return config, int(point.get('num_machines', NUM_MACHINES))
+
+
+# Run one trial of an algorithm at one point of a design. The workload of the
+# trial is generated from its seed, so every point and algorithm of the same trial
+# runs on the same workload without it being sent to the worker
+def run_sweep_trial(algorithm, point, workload_seed, seed, num_jobs, max_runtime, common_random_numbers=False):
+    config, num_machines = point_config(point)
+    workload = generate_random_jobs(num_jobs, run_algo.HIGHEST_PRIORITY, max_runtime, MAX_RELEASE_TIME, np.random.default_rng(workload_seed))
+
+    stats, metrics = run_algo.run_trial(algorithm, workload, run_algo.get_job_params(algorithm, config), num_machines, True, seed, config, common_random_numbers)
+    return stats, [metrics.get_count(name) for name in METRIC_COUNTERS]
+
+
+# Run every algorithm for num_trials trials at every point of a design on a pool
+# of processes, and write one row for every trial to a CSV file at path. Every row
+# holds the point, the config constants that were used, the algorithm, the trial
+# and its results. A num_workers of None uses every core. With common_random_numbers
+# every point and algorithm of a trial sees the same failures on the same jobs, so
+# the rows of a trial can be compared directly. Returns the number of rows
+def run_sweep(design, path, algorithm_list, num_trials, num_jobs=NUM_JOBS, max_runtime=MAX_RUNTIME, num_workers=None, seed=0, common_random_numbers=False):
+    num_workers = num_workers or os.cpu_count()
+
+    # Every trial gets its own workload, which all of the points and algorithms share
+    workload_seeds = [int(state) for state in np.random.SeedSequence(seed).generate_state(num_trials, np.uint64)]
+
+    tasks = (((p, algorithm, j), (algorithm, point, workload_seeds[j], run_algo.trial_seed(seed, 0 if common_random_numbers else i, j), num_jobs, max_runtime, common_random_numbers))
+             for p, point in enumerate(design)
+             for j in range(num_trials)
+             for i, algorithm in enumerate(algorithm_list))
+
+    fieldnames = ['point', 'algorithm', 'trial', 'num_machines', *DEFAULT_CONFIG.as_dict(), *RESULT_COLUMNS, *METRIC_COUNTERS]
+    num_rows = 0
+
+    with open(path, 'w', newline='') as f, ProcessPoolExecutor(max_workers=num_workers) as executor:
+        writer = csv.DictWriter(f, fieldnames)
+        writer.writeheader()
+
+        for (p, algorithm, j), (stats, counts) in run_algo.map_bounded(executor, run_sweep_trial, tasks, 4 * num_workers):
+            config, num_machines = point_config(design[p])
+
+            writer.writerow({ 'point' : p, 'algorithm' : algorithm, 'trial' : j, 'num_machines' : num_machines }
+                            | config.as_dict()
+                            | dict(zip(RESULT_COLUMNS, stats))
+                            | dict(zip(METRIC_COUNTERS, counts)))
+            num_rows += 1
+
+    return num_rows
+
+
+# Parse a NAME=VALUE argument into the name and the values of a parameter. In a grid
+# the values are a comma separated list, and in a Latin hypercube they are LOW:HIGH
+def parse_parameter(argument, latin_hypercube):
+    name, _, values = argument.partition('=')
+    if name not in SWEEP_PARAMETERS:
+        raise ValueError(f'{name} is not one of {", ".join(SWEEP_PARAMETERS)}')
+
+    cast = int if name == 'num_machines' and not latin_hypercube else float
+
+    if latin_hypercube:
+        low, _, high = values.partition(':')
+        return name, (float(low), float(high))
+
+    return name, [cast(value) for value in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep the algorithms over a design of scheduler constants and machine counts.')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help=f'a swept parameter, one of {", ".join(SWEEP_PARAMETERS)}. Takes V1,V2,... in a grid and LOW:HIGH with --lhs')
+    parser.add_argument('--lhs', type=int, metavar='N', help='draw N points from a Latin hypercube instead of expanding a grid')
+    parser.add_argument('--algorithms', nargs='+', default=['novelalgo', 'listalgo'], choices=list(run_algo.ALGORITHM_MODULES))
+    parser.add_argument('--trials', type=int, default=10, help='trials of every algorithm at every point')
+    parser.add_argument('--jobs', type=int, default=NUM_JOBS, help='jobs in every workload')
+    parser.add_argument('--max-runtime', type=int, default=MAX_RUNTIME, help='longest runtime of a job')
+    parser.add_argument('--workers', type=int, help='worker processes, every core by default')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--common-random-numbers', action='store_true', help='give every point and algorithm of a trial the same failures')
+    parser.add_argument('--output', default='sweep.csv', help='the CSV file to write the results to')
+    args = parser.parse_args()
+
+    try:
+        parameters = dict(parse_parameter(argument, args.lhs is not None) for argument in args.param)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.lhs is not None:
+        design = latin_hypercube_design(parameters, args.lhs, np.random.default_rng(args.seed))
+    else:
+        design = grid_design(parameters)
+
+    num_rows = run_sweep(design, args.output, args.algorithms, args.trials, args.jobs, args.max_runtime, args.workers, args.seed, args.common_random_numbers)
+    print(f'Wrote {num_rows} rows for {len(design)} points to {args.output}')
@@ -0,0 +1,164 @@
+import io
+import warnings
+
+import numpy as np
+
+from generate_random_jobs import JOB_DTYPE
+from modules.job import Job
+from modules.jobtable import JobTable
+
+# These are the fields of every line of a Standard Workload Format trace, in order.
+# A value of -1 means the field is missing
+SWF_FIELDS = ('job_number',
+              'submit_time',
+              'wait_time',
+              'run_time',
+              'allocated_processors',
+              'average_cpu_time',
+              'used_memory',
+              'requested_processors',
+              'requested_time',
+              'requested_memory',
+              'status',
+              'user_id',
+              'group_id',
+              'executable_number',
+              'queue_number',
+              'partition_number',
+              'preceding_job_number',
+              'think_time')
+
+# This is the column of every field in the parsed lines
+SWF_COLUMNS = { field : i for i, field in enumerate(SWF_FIELDS) }
+
+
+# Read an SWF trace a chunk of bytes at a time and yield the given fields of every
+# chunk as a dictionary of arrays. Comment lines, which start with ';', are skipped.
+# Every chunk is parsed by numpy in one call, and only the given fields are kept
+def read_swf_columns(path, fields=SWF_FIELDS, chunk_size=1 << 24):
+    usecols = [SWF_COLUMNS[field] for field in fields]
+
+    with open(path, 'rb') as f:
+        leftover = b''
+
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+
+            # A chunk without the end of a line is all part of the partial line,
+            # which is only parsed once the rest of it has been read
+            end = chunk.rfind(b'\n') + 1
+            if end == 0:
+                leftover += chunk
+                continue
+
+            # Keep the last partial line for the next chunk
+            lines = leftover + chunk[:end]
+            leftover = chunk[end:]
+            yield _parse_swf_lines(lines, fields, usecols)
+
+        if leftover:
+            yield _parse_swf_lines(leftover, fields, usecols)
+
+
+# Parse a block of complete SWF lines into a dictionary of the given fields
+def _parse_swf_lines(lines, fields, usecols):
+    # A block of only comments has no data, which is not worth a warning
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        values = np.loadtxt(io.BytesIO(lines), comments=';', usecols=usecols, ndmin=2)
+
+    return { field : values[:, i] for i, field in enumerate(fields) }
+
+
+# Read an SWF trace and yield its jobs as workload arrays of JOB_DTYPE, one array for
+# every chunk of the file. The fields of the trace map to the fields of a job:
+#   job_id       : the job number
+#   release_time : the submit time since the first job, times time_scale and rounded up
+#   runtime      : the run time times time_scale and rounded up, times the allocated
+#                  processors if weight_by_processors is set
+#   priority     : the priority_field of the trace, clipped to between 1 and max_priority
+# Jobs without a run time, with more than max_processors processors, or that job_filter
+# rejects are dropped. job_filter takes a dictionary of every field of a chunk and returns
+# which jobs to keep. Only the fields that are needed are parsed when there is no filter
+def read_swf_workloads(path, time_scale=1.0, max_priority=10, priority_field='queue_number',
+                       weight_by_processors=False, max_processors=None, job_filter=None, chunk_size=1 << 24):
+    fields = SWF_FIELDS
+    if job_filter is None:
+        fields = ('job_number', 'submit_time', 'run_time', 'allocated_processors', priority_field)
+
+    first_submit_time = None
+
+    for columns in read_swf_columns(path, fields, chunk_size):
+        # Drop the jobs that cannot be simulated or are filtered out
+        keep = columns['run_time'] > 0
+        if max_processors is not None:
+            keep &= columns['allocated_processors'] <= max_processors
+        if job_filter is not None:
+            keep &= job_filter(columns)
+
+        if not keep.any():
+            continue
+
+        submit_time = columns['submit_time'][keep]
+        if first_submit_time is None:
+            first_submit_time = submit_time[0]
+
+        runtime = np.ceil(columns['run_time'][keep] * time_scale)
+        if weight_by_processors:
+            runtime *= np.maximum(columns['allocated_processors'][keep], 1)
+
+        workload = np.empty(len(submit_time), dtype=JOB_DTYPE)
+        workload['job_id'] = columns['job_number'][keep]
+        workload['priority'] = np.clip(columns[priority_field][keep], 1, max_priority)
+        workload['runtime'] = np.maximum(runtime, 1)
+        workload['release_time'] = np.maximum(np.ceil((submit_time - first_submit_time) * time_scale), 0)
+
+        yield workload
+
+
+# Read a whole SWF trace into a single workload array, which can be given to
+# run_set_of_jobs or written to a workload file. Takes the same options as
+# read_swf_workloads
+def read_swf(path, **kwargs):
+    return np.concatenate([np.empty(0, dtype=JOB_DTYPE), *read_swf_workloads(path, **kwargs)])
+
+
+# Read an SWF trace and yield ( release_time, jobs ) batches that can be given straight
+# to GlobalScheduler.run_schedule. Only one chunk of the file is read at a time, and
+# the jobs of every chunk are stored in a job table of their own. The scheduler moves
+# the jobs it runs into the table of its machines and moves them back once they
+# complete, reusing their rows, so the table of the machines only holds the first
+# chunk and the jobs that have started but not completed. A chunk's table is freed
+# once nothing refers to its jobs, but the scheduler keeps every completed job in its
+# finished_tasks. Takes the same options as read_swf_workloads
+def swf_job_batches(path, job_strategy, **kwargs):
+    # These are the jobs of the last release time of the previous chunk, which may
+    # carry on into the next chunk
+    release_time = None
+    jobs = []
+
+    for workload in read_swf_workloads(path, **kwargs):
+        job_table = JobTable(len(workload))
+        rows = job_table.add_jobs(workload['job_id'], workload['priority'], workload['runtime'], workload['release_time'])
+
+        # Split the rows wherever the release time changes
+        release_times = workload['release_time']
+        starts = np.flatnonzero(np.diff(release_times, prepend=np.nan) != 0)
+        ends = np.append(starts[1:], len(rows))
+
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            batch_release_time = release_times[start].item()
+
+            if batch_release_time != release_time:
+                if jobs:
+                    yield release_time, jobs
+
+                release_time = batch_release_time
+                jobs = []
+
+            jobs += [Job.from_row(job_strategy, job_table, row) for row in rows[start:end].tolist()]
+
+    if jobs:
+        yield release_time, jobs
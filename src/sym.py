@@ -1,5 +1,8 @@
+import hashlib
+import json
+import os
+
 import numpy as np
-from sympy import *
 from scipy.optimize import minimize
 from scipy.stats import linregress
 import matplotlib.pyplot as plt
@@ -7,119 +10,187 @@ import matplotlib.pyplot as plt
 import novelalgo
 import run_algo
 from generate_random_jobs import generate_random_jobs
+from modules.resultcache import ResultCache
 
 # Debug stuff
 IS_USE_UNICODE = False
 
-# Symbol Declataration
-## Error bits
-## T := E(T*),
-T_star, mu, C, lam, T, R = symbols('T_star mu C lam T R')
+# The number of machines the model is derived for
+NUM_OF_MACHINES = 4
 
-## Preemption bits
-## E_p := E'(T), O := O_{migrate}
-E_p, gamma, a, O, m, P = symbols('E_p gamma a O m P')
+# The derived model is cached in this directory, keyed by the constants it
+# was derived with. Change the version whenever the equations change
+MODEL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sym_cache')
+MODEL_VERSION = 2
 
-# Get equations for E(T*)
-T_equ = Eq(T_star, sqrt(2 * mu * C))
-E_equ = Eq(T, (E ** (lam * T_star) - 1) * (1 / lam + R) + C)
+# The test jobs are run with this seed, and their results are cached in the
+# result cache of run_algo, so rerunning the fits does not run the jobs again.
+# Change the seed to fit a different set of jobs
+SEED = 0
 
-# Get equation for E'(T)
-E_prime_equ = Eq(E_p, (E ** (-1 * gamma * a * T)) * a * T + (1 - E ** (-1 * gamma * a * T)) * (P * (a * T * Rational(1, 2) + E_p) + (1 - P) * (R + O * (m - 1) / m + E_p - a * T * Rational(1, 2))))
-E_prime_equ = Eq(E_p, solve(E_prime_equ, E_p)[0])
 
-E_prime_expr = solve(E_prime_equ, E_p)[0]
-pprint(collect(E_prime_expr, E ** (-1 * gamma * a * T)), use_unicode=IS_USE_UNICODE)
-print()
+# Derive E'(T) as an expression of a, gamma and P with the constants of the
+# novel algorithm substituted in. Returns the printed general expression, the
+# printed model and the model as a sympy srepr string. Solving the equations
+# with sympy takes seconds, which is why the result is cached by
+# load_E_prime_model
+def derive_E_prime_model(constants):
+    from sympy import symbols, Eq, sqrt, E, Rational, solve, collect, pretty, srepr
+
+    # Symbol Declataration
+    ## Error bits
+    ## T := E(T*),
+    T_star, mu, C, lam, T, R = symbols('T_star mu C lam T R')
+
+    ## Preemption bits
+    ## E_p := E'(T), O := O_{migrate}
+    E_p, gamma, a, O, m, P = symbols('E_p gamma a O m P')
+
+    # Get equations for E(T*)
+    T_equ = Eq(T_star, sqrt(2 * mu * C))
+    E_equ = Eq(T, (E ** (lam * T_star) - 1) * (1 / lam + R) + C)
+
+    # Get equation for E'(T)
+    E_prime_equ = Eq(E_p, (E ** (-1 * gamma * a * T)) * a * T + (1 - E ** (-1 * gamma * a * T)) * (P * (a * T * Rational(1, 2) + E_p) + (1 - P) * (R + O * (m - 1) / m + E_p - a * T * Rational(1, 2))))
+    E_prime_equ = Eq(E_p, solve(E_prime_equ, E_p)[0])
+
+    E_prime_expr = solve(E_prime_equ, E_p)[0]
+    general = pretty(collect(E_prime_expr, E ** (-1 * gamma * a * T)), use_unicode=IS_USE_UNICODE)
+
+    # Substitute in equations
+    E_equ = E_equ.subs(T_star, solve(T_equ, T_star)[0])
+    E_prime_equ = E_prime_equ.subs(T, solve(E_equ, T)[0])
+
+    # Substitute in constant values. P is left as a symbol, since it is only
+    # known after the jobs have run
+    symbol_names = { 'mu' : mu, 'lam' : lam, 'C' : C, 'R' : R, 'O' : O, 'm' : m }
+    E_prime_equ = E_prime_equ.subs([(symbol_names[name], value) for name, value in constants.items()])
+    E_prime_expr = solve(E_prime_equ, E_p)[0]
+
+    return { 'general' : general,
+             'model' : pretty(E_prime_expr, use_unicode=IS_USE_UNICODE),
+             'expression' : srepr(E_prime_expr) }
+
+
+# Load the E'(T) model for the given constants from the cache, deriving and
+# caching it first if it is not there
+def load_E_prime_model(constants):
+    key = json.dumps([MODEL_VERSION, IS_USE_UNICODE, constants], sort_keys=True)
+    path = os.path.join(MODEL_CACHE_DIR, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    model = derive_E_prime_model(constants)
 
-# Substitute in equations
-E_equ = E_equ.subs(T_star, solve(T_equ, T_star)[0])
-E_prime_equ = E_prime_equ.subs(T, solve(E_equ, T)[0])
+    # Write to a temporary file first so that runs at the same time never
+    # read a partial model
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(model, f)
+    os.replace(temp_path, path)
 
-# Substitute in constant values
-constant_bindings = [(mu, novelalgo.MEW),
-                     (lam, novelalgo.LAMBDA),
-                     (C, novelalgo.CHECKPOINTING_OVERHEAD),
-                     (R, novelalgo.RECOVERY_OVERHEAD),
-                     (O, novelalgo.MIGRATION_OVERHEAD),
-                     (m, 4)]
+    return model
 
-E_prime_equ = E_prime_equ.subs(constant_bindings)
+
+# Compile the expression of a model into E'(a, gamma, P). The cached
+# expression is rebuilt by sympy rather than run as code. Every argument may
+# be an array, so the model is evaluated for every ( a, gamma ) pair at once
+def compile_E_prime_fn(expression):
+    from sympy import symbols, sympify, lambdify
+
+    return lambdify(symbols('a gamma P'), sympify(expression), 'numpy')
+
+
+# Get the E'(T) model for the constants of the novel algorithm
+constant_bindings = { 'mu' : novelalgo.MEW,
+                      'lam' : novelalgo.LAMBDA,
+                      'C' : novelalgo.CHECKPOINTING_OVERHEAD,
+                      'R' : novelalgo.RECOVERY_OVERHEAD,
+                      'O' : novelalgo.MIGRATION_OVERHEAD,
+                      'm' : NUM_OF_MACHINES }
+
+E_prime_model = load_E_prime_model(constant_bindings)
+E_prime_fn_with_P = compile_E_prime_fn(E_prime_model['expression'])
+print(E_prime_model['general'])
+print()
 
 # Run set of test jobs
-jobs = [generate_random_jobs(100, run_algo.HIGHEST_PRIORITY, 25, 50) for _ in range(1000)]
-run_algo.run_set_of_jobs(['novelalgo'], jobs, [run_algo.NovelLambdaParams], 4, suppress_printing=True)
+rng = np.random.default_rng(SEED)
+jobs = [generate_random_jobs(100, run_algo.HIGHEST_PRIORITY, 25, 50, rng) for _ in range(1000)]
+metrics = run_algo.run_set_of_jobs(['novelalgo'], jobs, [run_algo.NovelLambdaParams], NUM_OF_MACHINES, suppress_printing=True, seed=SEED, cache=ResultCache(run_algo.RESULT_CACHE_DIR), keep_job_metrics=True)[0]
+
+# Get the job stats from the metrics of the run as typed arrays
+job_a = (metrics.get_job_column('orig_runtime') / novelalgo.PERIOD).astype(np.int64)
+job_p = metrics.get_job_column('priority').astype(np.int64)
+job_T = metrics.get_job_column('active_running_time')
 
-# Substitue P into equation
-P_val = novelalgo.total_kills / novelalgo.total_preempts
+# Substitue P into the model
+P_val = metrics.get_count('kills') / metrics.get_count('preempts')
 print(f'P: {P_val}\n')
-E_prime_equ = E_prime_equ.subs(P, P_val)
-E_prime_expr = solve(E_prime_equ, E_p)[0]
-pprint(E_prime_expr, use_unicode=IS_USE_UNICODE)
+print(E_prime_model['model'])
 print()
 
-# Lambdify expected time function
-E_prime_fn = lambdify([a, gamma], E_prime_expr)
+# Expected time function
+E_prime_fn = (lambda a, gamma : E_prime_fn_with_P(a, gamma, P_val))
 
-# Generate stats to fit data
-a_list = list(set([stat[0] for stat in run_algo.job_stats_a_to_T]))
-job_stats = [(a_val, [stat[1] for stat in run_algo.job_stats_a_to_T if stat[0] == a_val]) for a_val in a_list]
-job_stats.sort(key=lambda x : x[0])
-
-job_stats = [(stat[0], sum(stat[1]) / len(stat[1])) for stat in job_stats]
+# Generate stats to fit data. Every job is grouped by the index of its a
+# among the sorted values of a, so the mean of every group takes one pass
+a_list, a_index = np.unique(job_a, return_inverse=True)
+a_counts = np.bincount(a_index, minlength=len(a_list))
+a_means = np.bincount(a_index, weights=job_T, minlength=len(a_list)) / a_counts
 
 # Fit data to one gamma
 
-# Least squares function for minimization
-def least_squares(gamma, job_stats):
-    return sum([(stat[1] - E_prime_fn(stat[0], gamma[0])) ** 2 for stat in job_stats])
+# Least squares function for minimization. The model is evaluated for
+# every a at once
+def least_squares(gamma, a_vals, means):
+    return np.sum((means - E_prime_fn(a_vals, gamma[0])) ** 2)
 
 # Calculate best gamma
-best_gamma = minimize(least_squares, [0.001], (job_stats)).x[0]
+best_gamma = minimize(least_squares, [0.001], (a_list, a_means)).x[0]
 print(f'Best gamma: {best_gamma}')
 
 # Print job statistics
-for stat in job_stats:
-    gamma = best_gamma
-    print(f'{stat}, {E_prime_fn(stat[0], gamma)} , {abs(stat[1] - E_prime_fn(stat[0], gamma))}')
-print(f'Least squares: {least_squares([best_gamma], job_stats)}')
-print(f'Variance: {least_squares([best_gamma], job_stats) / len(run_algo.job_stats_a_to_T)}')
+expected = E_prime_fn(a_list, best_gamma)
+for a_val, mean, expected_mean in zip(a_list.tolist(), a_means.tolist(), expected.tolist()):
+    print(f'{(a_val, mean)}, {expected_mean} , {abs(mean - expected_mean)}')
+print(f'Least squares: {least_squares([best_gamma], a_list, a_means)}')
+print(f'Variance: {least_squares([best_gamma], a_list, a_means) / len(job_T)}')
 print()
 
 # Fit gamma based on priority
 
-# Generate priority stats
-
-p_list = list(set([stat[1] for stat in run_algo.job_stats_with_p]))
-job_stats_p = []
+# Generate priority stats. Every job is grouped by its ( p, a ) cell in a
+# table with a row for every p and a column for every a
+p_list, p_index = np.unique(job_p, return_inverse=True)
+num_cells = len(p_list) * len(a_list)
+cell_index = p_index * len(a_list) + a_index
 
-for p in p_list:
-    stat_list_total = []
-    for a in a_list:
-        stat_list = [stat[2] for stat in run_algo.job_stats_with_p if stat[0] == a and stat[1] == p]
-        if len(stat_list) != 0:
-            stat_list_total.append((a, sum(stat_list) / len(stat_list)))
+cell_counts = np.bincount(cell_index, minlength=num_cells).reshape(len(p_list), len(a_list))
+cell_sums = np.bincount(cell_index, weights=job_T, minlength=num_cells).reshape(len(p_list), len(a_list))
+filled = cell_counts > 0
+cell_means = cell_sums / np.maximum(cell_counts, 1)
 
-    stat_list_total.sort(key=lambda x : x[0])
+# Least squares of every p, with gamma[ i ] the gamma of the i-th p. The
+# model is evaluated for every cell at once, and empty cells are left out
+def priority_least_squares(gamma):
+    residuals = np.where(filled, cell_means - E_prime_fn(a_list[np.newaxis, :], np.reshape(gamma, (-1, 1))), 0)
+    return np.sum(residuals ** 2, axis=1)
 
-    job_stats_p.append((p, stat_list_total))
+# Generate best gamma for each p. The least squares of the priorities do
+# not depend on each other, so minimizing their sum fits all of them at once
+best_gamma_list = minimize(lambda gamma : np.sum(priority_least_squares(gamma)), np.full(len(p_list), 0.001)).x
+reg_list = priority_least_squares(best_gamma_list)
 
-job_stats_p.sort(key=lambda x : x[0])
+for i, p in enumerate(p_list.tolist()):
+    print((p, list(zip(a_list[filled[i]].tolist(), cell_means[i, filled[i]].tolist()))))
 
-# Generate best gamma for each p
-best_gamma_list = []
-reg_list = []
+    print(f'{p}: {best_gamma_list[i]} with reg. {reg_list[i]}\n')
 
-for job_stat in job_stats_p:
-    #print(job_stat)
-    best_gamma = minimize(least_squares, [0.001], (job_stat[1])).x[0]
-    best_gamma_list.append(best_gamma)
-    reg_list.append(least_squares([best_gamma], job_stat[1]))
-    print(job_stat)
-    
-    print(f'{job_stat[0]}: {best_gamma} with reg. {least_squares([best_gamma], job_stat[1])}\n')
-
-print(f'Average reg. {sum(reg_list) / len(reg_list)}')
+print(f'Average reg. {np.mean(reg_list)}')
 
 # Get line of best fit on gamma values
 
@@ -135,31 +206,19 @@ print(f'R^2: {r_2}\n')
 # Get new E_prime function based on p
 new_E_prime_fn = (lambda a, p : E_prime_fn(a, slope * p + intercept))
 
-# Test new E_prime function and get least squares
-def new_least_squares(job_stats):
-    return sum([(stat[2] - new_E_prime_fn(stat[0], stat[1])) ** 2 for stat in job_stats])
-
-new_job_stats_p = []
-
-for job_stat in job_stats_p:
-    for sub_job_stat in job_stat[1]:
-        new_job_stats_p.append((sub_job_stat[0], job_stat[0], sub_job_stat[1]))
-
-#for stat in new_job_stats_p:
-#    print(stat)
-
-nls = new_least_squares(new_job_stats_p)
-print(nls / len(new_job_stats_p))
+# Test new E_prime function and get least squares over every filled cell
+nls = np.sum((cell_means - new_E_prime_fn(a_list[np.newaxis, :], p_list[:, np.newaxis]))[filled] ** 2)
+print(nls / np.count_nonzero(filled))
 
 # Graph results
 
 plt.figure()
 
-x = [novelalgo.PERIOD * stat[0] for stat in job_stats]
-y = [stat[1] for stat in job_stats]
+x = novelalgo.PERIOD * a_list
+y = a_means
 
 x_2 = np.linspace(x[0], x[-1], 1000) 
-y_2 = [E_prime_fn(x / novelalgo.PERIOD, best_gamma) for x in x_2]
+y_2 = E_prime_fn(x_2 / novelalgo.PERIOD, best_gamma)
 
 plt.plot(x_2, y_2, label='Calculated Expected Average Runtime', color='red')
 plt.scatter(x, y, label='Actual Average Runtime')
@@ -172,7 +231,7 @@ plt.legend()
 plt.figure()
 
 x_2 = np.linspace(p_list[0], p_list[-1], 1000)
-y_2 = [slope * x + intercept for x in x_2]
+y_2 = slope * x_2 + intercept
 
 plt.plot(x_2, y_2, color='red')
 plt.scatter(p_list, best_gamma_list)
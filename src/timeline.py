@@ -0,0 +1,189 @@
+import argparse
+
+import numpy as np
+
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+
+from modules.eventrecorder import EVENT_TYPES, load_events
+
+# The height of a bar on its machine's row. Rows are one unit apart
+BAR_HEIGHT = 0.8
+
+# The marker and color of every event that is drawn as a point
+MARKER_STYLES = { 'checkpoint' : ('|', 'black'),
+                  'preempt' : ('v', 'orange'),
+                  'kill' : ('X', 'purple'),
+                  'migrate' : ('>', 'blue'),
+                  'error' : ('x', 'red') }
+
+
+# Build the vertices of a rectangle for every segment, which is how a
+# PolyCollection takes all of its bars in one array
+def _bar_vertices(machine, start, end):
+    bottom = machine - BAR_HEIGHT / 2
+    top = machine + BAR_HEIGHT / 2
+
+    vertices = np.empty((len(machine), 4, 2))
+    vertices[:, :, 0] = np.stack([start, start, end, end], axis=1)
+    vertices[:, :, 1] = np.stack([bottom, top, top, bottom], axis=1)
+    return vertices
+
+
+class Timeline:
+    ################################################
+    # The following is a per machine timeline of a
+    # recorded run. The events are turned into
+    # columns of segments and points once, and every
+    # kind of segment or point is drawn as a single
+    # artist, so drawing does not grow with the
+    # number of artists and a time window only
+    # selects from the columns that are already built
+    ################################################
+    def __init__(self, events, checkpointing_overhead=0, recovery_overhead=0):
+        # Older traces may not name their event types
+        event_types = [str(name) for name in events.get('event_types', EVENT_TYPES)]
+        codes = { name : i for i, name in enumerate(event_types) }
+
+        time = np.asarray(events['time'], dtype=np.float64)
+        event = np.asarray(events['event'])
+        machine = np.asarray(events['machine'])
+        job = np.asarray(events['job'])
+        value = np.asarray(events['value'], dtype=np.float64)
+
+        # This is the time of the last event, where the jobs that are still
+        # running are cut off
+        self.end_time = time.max() if len(time) else 0.0
+
+        # This is the number of machine rows
+        self.num_of_machines = int(machine.max()) + 1 if len(machine) else 0
+
+        ################################################
+        # A job runs on a machine from the time it is
+        # scheduled until the next job is scheduled on
+        # the machine or until it completes
+        ################################################
+        boundaries = np.flatnonzero((event == codes['schedule']) | (event == codes['complete']))
+        boundaries = boundaries[np.lexsort((time[boundaries], machine[boundaries]))]
+
+        boundary_time = time[boundaries]
+        boundary_machine = machine[boundaries]
+
+        # A segment ends at the next boundary on the same machine, or at the
+        # end of the trace for the last one
+        end = np.append(boundary_time[1:], self.end_time)
+        last_on_machine = np.append(boundary_machine[1:] != boundary_machine[:-1], True)
+        end[last_on_machine] = self.end_time
+
+        runs = event[boundaries] == codes['schedule']
+        self.jobs = { 'machine' : boundary_machine[runs],
+                      'start' : boundary_time[runs],
+                      'end' : end[runs],
+                      'job' : job[boundaries][runs] }
+
+        ################################################
+        # Locks start at their event and last for their
+        # value. Checkpoint and recovery locks are implied
+        # by the checkpoints and errors, so they are only
+        # drawn when their overhead is given
+        ################################################
+        locks = event == codes['lock']
+        lock_machine = [machine[locks]]
+        lock_start = [time[locks]]
+        lock_duration = [value[locks]]
+
+        if checkpointing_overhead > 0:
+            checkpoints = event == codes['checkpoint']
+            lock_machine.append(machine[checkpoints])
+            lock_start.append(time[checkpoints])
+            lock_duration.append(value[checkpoints] * checkpointing_overhead)
+
+        if recovery_overhead > 0:
+            errors = event == codes['error']
+            lock_machine.append(machine[errors])
+            lock_start.append(time[errors])
+            lock_duration.append(np.full(errors.sum(), recovery_overhead))
+
+        lock_start = np.concatenate(lock_start)
+        self.locks = { 'machine' : np.concatenate(lock_machine),
+                       'start' : lock_start,
+                       'end' : lock_start + np.concatenate(lock_duration) }
+
+        # Every other event is drawn as a point on its machine
+        self.points = {}
+        for name in MARKER_STYLES:
+            selected = event == codes[name]
+            self.points[name] = { 'machine' : machine[selected], 'time' : time[selected] }
+
+    # Select the segments that overlap a time window. Without a window
+    # every segment is selected
+    @staticmethod
+    def _select_segments(segments, window):
+        if window is None:
+            return segments
+
+        selected = (segments['end'] >= window[0]) & (segments['start'] <= window[1])
+        return { column : values[selected] for column, values in segments.items() }
+
+    # Select the points within a time window. Without a window every
+    # point is selected
+    @staticmethod
+    def _select_points(points, window):
+        if window is None:
+            return points
+
+        selected = (points['time'] >= window[0]) & (points['time'] <= window[1])
+        return { column : values[selected] for column, values in points.items() }
+
+    # Draw the timeline on the given axes, or on a new figure. When a
+    # window of ( start, end ) is given only what overlaps it is drawn,
+    # which keeps large traces quick to zoom into. Returns the axes
+    def plot(self, ax=None, window=None, cmap='tab20'):
+        if ax is None:
+            ax = plt.figure(figsize=(12, max(4, min(self.num_of_machines * 0.2, 40)))).gca()
+
+        # Jobs are colored by their id so that a job can be followed across
+        # machines
+        jobs = self._select_segments(self.jobs, window)
+        job_bars = PolyCollection(_bar_vertices(jobs['machine'], jobs['start'], jobs['end']),
+                                  array=jobs['job'] % plt.get_cmap(cmap).N, cmap=cmap, linewidths=0)
+        job_bars.set_clim(0, plt.get_cmap(cmap).N - 1)
+        ax.add_collection(job_bars)
+
+        locks = self._select_segments(self.locks, window)
+        ax.add_collection(PolyCollection(_bar_vertices(locks['machine'], locks['start'], locks['end']),
+                                         facecolors='gray', alpha=0.6, linewidths=0, label='lock'))
+
+        for name, (marker, color) in MARKER_STYLES.items():
+            points = self._select_points(self.points[name], window)
+            if len(points['time']):
+                ax.scatter(points['time'], points['machine'], marker=marker, color=color, s=12, linewidths=0.8, label=name)
+
+        ax.set_xlim(window if window is not None else (0, max(self.end_time, 1)))
+        ax.set_ylim(-1, max(self.num_of_machines, 1))
+        ax.set_xlabel('Time')
+        ax.set_ylabel('Machine')
+        ax.legend(loc='upper right', fontsize='small')
+        return ax
+
+
+# Load a trace saved by EventRecorder.save as a timeline
+def load_timeline(path, checkpointing_overhead=0, recovery_overhead=0):
+    return Timeline(load_events(path), checkpointing_overhead, recovery_overhead)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Draw the per machine timeline of a recorded scheduler trace.')
+    parser.add_argument('trace', help='a trace saved by EventRecorder.save')
+    parser.add_argument('--output', help='save the timeline to this file instead of showing it')
+    parser.add_argument('--window', nargs=2, type=float, metavar=('START', 'END'), help='only draw this time window')
+    parser.add_argument('--checkpointing-overhead', type=float, default=0, help='draw every checkpoint as a lock of this length')
+    parser.add_argument('--recovery-overhead', type=float, default=0, help='draw every error as a lock of this length')
+    args = parser.parse_args()
+
+    ax = load_timeline(args.trace, args.checkpointing_overhead, args.recovery_overhead).plot(window=args.window)
+
+    if args.output:
+        ax.figure.savefig(args.output, dpi=150, bbox_inches='tight')
+    else:
+        plt.show()
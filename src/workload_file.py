@@ -0,0 +1,153 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from generate_random_jobs import JOB_DTYPE, generate_random_jobs
+
+# This is the layout of a workload file. Every job also records which workload
+# of the file it belongs to, and the jobs of a workload are stored together
+WORKLOAD_FILE_DTYPE = np.dtype(JOB_DTYPE.descr + [('workload', np.uint32)])
+
+# These are the workload files this process has open, so that every workload
+# of a file shares one memory map
+_open_files = {}
+
+
+# Open a workload file as a read only memory map, reusing the map if this process
+# already has the file open. Nothing is read until the jobs are used
+def open_jobs(path):
+    if path not in _open_files:
+        _open_files[path] = np.load(path, mmap_mode='r')
+
+    return _open_files[path]
+
+
+# Write workloads to a .npy file one after another. The workloads are structured
+# arrays of JOB_DTYPE. When the total number of jobs is given the workloads can
+# come from a generator, otherwise they need to be a sequence
+def write_workloads(path, workloads, num_of_jobs=None):
+    if num_of_jobs is None:
+        num_of_jobs = sum(len(workload) for workload in workloads)
+
+    # Drop any map of an older file at this path
+    _open_files.pop(path, None)
+
+    jobs = np.lib.format.open_memmap(path, mode='w+', dtype=WORKLOAD_FILE_DTYPE, shape=(num_of_jobs,))
+
+    start = 0
+    for i, workload in enumerate(workloads):
+        end = start + len(workload)
+        if end > num_of_jobs:
+            raise ValueError('Workloads have more jobs than the file')
+
+        for field in JOB_DTYPE.names:
+            jobs[field][start:end] = workload[field]
+
+        jobs['workload'][start:end] = i
+        start = end
+
+    if start != num_of_jobs:
+        raise ValueError('Workloads have fewer jobs than the file')
+
+    jobs.flush()
+    del jobs
+
+    return WorkloadFile(path)
+
+
+# Generate workloads with generate_random_jobs straight into a workload file,
+# so only one workload is in memory at a time
+def generate_workload_file(path, num_workloads, num_jobs, max_priority, max_runtime, max_release_time, rng=None):
+    workloads = (generate_random_jobs(num_jobs, max_priority, max_runtime, max_release_time, rng) for _ in range(num_workloads))
+    return write_workloads(path, workloads, num_workloads * num_jobs)
+
+
+class WorkloadFile:
+    def __init__(self, path):
+        ################################################
+        # The following is a file of workloads that is
+        # memory mapped when it is first used. It
+        # pickles as its path, so worker processes map
+        # the same file and share its pages
+        ################################################
+        # This is the path of the file
+        self.path = path
+
+    # This function gets every job in the file
+    def get_jobs(self):
+        return open_jobs(self.path)
+
+    # This function gets the rows of the file that hold a workload. The rows
+    # are found with a binary search, so only a few pages of the file are read
+    def get_bounds(self, index):
+        workload = self.get_jobs()['workload']
+        return bisect_left(workload, index), bisect_right(workload, index)
+
+    # This function gets the number of workloads in the file
+    def __len__(self):
+        jobs = self.get_jobs()
+        return int(jobs['workload'][-1]) + 1 if len(jobs) > 0 else 0
+
+    # This function gets a workload of the file
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError('Workload index out of range')
+
+        return WorkloadView(self, index)
+
+    # This function goes through every workload of the file
+    def __iter__(self):
+        return (WorkloadView(self, i) for i in range(len(self)))
+
+    def __getstate__(self):
+        return self.path
+
+    def __setstate__(self, path):
+        self.path = path
+
+
+class WorkloadView:
+    def __init__(self, workload_file, index):
+        ################################################
+        # The following is a single workload of a
+        # workload file. It reads like a workload array,
+        # but pickles as its file and index instead of
+        # its jobs
+        ################################################
+        # This is the file the workload is in
+        self.workload_file = workload_file
+
+        # This is the index of the workload within the file
+        self.index = index
+
+        # These are the rows of the file that hold the workload, which
+        # are found when the workload is first used
+        self._bounds = None
+
+    # This function gets the rows of the file that hold the workload
+    def get_bounds(self):
+        if self._bounds is None:
+            self._bounds = self.workload_file.get_bounds(self.index)
+
+        return self._bounds
+
+    # This function gets the jobs of the workload from the memory map
+    def get_jobs(self):
+        start, end = self.get_bounds()
+        return self.workload_file.get_jobs()[start:end]
+
+    # This function gets a field of every job in the workload
+    def __getitem__(self, field):
+        return self.get_jobs()[field]
+
+    # This function gets the number of jobs in the workload
+    def __len__(self):
+        start, end = self.get_bounds()
+        return end - start
+
+    def __getstate__(self):
+        return self.workload_file, self.index
+
+    def __setstate__(self, state):
+        self.workload_file, self.index = state
+        self._bounds = None
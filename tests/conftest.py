@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The simulator is run from the src directory and imports its modules
+# from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from modules.machine import Machine
+from modules.machineprogression import count_checkpoints
+from modules.machinestate import MachineState
+
+
+# Step the checkpoint time of a machine from one timestamp to another one
+# tick at a time, passing every boundary that each tick reaches. Returns the
+# number of boundaries passed, the last one passed and the next checkpoint
+# time. A machine without a progression passes one boundary on every tick
+def step_checkpoints(checkpoint_time, checkpoint_progression, start, end):
+    passed, last_checkpoint_time = 0, checkpoint_time
+
+    for timestamp in range(start, end + 1):
+        while timestamp >= checkpoint_time:
+            passed += 1
+            last_checkpoint_time = checkpoint_time
+            checkpoint_time = checkpoint_time + checkpoint_progression if checkpoint_progression > 0 else timestamp + 1
+
+    return passed, last_checkpoint_time, checkpoint_time
+
+
+# These are the timestamps that long spans end on, one tick before, on and
+# one tick after the k-th boundary from the first checkpoint time
+def span_ends(checkpoint_time, checkpoint_progression):
+    ends = { int(checkpoint_time + k * checkpoint_progression) + offset
+             for k in [0, 1, 9, 10, 1000]
+             for offset in [-1, 0, 1] }
+    return sorted(end for end in ends if end >= 0)
+
+
+PROGRESSIONS = [1, 3, 7, 2.5, 0.75]
+
+
+# Catching a machine up over a long span in one step passes as many
+# boundaries, and ends on the same last and next checkpoint time, as stepping
+# over the span tick by tick
+@pytest.mark.parametrize('checkpoint_progression', PROGRESSIONS)
+def test_machine_catch_up_matches_stepping(checkpoint_progression):
+    for end in span_ends(checkpoint_progression, checkpoint_progression):
+        machine = Machine(0, checkpoint_progression, None, None)
+        passed, last_checkpoint_time = machine.catch_up_checkpoint_time(end)
+
+        expected_passed, expected_last, expected_next = step_checkpoints(checkpoint_progression, checkpoint_progression, 0, end)
+        assert (passed, last_checkpoint_time) == (expected_passed, expected_last)
+        assert machine.get_checkpoint_time() == expected_next
+
+
+# A span that ends exactly on a boundary passes that boundary, and the next
+# checkpoint time is one progression after it
+@pytest.mark.parametrize('checkpoint_progression', [1, 3, 7, 2.5])
+def test_span_ending_on_boundary(checkpoint_progression):
+    for k in [0, 2, 10, 1000]:
+        end = checkpoint_progression * (k + 1)
+        machine = Machine(0, checkpoint_progression, None, None)
+
+        assert machine.catch_up_checkpoint_time(end) == (k + 1, end)
+        assert machine.get_checkpoint_time() == end + checkpoint_progression
+
+
+# Catching up every machine of a machine state at once, and counting the
+# boundaries of every machine, gives the same results as stepping each
+# machine tick by tick, including machines without a progression and
+# machines whose next boundary is still ahead
+def test_machine_state_catch_up_matches_stepping():
+    checkpoint_progression = np.array([*PROGRESSIONS, 0, 5])
+    first_checkpoint_time = np.array([*PROGRESSIONS, 4, 10000])
+
+    for end in sorted({ end for p, c in zip(checkpoint_progression, first_checkpoint_time) for end in span_ends(c, p) }):
+        state = MachineState(len(checkpoint_progression), 0)
+        state.checkpoint_progression[:] = checkpoint_progression
+        state.checkpoint_time[:] = first_checkpoint_time
+
+        counted = count_checkpoints(first_checkpoint_time, checkpoint_progression, end)
+        rows = np.arange(len(checkpoint_progression))
+        passed, last_checkpoint_time = state.catch_up_checkpoints(rows, end)
+
+        for row, (c, p) in enumerate(zip(first_checkpoint_time, checkpoint_progression)):
+            expected_passed, expected_last, expected_next = step_checkpoints(c, p, 0, end)
+            assert counted[row] == expected_passed
+
+            # Without a progression catching up passes the one boundary of
+            # the current tick, since it is called on every tick. The last
+            # boundary is only used when one was passed
+            if p > 0:
+                assert passed[row] == expected_passed
+                assert state.checkpoint_time[row] == expected_next
+                if expected_passed > 0:
+                    assert last_checkpoint_time[row] == expected_last
+            else:
+                assert passed[row] == min(expected_passed, 1)
+                assert state.checkpoint_time[row] == (end + 1 if end >= c else c)
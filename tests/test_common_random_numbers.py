@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import randomafscheduler
+import run_algo
+from generate_random_jobs import generate_random_jobs
+from modules import machineprogression
+from modules.job import Job
+from modules.randomstreams import RandomStreams
+
+
+# A job progressed one machine at a time with the stream of its machine
+# decides its error and the location of the error with the same two draws
+# that advance_machines makes for the machine when it is vectorized
+def test_scalar_draws_match_vectorized():
+    job = Job(0, 1, 1000, 0, randomafscheduler.job_strategy(run_algo.DEFAULT_CONFIG))
+    stream = RandomStreams(0).machine_stream(3)
+    vectorized_streams = RandomStreams(0)
+
+    for inc in [1, 0.7, 0.3, 1, 0.5] * 4:
+        runtime = job.get_runtime()
+        progress = job.progress(0, inc, stream)
+
+        error_draw, location_draw = vectorized_streams.machine_draws([3], 2)[0]
+        assert job.is_in_error() == (error_draw < 0.5)
+        assert progress == (location_draw * inc if error_draw < 0.5 else min(runtime, inc))
+
+
+# With common random numbers the machines see the same draws whether they
+# are progressed one at a time or all at once, so a trial gives the same
+# results either way
+@pytest.mark.parametrize('algorithm', ['randomalgo', 'novelalgo', 'listalgo'])
+def test_scalar_matches_vectorized(monkeypatch, algorithm):
+    workload = generate_random_jobs(24, 10, 4, 20, np.random.default_rng(0))
+
+    def run_with_threshold(threshold):
+        monkeypatch.setattr(machineprogression, 'VECTORIZE_THRESHOLD', threshold)
+        return run_algo.run_trial(algorithm, workload, run_algo.get_job_params(algorithm), 8, True, 0, common_random_numbers=True)
+
+    scalar_stats, scalar_metrics = run_with_threshold(1 << 30)
+    vectorized_stats, vectorized_metrics = run_with_threshold(0)
+
+    assert vectorized_stats == pytest.approx(scalar_stats, rel=1e-9)
+    assert np.array_equal(vectorized_metrics.counts, scalar_metrics.counts)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import run_algo
+from generate_random_jobs import generate_random_jobs
+from modules.globalscheduler import GlobalScheduler
+
+
+# Run a trial while counting the timesteps that the scheduler loop runs
+# with a job on a machine
+def run_counted_trial(monkeypatch, algorithm, workload, event_driven, seed):
+    num_timesteps = [0]
+    advance_timestamp = GlobalScheduler._advance_timestamp
+
+    def counted_advance_timestamp(self):
+        num_timesteps[0] += self.has_busy_machine()
+        advance_timestamp(self)
+
+    monkeypatch.setattr(GlobalScheduler, '_advance_timestamp', counted_advance_timestamp)
+    stats, metrics = run_algo.run_trial(algorithm, workload, run_algo.get_job_params(algorithm), 4, event_driven, seed)
+    monkeypatch.undo()
+
+    return stats, metrics, num_timesteps[0]
+
+
+# Skipping timesteps gives the same results as running every one of them,
+# both on dense workloads where jobs wait in the queue and on sparse ones
+# with long gaps between releases
+@pytest.mark.parametrize('algorithm, max_runtime, max_release_time', [
+    ('novelalgo', 10, 20), ('novelalgo', 25, 2000), ('novelalgo', 200, 500),
+    ('listalgo', 10, 20), ('listalgo', 10, 2000),
+    ('randomalgo', 4, 20), ('randomalgo', 4, 2000),
+])
+def test_event_driven_matches_timesteps(monkeypatch, algorithm, max_runtime, max_release_time):
+    for seed in range(3):
+        workload = generate_random_jobs(12, 10, max_runtime, max_release_time, np.random.default_rng(seed))
+
+        stats, metrics, _ = run_counted_trial(monkeypatch, algorithm, workload, False, seed)
+        event_stats, event_metrics, _ = run_counted_trial(monkeypatch, algorithm, workload, True, seed)
+
+        assert event_stats == pytest.approx(stats, rel=1e-9)
+        assert np.array_equal(event_metrics.counts, metrics.counts)
+
+
+# On a sparse workload the scheduler loop only runs around releases,
+# completions, errors and lock expiries instead of on every timestep
+# that a job runs
+def test_event_driven_skips_busy_timesteps(monkeypatch):
+    workload = generate_random_jobs(10, 10, 25, 5000, np.random.default_rng(0))
+
+    _, _, num_timesteps = run_counted_trial(monkeypatch, 'novelalgo', workload, False, 0)
+    _, _, num_event_timesteps = run_counted_trial(monkeypatch, 'novelalgo', workload, True, 0)
+
+    assert num_event_timesteps * 10 < num_timesteps
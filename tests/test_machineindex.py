@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import run_algo
+from generate_random_jobs import generate_random_jobs
+from modules.globalscheduler import GlobalScheduler
+
+
+# This is the victim key of a running job with the runtime rounded
+# well past its floating point error
+def rounded_victim_key(machine):
+    job = machine.get_curr_job()
+    return (job.get_priority(), round(job.get_runtime(), 6), job.get_release_time())
+
+
+# The weakest machine found by the index runs a job with the smallest
+# victim key of every job on an unlocked machine, on enough machines for
+# the machines to be advanced together
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_weakest_machine_matches_brute_force(monkeypatch, event_driven):
+    get_weakest_machine = GlobalScheduler.get_weakest_machine
+    num_lookups = [0]
+
+    def checked_get_weakest_machine(self):
+        weakest_machine = get_weakest_machine(self)
+        candidates = [machine for machine in self.machines if machine.get_curr_job() is not None and machine.get_lock_time() == 0]
+
+        if len(candidates) == 0:
+            assert weakest_machine is None
+        else:
+            assert rounded_victim_key(weakest_machine) == min(rounded_victim_key(machine) for machine in candidates)
+
+        num_lookups[0] += 1
+        return weakest_machine
+
+    monkeypatch.setattr(GlobalScheduler, 'get_weakest_machine', checked_get_weakest_machine)
+
+    workload = generate_random_jobs(300, 10, 20, 60, np.random.default_rng(0))
+    run_algo.run_trial('novelalgo', workload, run_algo.get_job_params('novelalgo'), 16, event_driven, 0)
+
+    assert num_lookups[0] > 100
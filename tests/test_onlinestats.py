@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from modules.onlinestats import OnlineStatistics, StreamingHistogram
+
+
+# Values of three metrics on very different scales, so that the histograms of
+# the wider metrics have to double the width of their bins
+def sample_values(num_of_values, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.integers(0, 10, num_of_values),
+                            rng.exponential(5, num_of_values),
+                            rng.normal(1000, 300, num_of_values)))
+
+
+# Merging the statistics of two halves of the values gives the same mean,
+# variance, extremes and bins as adding all of the values to one accumulator
+@pytest.mark.parametrize('split', [0, 1, 250, 999])
+def test_merged_halves_match_all_at_once(split):
+    values = sample_values(1000)
+
+    whole = OnlineStatistics(3)
+    for row in values:
+        whole.add(row)
+
+    first = OnlineStatistics(3)
+    for row in values[:split]:
+        first.add(row)
+
+    second = OnlineStatistics(3)
+    second.add_many(values[split:])
+
+    merged = first.merge(second)
+
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert merged.variance() == pytest.approx(whole.variance(), rel=1e-9)
+    assert merged.variance() == pytest.approx(values.var(axis=0, ddof=1), rel=1e-9)
+    assert np.array_equal(merged.min, whole.min)
+    assert np.array_equal(merged.max, whole.max)
+
+    for merged_histogram, whole_histogram in zip(merged.histograms, whole.histograms):
+        merged_edges, merged_counts = merged_histogram.get_bins()
+        whole_edges, whole_counts = whole_histogram.get_bins()
+        assert np.array_equal(merged_edges, whole_edges)
+        assert np.array_equal(merged_counts, whole_counts)
+
+
+# Merging histograms whose bins have different widths gives the bins of one
+# histogram of all of the values
+def test_histograms_of_different_widths_merge():
+    rng = np.random.default_rng(1)
+    narrow_values = rng.uniform(0, 0.1, 500)
+    wide_values = rng.uniform(0, 5000, 500)
+
+    def histogram(values):
+        histogram = StreamingHistogram(64)
+        histogram.add(values)
+        return histogram
+
+    whole = histogram(np.concatenate((narrow_values, wide_values)))
+
+    # Merge in both orders, so that the histogram merged into is once the
+    # narrower and once the wider of the two
+    for merged in [histogram(narrow_values).merge(histogram(wide_values)), histogram(wide_values).merge(histogram(narrow_values))]:
+        assert len(merged) == len(whole)
+        edges, counts = merged.get_bins()
+        whole_edges, whole_counts = whole.get_bins()
+        assert np.array_equal(edges, whole_edges)
+        assert np.array_equal(counts, whole_counts)
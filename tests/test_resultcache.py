@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+import run_algo
+from generate_random_jobs import generate_random_jobs, NovelLambdaParams, LISTLambdaParams
+from modules.resultcache import ResultCache
+
+
+# Run a set of jobs through a cache and return its printed statistics along
+# with its metrics
+def run_cached_set_of_jobs(capsys, cache, jobs, seed=0):
+    metrics_list = run_algo.run_set_of_jobs(['novelalgo', 'listalgo'], jobs, [NovelLambdaParams, LISTLambdaParams], 4, seed=seed, cache=cache, keep_job_metrics=True)
+    return capsys.readouterr().out, metrics_list
+
+
+# The first run of the trials misses the cache and simulates them, and the
+# second run finds every trial and gives exactly the same statistics
+def test_hit_matches_miss(capsys, tmp_path):
+    cache = ResultCache(tmp_path)
+    rng = np.random.default_rng(0)
+    jobs = [generate_random_jobs(20, 10, 6, 20, rng) for _ in range(3)]
+
+    miss_output, miss_metrics = run_cached_set_of_jobs(capsys, cache, jobs)
+    assert (cache.hits, cache.misses) == (0, 6)
+
+    hit_output, hit_metrics = run_cached_set_of_jobs(capsys, cache, jobs)
+    assert (cache.hits, cache.misses) == (6, 6)
+
+    assert hit_output == miss_output
+    for miss, hit in zip(miss_metrics, hit_metrics):
+        assert np.array_equal(hit.counts, miss.counts)
+        assert np.array_equal(hit.get_job_column('active_running_time'), miss.get_job_column('active_running_time'))
+
+
+# Trials with a different seed or a different workload are not found in the
+# cache
+def test_different_trials_miss(capsys, tmp_path):
+    cache = ResultCache(tmp_path)
+    rng = np.random.default_rng(0)
+    jobs = [generate_random_jobs(20, 10, 6, 20, rng)]
+
+    run_cached_set_of_jobs(capsys, cache, jobs)
+    run_cached_set_of_jobs(capsys, cache, jobs, seed=1)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    # Changing the runtime of a single job changes the workload
+    changed_jobs = [jobs[0].copy()]
+    changed_jobs[0]['runtime'][0] += 1
+
+    run_cached_set_of_jobs(capsys, cache, changed_jobs)
+    assert (cache.hits, cache.misses) == (0, 6)
+
+
+# Once the cache grows past its size the results used the longest time ago
+# are removed first
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    result = bytes(300 << 10)
+
+    for i, key in enumerate(['a', 'b', 'c']):
+        cache.put(key, result)
+        os.utime(cache._file(key), (i, i))
+
+    # Reading the oldest result makes it the most recently used
+    assert cache.get('a') == result
+    cache.put('d', result)
+    cache.evict()
+
+    assert cache.get('b') is None
+    assert cache.get('a') == result
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import run_algo
+from generate_random_jobs import generate_random_jobs, NovelLambdaParams, LISTLambdaParams
+from modules.metrics import JOB_METRIC_COLUMNS
+
+
+# Run a set of jobs and return its printed statistics along with its metrics
+def run_printed_set_of_jobs(capsys, jobs, keep_job_metrics=True, **kwargs):
+    metrics_list = run_algo.run_set_of_jobs(['novelalgo', 'listalgo'], jobs, [NovelLambdaParams, LISTLambdaParams], 4, seed=0, keep_job_metrics=keep_job_metrics, **kwargs)
+    return capsys.readouterr().out, metrics_list
+
+
+# Running the trials in a pool of workers gives exactly the same statistics
+# as running them one after another
+@pytest.mark.parametrize('common_random_numbers', [False, True])
+def test_pool_matches_serial(capsys, common_random_numbers):
+    rng = np.random.default_rng(0)
+    jobs = [generate_random_jobs(20, 10, 6, 20, rng) for _ in range(6)]
+
+    serial_output, serial_metrics = run_printed_set_of_jobs(capsys, jobs, num_workers=1, common_random_numbers=common_random_numbers)
+    pool_output, pool_metrics = run_printed_set_of_jobs(capsys, jobs, num_workers=3, common_random_numbers=common_random_numbers)
+
+    assert pool_output == serial_output
+    for serial, pool in zip(serial_metrics, pool_metrics):
+        assert np.array_equal(pool.counts, serial.counts)
+        assert np.array_equal(pool.get_job_column('active_running_time'), serial.get_job_column('active_running_time'))
+
+
+# Without keep_job_metrics the merged metrics keep only the statistics of the
+# jobs, which match the statistics of the job columns that would be kept
+def test_job_statistics_match_job_columns(capsys):
+    rng = np.random.default_rng(0)
+    jobs = [generate_random_jobs(20, 10, 6, 20, rng) for _ in range(6)]
+
+    kept_output, kept_metrics = run_printed_set_of_jobs(capsys, jobs)
+    output, metrics_list = run_printed_set_of_jobs(capsys, jobs, keep_job_metrics=False)
+
+    assert output == kept_output
+    for kept, metrics in zip(kept_metrics, metrics_list):
+        assert np.array_equal(metrics.counts, kept.counts)
+        assert metrics.get_num_jobs() == kept.get_num_jobs() == metrics.job_stats.count
+
+        columns = np.column_stack([kept.get_job_column(column) for column in JOB_METRIC_COLUMNS])
+        assert metrics.job_stats.mean == pytest.approx(columns.mean(axis=0))
+        assert metrics.job_stats.variance() == pytest.approx(columns.var(axis=0, ddof=1))
+
+        with pytest.raises(ValueError):
+            metrics.get_job_column('active_running_time')
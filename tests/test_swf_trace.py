@@ -0,0 +1,50 @@
+import numpy as np
+
+import run_algo
+from modules.globalscheduler import GlobalScheduler
+from swf_trace import SWF_FIELDS, read_swf, swf_job_batches
+
+
+# Write a synthetic SWF trace of jobs that are submitted a few timesteps apart,
+# so only a few of them run at once
+def write_swf_trace(path, num_jobs, seed=0):
+    rng = np.random.default_rng(seed)
+    lines = np.full((num_jobs, len(SWF_FIELDS)), -1, dtype=np.int64)
+    lines[:, 0] = np.arange(1, num_jobs + 1)
+    lines[:, 1] = np.cumsum(rng.integers(1, 6, num_jobs))
+    lines[:, 3] = rng.integers(1, 4, num_jobs)
+    lines[:, 4] = 1
+    lines[:, 14] = rng.integers(1, 11, num_jobs)
+
+    with open(path, 'w') as f:
+        f.write('; A synthetic trace\n')
+        np.savetxt(f, lines, fmt='%d')
+
+
+# Streaming a long trace through the scheduler reuses the rows of the jobs that
+# completed, so the job table of the machines stays the size of a chunk however
+# long the trace is
+def test_streamed_trace_keeps_job_table_bounded(tmp_path):
+    path = tmp_path / 'trace.swf'
+    write_swf_trace(path, 10000)
+
+    algorithm = 'listalgo'
+    scheduler = GlobalScheduler(4, *run_algo.get_machine_params(algorithm), event_driven=True, seed=0)
+    scheduler.run_schedule(swf_job_batches(path, *run_algo.get_job_params(algorithm), chunk_size=1 << 14))
+
+    assert len(scheduler.finished_tasks) == 10000
+    assert scheduler.machine_state.job_table.get_capacity() <= 1024
+
+    # The completed jobs were moved back to their own tables with their state
+    assert all(job.get_completion_time() > 0 for job in scheduler.finished_tasks[-100:])
+
+
+# Reading a trace in chunks shorter than its lines gives the same jobs as reading
+# it in one chunk
+def test_chunks_shorter_than_lines(tmp_path):
+    path = tmp_path / 'trace.swf'
+    write_swf_trace(path, 50)
+
+    whole = read_swf(path)
+    for chunk_size in [1, 7, 16, 100]:
+        assert np.array_equal(read_swf(path, chunk_size=chunk_size), whole)